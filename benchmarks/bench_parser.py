@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: MCQ extraction throughput over mcqs_data/gk/temp.html
+- Compares the old per-line BeautifulSoup re-parse with the single-pass parser
+- Checks both produce identical MCQs before reporting numbers
+"""
+
+import os
+import re
+import sys
+import time
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scraper import extract_mcqs_from_page, HTML_PARSER
+
+SAMPLE_PAGE = os.path.join(ROOT, 'mcqs_data', 'gk', 'temp.html')
+
+def extract_mcqs_legacy(soup):
+    """Original extractor: re-parses every <br/>-separated option line"""
+    mcqs = []
+    for article in soup.find_all('article'):
+        try:
+            question_elem = article.find('h2', class_='post-title')
+            if not question_elem:
+                continue
+            question_text = question_elem.get_text(strip=True)
+            excerpt = article.find('div', class_='excerpt')
+            if not excerpt:
+                continue
+            options_text = excerpt.find('p')
+            if not options_text:
+                continue
+            
+            options = []
+            correct_index = -1
+            for line in str(options_text).split('<br/>'):
+                clean_line = BeautifulSoup(line, 'html.parser').get_text(strip=True)
+                match = re.match(r'^([A-D])\.\s*(.+)$', clean_line)
+                if match:
+                    letter, option_text = match.groups()
+                    options.append(option_text)
+                    if '<strong>' in line and letter in line:
+                        correct_index = len(options) - 1
+            
+            if len(options) == 4 and correct_index >= 0:
+                mcqs.append({
+                    "question": question_text,
+                    "options": options,
+                    "correctAnswer": correct_index
+                })
+        except Exception:
+            continue
+    return mcqs
+
+def measure(extract, soup, min_seconds=1.0):
+    """Run extract repeatedly for at least min_seconds, return MCQs/second"""
+    runs = 0
+    total = 0
+    start = time.perf_counter()
+    while True:
+        total += len(extract(soup))
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return total / elapsed
+
+def main():
+    with open(SAMPLE_PAGE, 'rb') as f:
+        html = f.read()
+    
+    # Golden check: the legacy extractor defines the expected output
+    parsers = ['html.parser'] + ([HTML_PARSER] if HTML_PARSER != 'html.parser' else [])
+    expected = extract_mcqs_legacy(BeautifulSoup(html, 'html.parser'))
+    for parser in parsers:
+        actual = extract_mcqs_from_page(BeautifulSoup(html, parser))
+        if actual != expected:
+            print(f"✗ Output mismatch with {parser}")
+            sys.exit(1)
+    print(f"✓ Identical output ({len(expected)} MCQs) with: {', '.join(parsers)}")
+    
+    soup = BeautifulSoup(html, 'html.parser')
+    before = measure(extract_mcqs_legacy, soup)
+    after = measure(extract_mcqs_from_page, soup)
+    print(f"Before: {before:10.0f} MCQs/s")
+    print(f"After:  {after:10.0f} MCQs/s  ({after / before:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+CLI startup cost of youtube_automation.py, per subcommand
+- Runs each subcommand under `python -X importtime` in a scratch folder
+- Reports wall time, total import time and how many Google SDK modules
+  were imported (status / dry-run / --help should import none)
+- Also run as part of bench_suite.py, so regressions show up in `compare`
+
+Usage:
+    python benchmarks/bench_startup.py [--top 10]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'youtube_automation.py')
+COMMANDS = ['--help', 'status', 'dry-run']
+HEAVY_PREFIXES = ('google.generativeai', 'google.ai', 'googleapiclient', 'google_auth_oauthlib',
+                  'google.auth', 'grpc', 'httplib2')
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        self_us, cumulative, module = int(parts[0]), int(parts[1]), parts[2]
+        depth = (len(module) - len(module.lstrip(' '))) // 2
+        imports.append((module.strip(), self_us, cumulative, depth))
+    return imports
+
+
+def measure(command, workdir, repeat=3):
+    """Best-of wall seconds plus the import profile of the last run"""
+    best = float('inf')
+    imports = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', SCRIPT, command],
+                                cwd=workdir, capture_output=True, text=True)
+        best = min(best, time.perf_counter() - start)
+        imports = parse_importtime(result.stderr)
+        if result.returncode != 0:
+            raise RuntimeError(f"{command} exited with {result.returncode}: {result.stderr[-500:]}")
+    return best, imports
+
+
+def scratch_folder(workdir):
+    """A tiny output/ folder so status and dry-run have something to look at"""
+    output = os.path.join(workdir, 'output')
+    os.makedirs(output, exist_ok=True)
+    for i in range(1, 4):
+        with open(os.path.join(output, f'Quiz{i}.mp4'), 'wb') as f:
+            f.write(b'\0' * 1024)
+        with open(os.path.join(output, f'Quiz{i}.json'), 'w', encoding='utf-8') as f:
+            f.write('{"question": "Q?", "options": ["a", "b", "c", "d"], "correctAnswer": 0}')
+
+
+def bench_startup(results, commands=COMMANDS, top=0):
+    """Add startup_* metrics for each subcommand to results"""
+    with tempfile.TemporaryDirectory() as workdir:
+        scratch_folder(workdir)
+        for command in commands:
+            label = command.strip('-').replace('-', '_')
+            wall, imports = measure(command, workdir)
+            total_us = sum(cumulative for _, _, cumulative, depth in imports if depth == 0)
+            heavy = [module for module, _, _, _ in imports if module.startswith(HEAVY_PREFIXES)]
+            results[f'startup_wall_s_{label}'] = (wall, 's', 'lower')
+            results[f'startup_import_ms_{label}'] = (total_us / 1000, 'ms', 'lower')
+            results[f'startup_sdk_modules_{label}'] = (len(heavy), 'modules', 'lower')
+            if top:
+                print(f"\n{command}: {wall * 1000:.0f} ms wall, {total_us / 1000:.0f} ms importing, "
+                      f"{len(heavy)} SDK modules")
+                for module, _, cumulative, _ in sorted((i for i in imports if i[3] == 0),
+                                                       key=lambda i: -i[2])[:top]:
+                    print(f"   {cumulative / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startup time of youtube_automation.py subcommands")
+    parser.add_argument('--top', type=int, default=10, help="slowest top-level imports to list")
+    args = parser.parse_args()
+    bench_startup({}, top=args.top)
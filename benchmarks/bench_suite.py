@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite over synthetic MCQ banks (10k / 100k / 1M)
+- extract_mcqs_from_page throughput on pakmcqs-style pages (output checked first)
+- Full-bank JSON load / dump time and peak memory, index build, random access
+- Compact MCQStore build time and resident size next to the loaded dicts
+- Upload ledger append cost (and the old rewrite-the-whole-JSON log, for reference)
+- Metadata fallback generation when Gemini returns nothing, offline tagger
+  fit time and per-MCQ tagging throughput
+- CLI startup per youtube_automation.py subcommand (bench_startup.py)
+- Results are saved as JSON baselines; `compare` flags regressions
+
+Usage:
+    python benchmarks/bench_suite.py run [--sizes 10k,100k,1m] [--save NAME]
+    python benchmarks/bench_suite.py compare BASELINE [CURRENT] [--threshold 0.10]
+
+Baselines live in benchmarks/baselines/<NAME>.json; synthetic banks are
+cached in benchmarks/data/.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bs4 import BeautifulSoup
+from synthetic import parse_size, size_label, bank_path, generate_mcqs, generate_page
+from scraper import extract_mcqs_from_page, HTML_PARSER
+from mcq_dataset import build_index, MCQDataset
+from metadata_engine import MetadataEngine, MetadataCache
+from offline_tagger import OfflineTagger
+from upload_ledger import UploadLedger
+from mcq_store import MCQStore
+from bench_startup import bench_startup
+
+BASELINE_DIR = os.path.join(ROOT, 'benchmarks', 'baselines')
+DEFAULT_SIZES = '10k,100k,1m'
+THRESHOLD = 0.10
+LEDGER_APPENDS = 500
+
+
+def best_of(func, repeat):
+    """Fastest wall time of `repeat` calls"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_mb(func):
+    """Peak Python heap allocation while func runs"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def retained_mb(func):
+    """Python heap still held by func's return value"""
+    tracemalloc.start()
+    try:
+        result = func()
+        size = tracemalloc.get_traced_memory()[0]
+        del result
+        return size / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def throughput(func, items_per_call, min_seconds=0.5, windows=3):
+    """Best items/second over `windows` runs of at least min_seconds each"""
+    best = 0.0
+    for _ in range(windows):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                break
+        best = max(best, calls * items_per_call / elapsed)
+    return best
+
+
+def bench_extract(results):
+    mcqs = generate_mcqs(10, seed=1)
+    html = generate_page(mcqs)
+    soup = BeautifulSoup(html, HTML_PARSER)
+    if extract_mcqs_from_page(soup) != mcqs:
+        print("✗ extract_mcqs_from_page output does not match the synthetic page")
+        sys.exit(1)
+    results['extract_mcqs_per_s'] = (throughput(lambda: extract_mcqs_from_page(soup), len(mcqs)),
+                                     'MCQs/s', 'higher')
+    results['parse_extract_pages_per_s'] = (
+        throughput(lambda: extract_mcqs_from_page(BeautifulSoup(html, HTML_PARSER)), 1), 'pages/s', 'higher')
+
+
+def bench_bank(results, count, workdir):
+    label = size_label(count)
+    path = bank_path(count)
+    repeat = 5 if count <= 10000 else 3 if count <= 100000 else 1
+
+    def load():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    results[f'load_json_s_{label}'] = (best_of(load, repeat), 's', 'lower')
+    results[f'load_json_peak_mb_{label}'] = (peak_mb(load), 'MB', 'lower')
+    results[f'loaded_dicts_mb_{label}'] = (retained_mb(load), 'MB', 'lower')
+
+    mcqs = load()
+    out = os.path.join(workdir, 'dump.json')
+
+    def dump():
+        with open(out, 'w', encoding='utf-8') as f:
+            json.dump(mcqs, f, ensure_ascii=False, indent=2)
+
+    results[f'dump_json_s_{label}'] = (best_of(dump, repeat), 's', 'lower')
+    del mcqs
+
+    index = os.path.join(workdir, f'bank_{label}.idx')
+    results[f'index_build_s_{label}'] = (best_of(lambda: build_index(path, index), repeat), 's', 'lower')
+    rng = random.Random(0)
+    with MCQDataset(path, index) as bank:
+        picks = [rng.randrange(len(bank)) for _ in range(10000)]
+        results[f'index_lookups_per_s_{label}'] = (
+            len(picks) / best_of(lambda: [bank[i] for i in picks], repeat), 'MCQs/s', 'higher')
+
+    results[f'store_build_s_{label}'] = (best_of(lambda: MCQStore.from_json(path), 1), 's', 'lower')
+    results[f'store_mb_{label}'] = (retained_mb(lambda: MCQStore.from_json(path)), 'MB', 'lower')
+
+
+def bench_ledger(results, count, workdir):
+    """Per-upload append cost with `count` uploads already recorded"""
+    label = size_label(count)
+    ledger = UploadLedger(os.path.join(workdir, f'ledger_{label}.sqlite'), legacy_log=None)
+    ledger._connect()
+    with ledger._conn:
+        ledger._conn.executemany(
+            "INSERT INTO uploads (filename, video_id, url, title, uploaded_at) VALUES (?, ?, ?, ?, ?)",
+            ((f'Quiz{i}.mp4', f'vid{i}', f'https://youtube.com/shorts/vid{i}', 'title', '') for i in range(count))
+        )
+    metadata = {'title': 'Benchmark upload'}
+    start = time.perf_counter()
+    for i in range(LEDGER_APPENDS):
+        ledger.record(f'New{i}.mp4', f'new{i}', metadata)
+    results[f'ledger_append_us_{label}'] = ((time.perf_counter() - start) / LEDGER_APPENDS * 1e6, 'µs', 'lower')
+    ledger.close()
+
+
+def bench_legacy_log(results, count, workdir):
+    """The pre-ledger log: read the JSON, append one entry, rewrite the file"""
+    path = os.path.join(workdir, 'uploaded_videos.json')
+    with open(path, 'w') as f:
+        json.dump([{'filename': f'Quiz{i}.mp4', 'video_id': f'vid{i}', 'url': '', 'title': 'title',
+                    'uploaded_at': ''} for i in range(count)], f, indent=2)
+
+    def append():
+        with open(path, 'r') as f:
+            uploaded = json.load(f)
+        uploaded.append({'filename': 'New.mp4', 'video_id': 'new', 'url': '', 'title': 'title',
+                         'uploaded_at': time.strftime('%Y-%m-%d %H:%M:%S')})
+        with open(path, 'w') as f:
+            json.dump(uploaded, f, indent=2)
+
+    results[f'legacy_log_append_us_{size_label(count)}'] = (best_of(append, 3) * 1e6, 'µs', 'lower')
+
+
+class _SilentModel:
+    """Stands in for Gemini returning unusable output, so every item falls back"""
+
+    def generate_content(self, prompt):
+        raise RuntimeError("offline")
+
+
+def bench_metadata(results):
+    items = generate_mcqs(1000, seed=2)
+    try:
+        from youtube_automation import _finish_seo_metadata
+    except ImportError as e:
+        print(f"⚠️ Skipping fallback formatting ({e})")
+        _finish_seo_metadata = None
+
+    def fallback():
+        engine = MetadataEngine(_SilentModel(), cache=MetadataCache(':memory:'))
+        engine.generate(items)
+
+    # The engine prints one warning per failed batch; keep the report readable
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        results['metadata_fallback_items_per_s'] = (throughput(fallback, len(items)), 'items/s', 'higher')
+        if _finish_seo_metadata:
+            rate = throughput(lambda: [_finish_seo_metadata(None, i) for i in range(1000)], 1000)
+            results['metadata_fallback_format_per_s'] = (rate, 'items/s', 'higher')
+
+    bank = generate_mcqs(10000, seed=3)
+    results['tagger_fit_s_10k'] = (best_of(lambda: OfflineTagger.fit(bank), 3), 's', 'lower')
+    tagger = OfflineTagger.fit(bank)
+    engine = MetadataEngine(None, cache=MetadataCache(':memory:'), tagger=tagger, mode="offline")
+    results['metadata_offline_items_per_s'] = (throughput(lambda: engine.generate(items), len(items)),
+                                               'items/s', 'higher')
+
+
+def run(sizes):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        steps = [('extract', lambda: bench_extract(results))]
+        for count in sizes:
+            steps.append((f'bank {size_label(count)}', lambda count=count: bench_bank(results, count, workdir)))
+            steps.append((f'ledger {size_label(count)}', lambda count=count: bench_ledger(results, count, workdir)))
+        steps.append(('legacy log 10k', lambda: bench_legacy_log(results, 10000, workdir)))
+        steps.append(('metadata', lambda: bench_metadata(results)))
+        steps.append(('startup', lambda: bench_startup(results)))
+        for name, step in steps:
+            start = time.perf_counter()
+            step()
+            print(f"✓ {name} ({time.perf_counter() - start:.1f}s)")
+
+    return {
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'cpus': os.cpu_count(), 'html_parser': HTML_PARSER},
+        'results': {name: {'value': value, 'unit': unit, 'better': better}
+                    for name, (value, unit, better) in results.items()},
+    }
+
+
+def print_results(report):
+    for name, result in report['results'].items():
+        print(f"   {name:36s} {result['value']:14.3f} {result['unit']}")
+
+
+def baseline_path(name):
+    if os.path.sep in name or name.endswith('.json'):
+        return name
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """Print a comparison table; returns the names that regressed beyond threshold"""
+    regressions = []
+    for name, old in baseline['results'].items():
+        new = current['results'].get(name)
+        if new is None:
+            print(f"   {name:36s} {'missing':>14s}")
+            continue
+        if old['value'] == 0:
+            # e.g. SDK modules imported at startup: any increase from zero is a regression
+            change = float('inf') if new['value'] > 0 else 0.0
+        else:
+            change = (new['value'] - old['value']) / old['value']
+        worse = -change if old['better'] == 'higher' else change
+        marker = '✗' if worse > threshold else ('✓' if worse < -threshold else ' ')
+        if worse > threshold:
+            regressions.append(name)
+        print(f" {marker} {name:36s} {old['value']:12.3f} -> {new['value']:12.3f} {new['unit']:8s} {change:+7.1%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks over synthetic MCQ banks")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="run the suite")
+    run_parser.add_argument('--sizes', default=DEFAULT_SIZES, help="comma-separated bank sizes, e.g. 10k,100k")
+    run_parser.add_argument('--save', default=None, help="baseline name (benchmarks/baselines/NAME.json) or path")
+    compare_parser = commands.add_parser('compare', help="compare against a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current', nargs='?', default=None, help="saved results (default: run now)")
+    compare_parser.add_argument('--sizes', default=DEFAULT_SIZES)
+    compare_parser.add_argument('--threshold', type=float, default=THRESHOLD, help="allowed slowdown, 0.10 = 10%%")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size]
+    if args.command == 'run':
+        report = run(sizes)
+        print_results(report)
+        if args.save:
+            path = baseline_path(args.save)
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Saved to {path}")
+        return 0
+
+    with open(baseline_path(args.baseline), 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(baseline_path(args.current), 'r', encoding='utf-8') as f:
+            current = json.load(f)
+    else:
+        current = run(sizes)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"\n✓ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
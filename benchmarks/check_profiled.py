@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+metrics.profiled() around a thread pool, the way the scraper and uploader use it
+- Each mode runs in a child interpreter with a timeout, so a profiler that
+  kills pool threads (and leaves the pool waiting forever) fails the check
+  instead of hanging it
+- Scenarios (each checked, exits 1 on a mismatch):
+    cprofile   the block finishes and the .prof has every call made on the
+               pool threads (per-thread profilers before 3.12, one
+               sys.monitoring profiler from 3.12)
+    sample     the block finishes and the samples include the pool threads
+
+Usage:
+    python benchmarks/check_profiled.py [--python python3.12] [--timeout 60]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CALLS = 8
+
+# Run in the child: profile a pool of workers, then print what the profile saw
+CHILD = f"""
+import os, sys, pstats
+sys.path.insert(0, {ROOT!r})
+from concurrent.futures import ThreadPoolExecutor
+from metrics import profiled
+
+def hot_function(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+mode, directory = sys.argv[1], sys.argv[2]
+with profiled('pool', mode=mode, directory=directory, top=0):
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(hot_function, [200_000] * {CALLS}))
+print('results', len(results))
+if mode == 'cprofile':
+    stats = pstats.Stats(os.path.join(directory, 'pool.prof')).stats
+    print('calls', sum(stat[1] for key, stat in stats.items() if key[2] == 'hot_function'))
+else:
+    with open(os.path.join(directory, 'pool.samples.txt'), encoding='utf-8') as f:
+        print('calls', sum(int(line.split('\\t')[0]) for line in f if 'hot_function' in line))
+"""
+
+
+def run_child(python, mode, timeout):
+    """Returns {'results': n, 'calls': n} from the child, or None if it hung or crashed"""
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            done = subprocess.run([python, '-c', CHILD, mode, directory], capture_output=True,
+                                  text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None
+    if done.returncode != 0:
+        sys.stderr.write(done.stderr)
+        return None
+    return {key: int(value) for key, value in
+            (line.split() for line in done.stdout.splitlines() if line.startswith(('results', 'calls')))}
+
+
+def check(name, condition, detail):
+    print(f"{'✓' if condition else '✗'} {name}: {detail}")
+    return condition
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="profiled() around a thread pool")
+    parser.add_argument('--python', default=sys.executable, help="interpreter to check")
+    parser.add_argument('--timeout', type=float, default=60, help="seconds before a run counts as hung")
+    args = parser.parse_args(argv)
+    ok = True
+
+    seen = run_child(args.python, 'cprofile', args.timeout)
+    ok &= check('cprofile', seen == {'results': CALLS, 'calls': CALLS},
+                f"{seen['calls']} of {CALLS} pool calls profiled" if seen else "hung or crashed")
+
+    seen = run_child(args.python, 'sample', args.timeout)
+    ok &= check('sample', bool(seen) and seen['results'] == CALLS and seen['calls'] > 0,
+                f"{seen['calls']} samples in the pool threads" if seen else "hung or crashed")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Local fake of the Drive v3 endpoints drive_ingest.py uses, plus a check run
+- /changes/startPageToken, /changes (paged), /files (folder listing, paged)
+  and /files/<id>?alt=media with Range support
+- Files can be told to drop the connection halfway through the first download
+- The check run ingests a folder, adds files, restarts and verifies:
+    first run     every pair downloaded byte-exact, the interrupted video
+                  resumed with Range (at most one chunk re-sent, where a
+                  restart would re-send everything)
+    delta         new pairs arrive through /changes only (no second listing)
+    restart       nothing changed: no listing, no media requests, no jobs
+    other files   files outside the folder or not QuizN.mp4/json are ignored
+
+Usage:
+    python benchmarks/fake_drive.py [--pairs 6]
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from contextlib import redirect_stdout
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+from drive_ingest import DriveClient, DriveIngest, DriveState
+
+FOLDER = 'folder-renders'
+CHUNK_SIZE = 64 * 1024
+
+
+class FakeDrive:
+    """In-memory files and an append-only change log"""
+
+    def __init__(self, page_size=3):
+        self.files = {}
+        self.log = []                 # file ids, in change order
+        self.page_size = page_size
+        self.drop_once = set()        # ids whose next download is cut halfway
+        self.requests = Counter()
+        self.served = Counter()       # id -> media bytes sent
+        self.lock = threading.Lock()
+
+    def add(self, name, data, parent=FOLDER):
+        with self.lock:
+            file_id = f"id{len(self.files) + 1}"
+            self.files[file_id] = {'id': file_id, 'name': name, 'parents': [parent], 'data': data}
+            self.log.append(file_id)
+            return file_id
+
+    def meta(self, file_id):
+        file = self.files[file_id]
+        return {'id': file_id, 'name': file['name'], 'parents': file['parents'], 'trashed': False,
+                'size': str(len(file['data'])), 'md5Checksum': hashlib.md5(file['data']).hexdigest()}
+
+
+def make_handler(drive):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _json(self, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            path = url.path[len('/drive/v3'):]
+            with drive.lock:
+                if path == '/changes/startPageToken':
+                    drive.requests['start'] += 1
+                    return self._json({'startPageToken': str(len(drive.log))})
+                if path == '/changes':
+                    drive.requests['changes'] += 1
+                    start = int(params['pageToken'])
+                    ids = drive.log[start:start + drive.page_size]
+                    body = {'changes': [{'fileId': i, 'removed': False, 'file': drive.meta(i)} for i in ids]}
+                    if start + drive.page_size < len(drive.log):
+                        body['nextPageToken'] = str(start + drive.page_size)
+                    else:
+                        body['newStartPageToken'] = str(len(drive.log))
+                    return self._json(body)
+                if path == '/files':
+                    drive.requests['list'] += 1
+                    folder = params['q'].split("'")[1]
+                    ids = [i for i, file in drive.files.items() if folder in file['parents']]
+                    start = int(params.get('pageToken', 0))
+                    body = {'files': [drive.meta(i) for i in ids[start:start + drive.page_size]]}
+                    if start + drive.page_size < len(ids):
+                        body['nextPageToken'] = str(start + drive.page_size)
+                    return self._json(body)
+                file_id = path[len('/files/'):]
+                data = drive.files[file_id]['data']
+                drive.requests['media'] += 1
+                drop = file_id in drive.drop_once
+                drive.drop_once.discard(file_id)
+
+            offset = 0
+            if self.headers.get('Range'):
+                offset = int(self.headers['Range'].split('=')[1].rstrip('-'))
+                self.send_response(206)
+                self.send_header('Content-Range', f"bytes {offset}-{len(data) - 1}/{len(data)}")
+            else:
+                self.send_response(200)
+            body = data[offset:]
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if drop:
+                body = body[:len(body) // 2]
+            self.wfile.write(body)
+            with drive.lock:
+                drive.served[file_id] += len(body)
+            if drop:
+                self.wfile.flush()
+                self.close_connection = True
+
+    return Handler
+
+
+def ingest(drive, api, workdir, skip=()):
+    state = DriveState(os.path.join(workdir, 'drive_state.sqlite'))
+    client = DriveClient(requests.Session(), api=api, chunk_size=CHUNK_SIZE, max_retries=3)
+    ingest = DriveIngest(FOLDER, client, dest=os.path.join(workdir, 'output'), state=state, skip=skip,
+                         poll_interval=0.2, idle_timeout=0.5)
+    before = Counter(drive.requests)
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        jobs = [job['name'] for job in ingest]
+    state.close()
+    return jobs, Counter({key: drive.requests[key] - before[key] for key in drive.requests})
+
+
+def check(name, condition, detail):
+    print(f"{'✓' if condition else '✗'} {name}: {detail}")
+    return condition
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive ingest against a local fake Drive")
+    parser.add_argument('--pairs', type=int, default=6)
+    args = parser.parse_args(argv)
+
+    drive = FakeDrive()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(drive))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api = f"http://127.0.0.1:{server.server_port}/drive/v3"
+
+    def add_pair(number, size=300 * 1024):
+        video = os.urandom(size)
+        video_id = drive.add(f"Quiz{number}.mp4", video)
+        drive.add(f"Quiz{number}.json", json.dumps({'question': f"Q{number}?"}).encode('utf-8'))
+        return video_id, video
+
+    ok = True
+    with tempfile.TemporaryDirectory() as workdir:
+        videos = {}
+        for number in range(1, args.pairs + 1):
+            videos[number] = add_pair(number)
+        drive.add('notes.txt', b'not a video')
+        drive.add('Quiz999.mp4', b'elsewhere', parent='another-folder')
+        interrupted = videos[2][0]
+        drive.drop_once.add(interrupted)
+
+        start = time.perf_counter()
+        jobs, calls = ingest(drive, api, workdir)
+        output = os.path.join(workdir, 'output')
+        exact = all(open(os.path.join(output, f"Quiz{n}.mp4"), 'rb').read() == data
+                    for n, (_, data) in videos.items())
+        ok &= check('first run', sorted(jobs) == sorted(f"Quiz{n}.mp4" for n in videos) and exact,
+                    f"{len(jobs)} videos byte-exact in {time.perf_counter() - start:.2f}s, {dict(calls)}")
+        # The chunk being read when the connection dropped is fetched again, nothing more
+        ok &= check('resumed download', len(videos[2][1]) <= drive.served[interrupted] <= len(videos[2][1]) + CHUNK_SIZE,
+                    f"{drive.served[interrupted]} bytes served for a {len(videos[2][1])}-byte file")
+        ok &= check('other files', not os.path.exists(os.path.join(output, 'notes.txt'))
+                    and not os.path.exists(os.path.join(output, 'Quiz999.mp4')), "ignored")
+
+        for number in range(args.pairs + 1, args.pairs + 3):
+            videos[number] = add_pair(number)
+        jobs, calls = ingest(drive, api, workdir, skip={f"Quiz{n}.mp4" for n in range(1, args.pairs + 1)})
+        ok &= check('delta', sorted(jobs) == [f"Quiz{args.pairs + 1}.mp4", f"Quiz{args.pairs + 2}.mp4"]
+                    and calls['list'] == 0 and calls['media'] == 4, f"{jobs}, {dict(calls)}")
+
+        jobs, calls = ingest(drive, api, workdir, skip={f"Quiz{n}.mp4" for n in videos})
+        ok &= check('restart', not jobs and calls['list'] == 0 and calls['media'] == 0, f"{jobs}, {dict(calls)}")
+
+    server.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
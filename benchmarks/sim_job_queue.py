@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Job queue under concurrent workers, crashes and failures (no rendering, no network)
+- Every worker gets its own SQLiteJobStore connection on one file, the way
+  separate processes would
+- Scenarios (each checked, exits 1 on a mismatch):
+    pipeline   many threads per stage drain render -> metadata -> upload;
+               every job goes through each stage exactly once
+    crash      a worker claims a batch and dies: nobody else gets those jobs
+               until the lease runs out, then they are reclaimed and counted
+    fencing    the crashed worker coming back cannot complete reclaimed jobs
+    heartbeat  a beating worker keeps its jobs past the original lease
+    flaky      a job that always fails is parked after MAX_ATTEMPTS claims
+    put back   jobs a handler skips (quota spent) keep their attempts
+    retry      a parked job given another go waits from the retry, not from
+               when it was first queued, and its old error is cleared
+    stats      backlog / in flight / failed / throughput add up
+
+Usage:
+    python benchmarks/sim_job_queue.py [--jobs 400] [--workers 6]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from job_queue import SQLiteJobStore, StageWorker, STAGES, MAX_ATTEMPTS
+
+
+class FakeClock:
+    """A time.time stand-in that only moves when told to"""
+
+    def __init__(self, start=1_700_000_000.0):
+        self.now = start
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            return self.now
+
+    def advance(self, seconds):
+        with self.lock:
+            self.now += seconds
+
+
+def seed(path, count, clock=time.time):
+    store = SQLiteJobStore(path, clock=clock)
+    store.add([{'id': f"job{n}", 'position': n, 'payload': {'n': n}} for n in range(count)])
+    return store
+
+
+def recording_handler(seen, lock, stage):
+    def handler(jobs):
+        with lock:
+            seen[stage].update(job['id'] for job in jobs)
+        time.sleep(0.002)
+        return {job['id']: {stage: True} for job in jobs}
+    return handler
+
+
+def check(name, condition, detail):
+    print(f"{'✓' if condition else '✗'} {name}: {detail}")
+    return condition
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Job queue under concurrent, crashing and failing workers")
+    parser.add_argument('--jobs', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=6, help="threads per stage")
+    args = parser.parse_args(argv)
+    ok = True
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # pipeline: all stages at once, each worker on its own connection
+        path = os.path.join(workdir, 'pipeline.sqlite')
+        seed(path, args.jobs).close()
+        seen = {stage: Counter() for stage in STAGES}
+        lock = threading.Lock()
+        stores, threads = [], []
+        for stage in STAGES:
+            for n in range(args.workers):
+                store = SQLiteJobStore(path)
+                stores.append(store)
+                worker = StageWorker(store, stage, recording_handler(seen, lock, stage),
+                                     worker_id=f"{stage}-{n}", batch_size=10, idle_sleep=0.05)
+                threads.append((worker, threading.Thread(target=worker.run, daemon=True)))
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            for _, thread in threads:
+                thread.start()
+            probe = SQLiteJobStore(path)
+            while probe.stats()['uploaded'] < args.jobs and time.perf_counter() - start < 120:
+                time.sleep(0.05)
+            for worker, thread in threads:
+                worker.stop()
+            for _, thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - start
+        stats = probe.stats()
+        once = all(len(seen[stage]) == args.jobs and set(seen[stage].values()) == {1} for stage in STAGES)
+        ok &= check('pipeline', once and stats['uploaded'] == args.jobs,
+                    f"{args.jobs} jobs x {len(STAGES)} stages with {args.workers} workers each in {elapsed:.2f}s, "
+                    f"each claimed once per stage: {once}")
+        ok &= check('stats', all(stats[stage]['backlog'] == stats[stage]['in_flight'] == stats[stage]['failed'] == 0
+                                 for stage in STAGES)
+                    and all(stats[stage]['done_per_hour'] == args.jobs for stage in STAGES),
+                    {stage: stats[stage]['done_per_hour'] for stage in STAGES})
+        probe.close()
+        for store in stores:
+            store.close()
+
+        # crash, fencing, heartbeat: one clock everyone shares
+        clock = FakeClock()
+        store = seed(os.path.join(workdir, 'crash.sqlite'), 30, clock)
+        dead_token, dead_jobs = store.claim('render', 'dead', limit=10, lease_seconds=60)
+        alive_token, others = store.claim('render', 'alive', limit=30, lease_seconds=60)
+        taken = {job['id'] for job in dead_jobs} & {job['id'] for job in others}
+        store.complete(alive_token, {job['id']: {} for job in others})
+        clock.advance(61)
+        token, reclaimed = store.claim('render', 'rescuer', limit=30, lease_seconds=60)
+        stats = store.stats()
+        ok &= check('crash', not taken and len(others) == 20
+                    and {job['id'] for job in reclaimed} == {job['id'] for job in dead_jobs}
+                    and stats['render']['reclaimed'] == 10,
+                    f"{len(taken)} overlapping while leased, {stats['render']['reclaimed']} reclaimed after expiry")
+        stale = store.complete(dead_token, {job['id']: {'video': 'stale'} for job in dead_jobs})
+        stale += store.heartbeat(dead_token)
+        store.fail(dead_token, {job['id']: RuntimeError('stale') for job in dead_jobs})
+        moved = store.complete(token, {job['id']: {'video': 'fresh'} for job in reclaimed})
+        ok &= check('fencing', stale == 0 and moved == len(reclaimed),
+                    f"stale token moved {stale}, new owner moved {moved}")
+
+        store.add([{'id': 'beat', 'position': 100, 'payload': {}}])
+        token, jobs = store.claim('render', 'beater', limit=1, lease_seconds=60)
+        for _ in range(5):
+            clock.advance(40)
+            store.heartbeat(token, 60)
+        _, stolen = store.claim('render', 'thief', limit=10, lease_seconds=60)
+        ok &= check('heartbeat', jobs and not stolen and store.complete(token, {'beat': {}}) == 1,
+                    f"held for 200s on a 60s lease, {len(stolen)} stolen")
+        store.close()
+
+        # retry: park a job, come back an hour later and retry it
+        store = seed(os.path.join(workdir, 'retry.sqlite'), 1, clock)
+        for _ in range(MAX_ATTEMPTS):
+            token, _ = store.claim('render', 'failing', limit=1)
+            store.fail(token, {'job0': RuntimeError('broken')})
+        clock.advance(3600)
+        retried = store.retry_failed('render')
+        waiting = store.stats()['render']['oldest_waiting_s']
+        error = store.conn.execute("SELECT last_error FROM jobs WHERE id = 'job0'").fetchone()[0]
+        ok &= check('retry', retried == 1 and waiting == 0 and error is None,
+                    f"{retried} retried, waiting {waiting:.0f}s, last error {error!r}")
+        store.close()
+
+        # flaky + put back
+        store = seed(os.path.join(workdir, 'flaky.sqlite'), 5)
+        calls = Counter()
+
+        def flaky(jobs):
+            calls.update(job['id'] for job in jobs)
+            return {job['id']: RuntimeError('broken') if job['id'] == 'job2' else {} for job in jobs}
+
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            StageWorker(store, 'render', flaky, batch_size=5).run(once=True)
+        stats = store.stats()
+        ok &= check('flaky', calls['job2'] == MAX_ATTEMPTS and stats['render']['failed'] == 1
+                    and stats['metadata']['backlog'] == 4,
+                    f"job2 tried {calls['job2']}x then parked, {stats['metadata']['backlog']} moved on")
+
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            for _ in range(MAX_ATTEMPTS + 2):
+                StageWorker(store, 'metadata', lambda jobs: {job['id']: None for job in jobs}).run_batch()
+        token, jobs = store.claim('metadata', 'check', limit=10)
+        ok &= check('put back', len(jobs) == 4 and all(job['attempts'] == 1 for job in jobs),
+                    f"{len(jobs)} jobs still waiting, attempts {[job['attempts'] for job in jobs]}")
+        store.close()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Simulated days of quota-aware uploading (no network, no real waiting)
+- A fake YouTube API charges videos.insert against its own daily quota and
+  answers 403 quotaExceeded once it is spent, like the real one
+- UploadScheduler runs on a SimulatedClock, so each reset is one sleep call
+- Scenarios (each checked, exits 1 on a mismatch):
+    plain      our count matches the server: 6 uploads a day, no 403s
+    shared     another app spent part of the quota: a 403 (at most one per
+               upload in flight), clean stop, nothing lost or marked failed,
+               the rest goes on the next day
+    flaky      one file always fails: parked after MAX_ATTEMPTS windows
+    slots      videos with a future publish slot wait for it
+    stream     videos from a live source (watch / Drive mode) go through the
+               same queue and budget: capped per day, resumed after each reset
+    resumed    a dropped upload retried by the pipeline resumes its session
+               and is charged once, so the day still fits 6 uploads
+    broken     on a live source, a video whose metadata always fails is retried
+               once per quota day and parked; one whose log commit fails stays
+               uploaded (never re-uploaded); the stream does not spin on either
+- Order is checked per quota day (uploads run concurrently within a day):
+  each day takes the best-priority videos still waiting
+
+Usage:
+    python benchmarks/sim_quota.py [--videos 40]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from upload_scheduler import (UploadScheduler, ScheduleStore, QuotaBudget, SimulatedClock, quota_day,
+                              DAILY_QUOTA, UPLOAD_COST, MAX_ATTEMPTS, QUOTA_TZ, UPLOADS_IN_FLIGHT)
+from upload_pipeline import AdaptiveBackoff
+from resumable_upload import UploadError
+
+START = datetime(2024, 3, 4, 9, 30, tzinfo=QUOTA_TZ).timestamp()
+
+
+class FakeYouTube:
+    """videos.insert with a server-side daily quota; some files can be made to fail
+
+    The quota is charged when an upload session starts; resuming one is free.
+    """
+
+    def __init__(self, clock, daily_quota=DAILY_QUOTA, spent_elsewhere=0, broken=(), dropped=()):
+        self.clock = clock
+        self.daily_quota = daily_quota
+        self.spent_elsewhere = spent_elsewhere   # units used by other apps on the first day
+        self.broken = set(broken)
+        self.dropped = set(dropped)              # the first attempt loses the connection
+        self.sessions = set()
+        self.used = {}
+        self.uploads = []                        # (day, name)
+        self.quota_errors = 0
+
+    def insert(self, video_path, metadata):
+        day = quota_day(self.clock.now())
+        name = os.path.basename(video_path)
+        if name not in self.sessions:
+            used = self.used.get(day, self.spent_elsewhere if not self.used else 0)
+            if used + UPLOAD_COST > self.daily_quota:
+                self.quota_errors += 1
+                raise UploadError(403, json.dumps({'error': {'errors': [{'reason': 'quotaExceeded'}]}}))
+            self.used[day] = used + UPLOAD_COST
+            if name in self.dropped:
+                self.sessions.add(name)
+                raise ConnectionResetError("connection dropped mid-upload")
+        if name in self.broken:
+            raise UploadError(400, json.dumps({'error': {'errors': [{'reason': 'invalidVideo'}]}}))
+        self.clock.sleep(90)                     # an upload takes a while
+        self.uploads.append((day, name))
+        return f"vid-{name}"
+
+
+def make_videos(folder, count):
+    os.makedirs(folder, exist_ok=True)
+    jobs = []
+    for number in range(1, count + 1):
+        path = os.path.join(folder, f"Quiz{number}.mp4")
+        with open(path, 'wb') as f:
+            f.write(b'\0')
+        jobs.append({'name': f"Quiz{number}.mp4", 'path': path})
+    return jobs
+
+
+def live_source(jobs, clock, until):
+    """A watcher-like source: yields the backlog, then stays open until the clock reaches until"""
+    yield from jobs
+    while clock.now() < until:
+        time.sleep(0.001)
+
+
+def simulate(workdir, videos, order='oldest', spent_elsewhere=0, broken=(), publish_at=None, max_days=60,
+             stream=False, bad_metadata=(), bad_commit=(), dropped=(), max_attempts=1):
+    clock = SimulatedClock(START)
+    api = FakeYouTube(clock, spent_elsewhere=spent_elsewhere, broken=broken, dropped=dropped)
+    store = ScheduleStore(os.path.join(workdir, 'schedule.sqlite'))
+    committed = []
+
+    def metadata(jobs):
+        if any(job['name'] in bad_metadata for job in jobs):
+            raise ValueError("malformed QuizN.json")
+        return [{'title': job['name']} for job in jobs]
+
+    def commit(name, video_id, metadata):
+        if name in bad_commit:
+            raise OSError("log not writable")
+        committed.append(name)
+
+    scheduler = UploadScheduler(metadata, api.insert, commit,
+                                store=store, budget=QuotaBudget(store, clock=clock), clock=clock,
+                                pipeline_options={'max_attempts': max_attempts,
+                                                  'backoff': AdaptiveBackoff(sleep=clock.sleep, clock=clock.now)})
+    jobs = make_videos(os.path.join(workdir, 'output'), videos)
+    # The pipeline prints every quota stop and failure; keep the report readable
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        if stream:
+            days = scheduler.run_stream(live_source(jobs, clock, START + 3 * 86400), order,
+                                        report=lambda line: None)
+        else:
+            scheduler.enqueue(jobs, order, publish_at)
+            days = scheduler.run(max_days=max_days, report=lambda line: None)
+    counts = store.counts()
+    store.close()
+    return api, days, committed, counts
+
+
+def uploads_by_day(api):
+    days = {}
+    for day, name in api.uploads:
+        days.setdefault(day, set()).add(name)
+    return [days[day] for day in sorted(days)]
+
+
+def expected_by_day(numbers, sizes):
+    groups, start = [], 0
+    for size in sizes:
+        groups.append({f"Quiz{n}.mp4" for n in numbers[start:start + size]})
+        start += size
+    return groups
+
+
+def check(name, condition, detail):
+    print(f"{'✓' if condition else '✗'} {name}: {detail}")
+    return condition
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quota scheduler on a simulated clock")
+    parser.add_argument('--videos', type=int, default=40)
+    args = parser.parse_args(argv)
+    per_day = DAILY_QUOTA // UPLOAD_COST
+    expected_days = -(-args.videos // per_day)
+    ok = True
+
+    with tempfile.TemporaryDirectory() as workdir:
+        api, days, committed, counts = simulate(os.path.join(workdir, 'plain'), args.videos)
+        per_day_uploads = [stats['uploaded'] for stats in days]
+        ok &= check('plain', api.quota_errors == 0 and len(days) == expected_days
+                    and all(n == per_day for n in per_day_uploads[:-1]) and len(committed) == args.videos,
+                    f"{args.videos} videos in {len(days)} days {per_day_uploads}, {api.quota_errors} quota errors")
+        ok &= check('order', uploads_by_day(api) == expected_by_day(range(1, args.videos + 1), per_day_uploads),
+                    f"day 1: {sorted(uploads_by_day(api)[0], key=lambda name: int(name[4:-4]))}")
+        ok &= check('one day per window', len({day for day, _ in api.uploads}) == len(days),
+                    f"{len({day for day, _ in api.uploads})} distinct quota days")
+
+        api, days, committed, counts = simulate(os.path.join(workdir, 'newest'), 10, order='newest')
+        ok &= check('newest first', uploads_by_day(api)[0] == expected_by_day(range(10, 0, -1), [per_day])[0],
+                    f"day 1: {sorted(uploads_by_day(api)[0], key=lambda name: -int(name[4:-4]))}")
+
+        api, days, committed, counts = simulate(os.path.join(workdir, 'shared'), args.videos,
+                                                spent_elsewhere=3 * UPLOAD_COST)
+        # Every upload in flight when the quota runs out may see its own 403, but no more
+        ok &= check('shared', 1 <= api.quota_errors <= UPLOADS_IN_FLIGHT and days[0]['quota_hit']
+                    and days[0]['uploaded'] == per_day - 3 and len(committed) == args.videos
+                    and counts.get('failed', 0) == 0,
+                    f"day 1 uploaded {days[0]['uploaded']}, {api.quota_errors} quota errors, "
+                    f"all {len(committed)} uploaded in {len(days)} days, none failed")
+
+        api, days, committed, counts = simulate(os.path.join(workdir, 'flaky'), 8, broken={'Quiz2.mp4'})
+        ok &= check('flaky', counts == {'uploaded': 7, 'failed': 1} and len(days) == MAX_ATTEMPTS,
+                    f"{counts}, {len(days)} windows")
+
+        slot = START + 3 * 86400
+        api, days, committed, counts = simulate(os.path.join(workdir, 'slots'), 4, publish_at=slot)
+        ok &= check('slots', api.uploads and all(day == quota_day(slot) for day, _ in api.uploads)
+                    and len(committed) == 4, f"uploaded on {sorted({day for day, _ in api.uploads})}")
+
+        api, days, committed, counts = simulate(os.path.join(workdir, 'stream'), 15, stream=True)
+        ok &= check('stream', api.quota_errors == 0 and len(committed) == 15 and counts == {'uploaded': 15}
+                    and [len(names) for names in uploads_by_day(api)] == [per_day, per_day, 15 - 2 * per_day],
+                    f"{len(committed)} uploaded on {len(uploads_by_day(api))} quota days, "
+                    f"{api.quota_errors} quota errors")
+
+        api, days, committed, counts = simulate(os.path.join(workdir, 'resumed'), per_day,
+                                                dropped={'Quiz1.mp4'}, max_attempts=2)
+        ok &= check('resumed', len(days) == 1 and days[0]['uploaded'] == per_day and api.quota_errors == 0,
+                    f"{days[0]['uploaded']} uploaded on day 1 with one resumed, "
+                    f"{len(days)} quota days, {api.quota_errors} quota errors")
+
+        # A stream that spins never lets the simulated clock reach the source's end
+        result = {}
+        runner = threading.Thread(target=lambda: result.update(run=simulate(
+            os.path.join(workdir, 'broken'), 5, stream=True, bad_metadata={'Quiz2.mp4'},
+            bad_commit={'Quiz3.mp4'})), daemon=True)
+        runner.start()
+        runner.join(60)
+        if runner.is_alive():
+            sys.stdout = sys.__stdout__          # the stuck run is still inside redirect_stdout
+        api, days, committed, counts = result.get('run', (None, [], [], {}))
+        names = [name for _, name in api.uploads] if api else []
+        ok &= check('broken', counts == {'uploaded': 4, 'failed': 1} and 'Quiz2.mp4' not in names
+                    and names.count('Quiz3.mp4') == 1 and 'Quiz3.mp4' not in committed,
+                    f"{counts}, Quiz3 uploaded {names.count('Quiz3.mp4')}x" if api else "stream never returned")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
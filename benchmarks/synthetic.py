@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Synthetic data for the benchmarks
+- MCQ banks of any size in the gk_mcqs.json format (deterministic per seed)
+- pakmcqs-style listing pages shaped like mcqs_data/gk/temp.html
+- Banks are cached under benchmarks/data/ so repeated runs skip generation
+
+Usage:
+    python benchmarks/synthetic.py 100k        # writes benchmarks/data/bank_100k.json
+"""
+
+import os
+import re
+import sys
+import json
+import random
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, 'benchmarks', 'data')
+SAMPLE_BANK = os.path.join(ROOT, 'mcqs_data', 'gk', 'gk_mcqs.json')
+SAMPLE_PAGE = os.path.join(ROOT, 'mcqs_data', 'gk', 'temp.html')
+
+_FALLBACK_WORDS = ("capital province river mountain founded largest national first president "
+                   "pakistan india china ocean treaty battle century language currency famous "
+                   "author book university mosque fort desert lake island border").split()
+
+ARTICLE = '''<article class="l-post grid-post grid-card-post">
+<div class="media"></div>
+<div class="content">
+<div class="post-meta post-meta-a has-below">
+<h2 class="is-title post-title"><a href="https://pakmcqs.com/general_knowledge_mcqs/{slug}">{question}</a></h2>
+</div>
+<div class="excerpt">
+<p>{options}</p>
+<p style="text-align: right">Submitted by: <strong>Benchmark</strong></p>
+</div>
+</div>
+</article>
+'''
+
+
+def parse_size(text):
+    """'10k' -> 10000, '1m' -> 1000000"""
+    text = text.strip().lower()
+    scale = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def size_label(n):
+    if n >= 1000000 and n % 1000000 == 0:
+        return f"{n // 1000000}m"
+    if n >= 1000 and n % 1000 == 0:
+        return f"{n // 1000}k"
+    return str(n)
+
+
+def vocabulary():
+    """Words from the real bank (so lengths and characters look real), or a fixed list"""
+    try:
+        with open(SAMPLE_BANK, 'r', encoding='utf-8') as f:
+            text = ' '.join(mcq['question'] for mcq in json.load(f)[:2000])
+        words = sorted(set(re.findall(r"[^\W\d_]{3,}", text)))
+        return words or _FALLBACK_WORDS
+    except (OSError, ValueError):
+        return _FALLBACK_WORDS
+
+
+def generate_mcqs(count, seed=0, words=None):
+    """count MCQs in the scraper's output format"""
+    rng = random.Random(seed)
+    words = words or vocabulary()
+    mcqs = []
+    for i in range(count):
+        question = ' '.join(rng.choice(words) for _ in range(rng.randint(5, 14)))
+        options = [' '.join(rng.choice(words) for _ in range(rng.randint(1, 4))) for _ in range(4)]
+        mcqs.append({
+            "question": f"{question.capitalize()} ({i})?",
+            "options": options,
+            "correctAnswer": rng.randrange(4),
+        })
+    return mcqs
+
+
+def bank_path(count, seed=0):
+    """Path of a cached synthetic bank, generating it on first use"""
+    path = os.path.join(DATA_DIR, f"bank_{size_label(count)}.json")
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        print(f"🧪 Generating {count} synthetic MCQs -> {path}")
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(generate_mcqs(count, seed), f, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def generate_page(mcqs):
+    """A listing page with one <article> per MCQ, wrapped in temp.html's own page chrome"""
+    articles = []
+    for mcq in mcqs:
+        lines = []
+        for i, option in enumerate(mcq['options']):
+            line = f"{chr(65 + i)}. {option}"
+            lines.append(f"<strong>{line}</strong>" if i == mcq['correctAnswer'] else line)
+        slug = re.sub(r'[^a-z0-9]+', '-', mcq['question'].lower()).strip('-')
+        articles.append(ARTICLE.format(slug=slug, question=mcq['question'],
+                                       options='<br/>\n'.join(lines)))
+
+    head, tail = '<html><body>', '</body></html>'
+    try:
+        with open(SAMPLE_PAGE, 'r', encoding='utf-8') as f:
+            sample = f.read()
+        first, last = sample.find('<article'), sample.rfind('</article>')
+        if first >= 0 and last >= 0:
+            head, tail = sample[:first], sample[last + len('</article>'):]
+    except OSError:
+        pass
+    return head + ''.join(articles) + tail
+
+
+if __name__ == "__main__":
+    for arg in sys.argv[1:] or ['10k']:
+        print(bank_path(parse_size(arg)))
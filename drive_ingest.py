@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Ingest rendered videos from a Google Drive folder, fetching only what changed
+- First run lists the folder once; after that only the Changes API delta since
+  the saved page token is read (token + file states persisted in SQLite)
+- QuizN.mp4 / QuizN.json pairs download concurrently, streamed to disk in
+  chunks; an interrupted download resumes with a Range request from the bytes
+  already in the .part file, and md5Checksum is verified before it is renamed
+- Yields each video as an upload job {'name', 'path'} as soon as both halves
+  of its pair are on disk, so it plugs into UploadPipeline like VideoWatcher
+- Works with any requests-style session (an AuthorizedSession in production,
+  a plain Session against benchmarks/fake_drive.py)
+
+Usage:
+    python youtube_automation.py upload --drive [--idle N]
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+
+DRIVE_API = 'https://www.googleapis.com/drive/v3'
+STATE_FILE = 'temp/drive_state.sqlite'
+DOWNLOAD_WORKERS = 4
+CHUNK_SIZE = 1024 * 1024
+POLL_INTERVAL = 30.0
+MAX_RETRIES = 5
+PAGE_SIZE = 1000
+FILE_FIELDS = 'id,name,size,md5Checksum,parents,trashed'
+_PAIR_NAME = re.compile(r'^Quiz\d+\.(mp4|json)$')
+
+
+class DriveState:
+    """Changes page token and per-file download state, shared by download threads"""
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " id TEXT PRIMARY KEY, name TEXT NOT NULL, size INTEGER, md5 TEXT,"
+                " state TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def page_token(self):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'page_token'").fetchone()
+        return row[0] if row else None
+
+    def record(self, files, page_token):
+        """Queue new or changed files and move the token past them, in one transaction"""
+        queued = []
+        with self.lock, self.conn:
+            for file in files:
+                size = int(file['size']) if file.get('size') is not None else None
+                row = self.conn.execute("SELECT md5, state FROM files WHERE id = ?", (file['id'],)).fetchone()
+                if row and row[1] == 'done' and row[0] == file.get('md5Checksum'):
+                    continue
+                self.conn.execute("INSERT OR REPLACE INTO files (id, name, size, md5, state, updated_at)"
+                                  " VALUES (?, ?, ?, ?, 'queued', ?)",
+                                  (file['id'], file['name'], size, file.get('md5Checksum'), time.time()))
+                queued.append(file)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('page_token', ?)", (page_token,))
+        return queued
+
+    def queued(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT id, name, size, md5 FROM files WHERE state = 'queued'").fetchall()
+        return [{'id': file_id, 'name': name, 'size': size, 'md5Checksum': md5} for file_id, name, size, md5 in rows]
+
+    def done(self, file_id):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE files SET state = 'done', updated_at = ? WHERE id = ?", (time.time(), file_id))
+
+    def downloaded_names(self):
+        with self.lock:
+            return {name for (name,) in self.conn.execute("SELECT name FROM files WHERE state = 'done'")}
+
+    def close(self):
+        self.conn.close()
+
+
+class DriveClient:
+    """The few Drive v3 REST calls ingest needs"""
+
+    def __init__(self, session, api=DRIVE_API, chunk_size=CHUNK_SIZE, max_retries=MAX_RETRIES):
+        self.session = session
+        self.api = api.rstrip('/')
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+
+    def _get(self, path, **params):
+        response = self.session.get(f"{self.api}{path}", params=params, timeout=60)
+        metrics.count('drive_requests_total', endpoint=path.split('/')[1])
+        if response.status_code != 200:
+            raise RuntimeError(f"Drive {path}: HTTP {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    def start_page_token(self):
+        return self._get('/changes/startPageToken')['startPageToken']
+
+    def list_folder(self, folder_id):
+        """Every file directly in the folder (one full listing, paged)"""
+        page_token = None
+        while True:
+            params = {'q': f"'{folder_id}' in parents and trashed = false", 'pageSize': PAGE_SIZE,
+                      'fields': f"nextPageToken,files({FILE_FIELDS})"}
+            if page_token:
+                params['pageToken'] = page_token
+            page = self._get('/files', **params)
+            yield from page.get('files', [])
+            page_token = page.get('nextPageToken')
+            if not page_token:
+                return
+
+    def changes(self, page_token):
+        """(changed files, token for next time) since page_token"""
+        files = []
+        while True:
+            page = self._get('/changes', pageToken=page_token, pageSize=PAGE_SIZE, spaces='drive',
+                             fields=f"nextPageToken,newStartPageToken,changes(fileId,removed,file({FILE_FIELDS}))")
+            files.extend(change['file'] for change in page.get('changes', [])
+                         if not change.get('removed') and change.get('file'))
+            if 'newStartPageToken' in page:
+                return files, page['newStartPageToken']
+            page_token = page['nextPageToken']
+
+    def download(self, file, dest):
+        """Stream a file to dest, resuming a partial .part file with Range; returns bytes fetched"""
+        part_path = dest + '.part'
+        digest = hashlib.md5()
+        if os.path.exists(part_path):
+            with open(part_path, 'rb') as f:
+                for block in iter(lambda: f.read(self.chunk_size), b''):
+                    digest.update(block)
+        size = int(file['size']) if file.get('size') is not None else None
+        fetched = 0
+
+        for attempt in range(1, self.max_retries + 1):
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if size is not None and offset >= size:
+                break
+            headers = {'Range': f'bytes={offset}-'} if offset else {}
+            try:
+                with self.session.get(f"{self.api}/files/{file['id']}", params={'alt': 'media'},
+                                      headers=headers, stream=True, timeout=60) as response:
+                    if offset and response.status_code == 200:
+                        # Range ignored: start over rather than append a second copy
+                        offset = 0
+                        digest = hashlib.md5()
+                    elif response.status_code not in (200, 206):
+                        raise RuntimeError(f"HTTP {response.status_code}")
+                    with open(part_path, 'r+b' if offset else 'wb') as f:
+                        f.seek(offset)
+                        f.truncate()
+                        for block in response.iter_content(self.chunk_size):
+                            f.write(block)
+                            digest.update(block)
+                            fetched += len(block)
+                if size is None or os.path.getsize(part_path) >= size:
+                    break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                metrics.count('drive_download_retries_total')
+                print(f"   🔁 {file['name']}: download interrupted at "
+                      f"{os.path.getsize(part_path) if os.path.exists(part_path) else 0} bytes, resuming ({e})")
+                time.sleep(min(2 ** attempt, 30))
+
+        if size is not None and os.path.getsize(part_path) != size:
+            raise RuntimeError(f"{file['name']}: got {os.path.getsize(part_path)} of {size} bytes")
+        if file.get('md5Checksum') and digest.hexdigest() != file['md5Checksum']:
+            os.remove(part_path)
+            raise RuntimeError(f"{file['name']}: md5 mismatch, discarded")
+        os.replace(part_path, dest)
+        metrics.count('drive_download_bytes_total', fetched)
+        return fetched
+
+
+class DriveIngest:
+    """Iterable of upload jobs for QuizN pairs appearing in a Drive folder"""
+
+    def __init__(self, folder_id, client, dest='output', state=None, skip=(), workers=DOWNLOAD_WORKERS,
+                 poll_interval=POLL_INTERVAL, idle_timeout=None):
+        self.folder_id = folder_id
+        self.client = client
+        self.dest = dest
+        self.state = state or DriveState()
+        self.skip = set(skip)
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.stopped = threading.Event()
+        self._finished = queue.Queue()
+        self._in_flight = set()
+
+    def stop(self):
+        """Make the iterator finish after its current wait"""
+        self.stopped.set()
+
+    def _wanted(self, file):
+        if not _PAIR_NAME.match(file.get('name', '')) or file.get('trashed'):
+            return False
+        if self.folder_id not in file.get('parents', [self.folder_id]):
+            return False
+        return os.path.splitext(file['name'])[0] + '.mp4' not in self.skip
+
+    def poll(self):
+        """Queue what changed since the last poll (everything in the folder, the first time)"""
+        token = self.state.page_token()
+        if token is None:
+            # Take the token before listing, so files added meanwhile show up as changes
+            token = self.client.start_page_token()
+            files = list(self.client.list_folder(self.folder_id))
+        else:
+            files, token = self.client.changes(token)
+        return self.state.record([file for file in files if self._wanted(file)], token)
+
+    def _download(self, file):
+        try:
+            with metrics.timer('drive_download_seconds'):
+                self.client.download(file, os.path.join(self.dest, file['name']))
+            self.state.done(file['id'])
+            self._finished.put((file, None))
+        except Exception as e:
+            self._finished.put((file, e))
+
+    def _submit(self, executor):
+        for file in self.state.queued():
+            if file['id'] not in self._in_flight and self._wanted(file):
+                self._in_flight.add(file['id'])
+                executor.submit(self._download, file)
+
+    def _ready_pairs(self, names):
+        """Videos whose .mp4 and .json are both downloaded and not yet handed out"""
+        videos = {os.path.splitext(name)[0] + '.mp4' for name in names}
+        downloaded = self.state.downloaded_names()
+        return sorted((video for video in videos - self.skip
+                       if video in downloaded and video[:-4] + '.json' in downloaded),
+                      key=lambda name: int(re.sub(r'\D', '', name)))
+
+    def _hand_out(self, videos):
+        for video in videos:
+            self.skip.add(video)
+            yield {'name': video, 'path': os.path.join(self.dest, video)}
+
+    def __iter__(self):
+        os.makedirs(self.dest, exist_ok=True)
+        print(f"☁️  Ingesting Drive folder {self.folder_id} into {self.dest}/")
+        last_activity = time.monotonic()
+        next_poll = 0.0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                # Pairs downloaded by an earlier run but never uploaded
+                yield from self._hand_out(self._ready_pairs(self.state.downloaded_names()))
+                while not self.stopped.is_set():
+                    if time.monotonic() >= next_poll:
+                        try:
+                            fresh = self.poll()
+                            if fresh:
+                                print(f"☁️  {len(fresh)} new files in Drive")
+                                last_activity = time.monotonic()
+                        except Exception as e:
+                            print(f"⚠️ Drive poll failed: {e}")
+                        self._submit(executor)
+                        next_poll = time.monotonic() + self.poll_interval
+
+                    try:
+                        file, error = self._finished.get(timeout=max(0.0, min(next_poll - time.monotonic(), 1.0)))
+                    except queue.Empty:
+                        if (self.idle_timeout is not None and not self._in_flight
+                                and time.monotonic() - last_activity >= self.idle_timeout):
+                            return
+                        continue
+
+                    self._in_flight.discard(file['id'])
+                    last_activity = time.monotonic()
+                    if error:
+                        print(f"❌ {file['name']}: {error} (retried on the next poll)")
+                        continue
+                    yield from self._hand_out(self._ready_pairs([file['name']]))
+            finally:
+                self.stopped.set()
+                executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Durable scrape -> render -> metadata -> upload job queue
+- One job per MCQ (content hash + bank position) moving through the states
+  scraped -> rendered -> metadata_ready -> uploaded; every stage is a queue
+  of jobs in its input state
+- Workers claim jobs in batches with a lease: one UPDATE stamps a fresh
+  claim token on up to N unleased (or expired) jobs, with no lock held while
+  the work runs, so many render / upload workers can pull at once
+- A heartbeat thread extends the lease while a batch is being worked on; a
+  crashed worker's jobs are reclaimed once its lease runs out, and completions
+  carry the claim token so a worker that lost its lease cannot overwrite the
+  new owner's result
+- Jobs that keep failing are parked as failed after MAX_ATTEMPTS claims
+- Backlog, in-flight, failed and throughput per stage come from `stats()`
+- JobStore is the interface; SQLiteJobStore (WAL, any number of processes on
+  one machine or a shared volume) is the default backend
+
+Usage:
+    python job_queue.py sync [--bank FILE]      # import what the bank, renders and ledger already say
+    python job_queue.py status [--window 3600]
+    python job_queue.py work render|metadata|upload [--batch 25] [--lease 600] [--once]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import argparse
+import threading
+
+from metrics import metrics
+
+QUEUE_FILE = 'temp/job_queue.sqlite'
+STATES = ('scraped', 'rendered', 'metadata_ready', 'uploaded')
+STAGES = {                       # stage: (input state, output state)
+    'render': ('scraped', 'rendered'),
+    'metadata': ('rendered', 'metadata_ready'),
+    'upload': ('metadata_ready', 'uploaded'),
+}
+LEASE_SECONDS = 600
+MAX_ATTEMPTS = 5
+BATCH_SIZE = 25
+
+
+class JobStore:
+    """Interface of a job queue backend
+
+    Jobs are dicts {'id', 'position', 'state', 'payload', 'attempts'}; payload
+    is a JSON object that each stage adds its output to.
+    """
+
+    def add(self, jobs):
+        """Insert new jobs ({'id', 'position', 'payload', 'state'?}); returns how many were new"""
+        raise NotImplementedError
+
+    def advance(self, updates, state):
+        """Move {job id: payload update} straight to state if they are not past it yet (imports)"""
+        raise NotImplementedError
+
+    def claim(self, stage, worker, limit=BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+        """Lease up to limit jobs waiting for stage; returns (token, jobs)"""
+        raise NotImplementedError
+
+    def heartbeat(self, token, lease_seconds=LEASE_SECONDS):
+        """Extend the lease on jobs still held under token; returns how many are"""
+        raise NotImplementedError
+
+    def complete(self, token, results):
+        """Move {job id: payload update} to the stage's output state; returns how many moved"""
+        raise NotImplementedError
+
+    def fail(self, token, errors):
+        """Release {job id: error} for a later retry (or park them as failed)"""
+        raise NotImplementedError
+
+    def release(self, token, ids):
+        """Hand back jobs that were claimed but not attempted, without using up an attempt"""
+        raise NotImplementedError
+
+    def stats(self, window=3600):
+        """Per-stage backlog, in_flight, failed and done-per-hour over the last window seconds"""
+        raise NotImplementedError
+
+
+class SQLiteJobStore(JobStore):
+    """JobStore in one SQLite file, safe for many threads and processes"""
+
+    def __init__(self, path=QUEUE_FILE, max_attempts=MAX_ATTEMPTS, clock=time.time):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, position INTEGER NOT NULL, state TEXT NOT NULL, payload TEXT NOT NULL,"
+                " failed INTEGER NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT,"
+                " owner TEXT, token TEXT, lease_until REAL, prev_owner TEXT, updated_at REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, failed, position)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_token ON jobs (token)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                " at REAL NOT NULL, stage TEXT NOT NULL, outcome TEXT NOT NULL, count INTEGER NOT NULL)"
+            )
+
+    def _event(self, stage, outcome, count):
+        if count:
+            self.conn.execute("INSERT INTO events (at, stage, outcome, count) VALUES (?, ?, ?, ?)",
+                              (self.clock(), stage, outcome, count))
+            metrics.count('job_queue_events_total', count, stage=stage, outcome=outcome)
+
+    def add(self, jobs):
+        now = self.clock()
+        rows = [(job['id'], job['position'], job.get('state', STATES[0]),
+                 json.dumps(job.get('payload', {}), ensure_ascii=False), now) for job in jobs]
+        with self.lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO jobs (id, position, state, payload, updated_at)"
+                                  " VALUES (?, ?, ?, ?, ?)", rows)
+            return self.conn.total_changes - before
+
+    def advance(self, updates, state):
+        if state not in STATES:
+            raise ValueError(f"Unknown state {state!r}, expected one of {STATES}")
+        now = self.clock()
+        moved = 0
+        with self.lock, self.conn:
+            for job_id, update in updates.items():
+                row = self.conn.execute("SELECT state, payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None or STATES.index(row[0]) >= STATES.index(state):
+                    continue
+                payload = dict(json.loads(row[1]), **(update or {}))
+                moved += self.conn.execute(
+                    "UPDATE jobs SET state = ?, payload = ?, failed = 0, attempts = 0, last_error = NULL,"
+                    " owner = NULL, token = NULL, lease_until = NULL, updated_at = ? WHERE id = ? AND state = ?",
+                    (state, json.dumps(payload, ensure_ascii=False), now, job_id, row[0])
+                ).rowcount
+        return moved
+
+    def claim(self, stage, worker, limit=BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+        state = STAGES[stage][0]
+        token = uuid.uuid4().hex
+        now = self.clock()
+        with self.lock, self.conn:
+            # Expired leases that used up their attempts are parked rather than handed out again
+            parked = self.conn.execute(
+                "UPDATE jobs SET failed = 1, owner = NULL, token = NULL, lease_until = NULL,"
+                " last_error = COALESCE(last_error, 'lease expired'), updated_at = ?"
+                " WHERE state = ? AND failed = 0 AND lease_until < ? AND attempts >= ?",
+                (now, state, now, self.max_attempts)
+            ).rowcount
+            self._event(stage, 'failed', parked)
+            # One statement stamps the batch: whoever's UPDATE lands first owns those rows
+            self.conn.execute(
+                "UPDATE jobs SET prev_owner = owner, owner = ?, token = ?, lease_until = ?,"
+                " attempts = attempts + 1, updated_at = ?"
+                " WHERE id IN (SELECT id FROM jobs WHERE state = ? AND failed = 0"
+                "              AND (lease_until IS NULL OR lease_until < ?) ORDER BY position LIMIT ?)",
+                (worker, token, now + lease_seconds, now, state, now, limit)
+            )
+            rows = self.conn.execute(
+                "SELECT id, position, state, payload, attempts, prev_owner FROM jobs WHERE token = ?"
+                " ORDER BY position", (token,)
+            ).fetchall()
+            self._event(stage, 'reclaimed', sum(1 for row in rows if row[5]))
+        jobs = [{'id': job_id, 'position': position, 'state': state, 'payload': json.loads(payload),
+                 'attempts': attempts} for job_id, position, state, payload, attempts, _ in rows]
+        return token, jobs
+
+    def heartbeat(self, token, lease_seconds=LEASE_SECONDS):
+        with self.lock, self.conn:
+            return self.conn.execute("UPDATE jobs SET lease_until = ? WHERE token = ?",
+                                     (self.clock() + lease_seconds, token)).rowcount
+
+    def complete(self, token, results):
+        now = self.clock()
+        moved = 0
+        with self.lock, self.conn:
+            for job_id, update in results.items():
+                row = self.conn.execute("SELECT state, payload FROM jobs WHERE id = ? AND token = ?",
+                                        (job_id, token)).fetchone()
+                if row is None:
+                    continue    # lease lost: the job belongs to someone else now
+                state, payload = row
+                stage = next(name for name, (source, _) in STAGES.items() if source == state)
+                payload = dict(json.loads(payload), **(update or {}))
+                # The token in the WHERE is the fence: a reclaim in between makes this a no-op
+                moved += self.conn.execute(
+                    "UPDATE jobs SET state = ?, payload = ?, attempts = 0, last_error = NULL, owner = NULL,"
+                    " token = NULL, lease_until = NULL, prev_owner = NULL, updated_at = ? WHERE id = ? AND token = ?",
+                    (STAGES[stage][1], json.dumps(payload, ensure_ascii=False), now, job_id, token)
+                ).rowcount
+            if moved:
+                self._event(stage, 'done', moved)
+        return moved
+
+    def fail(self, token, errors):
+        now = self.clock()
+        with self.lock, self.conn:
+            stage = None
+            retried = parked = 0
+            for job_id, error in errors.items():
+                row = self.conn.execute("SELECT state, attempts FROM jobs WHERE id = ? AND token = ?",
+                                        (job_id, token)).fetchone()
+                if row is None:
+                    continue
+                stage = next(name for name, (source, _) in STAGES.items() if source == row[0])
+                give_up = row[1] >= self.max_attempts
+                released = self.conn.execute(
+                    "UPDATE jobs SET failed = ?, last_error = ?, owner = NULL, token = NULL, lease_until = NULL,"
+                    " updated_at = ? WHERE id = ? AND token = ?", (int(give_up), str(error)[:500], now, job_id, token)
+                ).rowcount
+                retried += released and not give_up
+                parked += released and give_up
+            if stage:
+                self._event(stage, 'retry', retried)
+                self._event(stage, 'failed', parked)
+
+    def release(self, token, ids):
+        with self.lock, self.conn:
+            self.conn.executemany("UPDATE jobs SET attempts = MAX(0, attempts - 1), owner = NULL, token = NULL,"
+                                  " lease_until = NULL WHERE id = ? AND token = ?",
+                                  [(job_id, token) for job_id in ids])
+
+    def retry_failed(self, stage):
+        """Give parked jobs of a stage a fresh set of attempts"""
+        with self.lock, self.conn:
+            return self.conn.execute("UPDATE jobs SET failed = 0, attempts = 0, last_error = NULL, updated_at = ?"
+                                     " WHERE state = ? AND failed = 1", (self.clock(), STAGES[stage][0])).rowcount
+
+    def stats(self, window=3600):
+        now = self.clock()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT state, failed, lease_until > ? AS leased, COUNT(*), MIN(updated_at) FROM jobs"
+                " GROUP BY state, failed, leased", (now,)
+            ).fetchall()
+            events = self.conn.execute("SELECT stage, outcome, SUM(count) FROM events WHERE at >= ?"
+                                       " GROUP BY stage, outcome", (now - window,)).fetchall()
+        done = {(stage, outcome): count for stage, outcome, count in events}
+        stats = {}
+        for stage, (source, _) in STAGES.items():
+            backlog = sum(count for state, failed, leased, count, _ in rows if state == source and not failed and not leased)
+            oldest = min((since for state, failed, leased, _, since in rows
+                          if state == source and not failed and not leased), default=None)
+            stats[stage] = {
+                'backlog': backlog,
+                'in_flight': sum(count for state, failed, leased, count, _ in rows if state == source and leased and not failed),
+                'failed': sum(count for state, failed, _, count, _ in rows if state == source and failed),
+                'done_per_hour': done.get((stage, 'done'), 0) * 3600 / window,
+                'reclaimed': done.get((stage, 'reclaimed'), 0),
+                'oldest_waiting_s': now - oldest if oldest is not None else 0.0,
+            }
+        stats['uploaded'] = sum(count for state, _, _, count, _ in rows if state == STATES[-1])
+        return stats
+
+    def close(self):
+        self.conn.close()
+
+
+class StageWorker:
+    """Claims batches for one stage and runs handler(jobs) -> {job id: payload update, Exception or None}
+
+    None means the handler did not get to the job (e.g. upload quota spent); it
+    goes back to the queue without using up an attempt.
+    """
+
+    def __init__(self, store, stage, handler, worker_id=None, batch_size=BATCH_SIZE,
+                 lease_seconds=LEASE_SECONDS, idle_sleep=30.0):
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage {stage!r}, expected one of {tuple(STAGES)}")
+        self.store = store
+        self.stage = stage
+        self.handler = handler
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{stage}"
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.idle_sleep = idle_sleep
+        self.stopped = threading.Event()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _heartbeat(self, token, done):
+        while not done.wait(self.lease_seconds / 3):
+            if self.store.heartbeat(token, self.lease_seconds) == 0:
+                print(f"⚠️ {self.worker_id}: lease lost on batch {token[:8]}")
+                return
+
+    def run_batch(self):
+        """Claim, work and settle one batch; returns how many jobs were attempted"""
+        token, jobs = self.store.claim(self.stage, self.worker_id, self.batch_size, self.lease_seconds)
+        if not jobs:
+            return 0
+        done = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(token, done), daemon=True)
+        beat.start()
+        try:
+            with metrics.timer('job_queue_batch_seconds', stage=self.stage):
+                try:
+                    results = self.handler(jobs)
+                except Exception as e:
+                    results = {job['id']: e for job in jobs}
+        finally:
+            done.set()
+            beat.join()
+
+        finished = {job_id: result for job_id, result in results.items()
+                    if result is not None and not isinstance(result, Exception)}
+        errors = {job_id: result for job_id, result in results.items() if isinstance(result, Exception)}
+        skipped = [job['id'] for job in jobs if job['id'] in results and results[job['id']] is None]
+        errors.update((job['id'], RuntimeError("no result from handler")) for job in jobs
+                      if job['id'] not in results)
+        moved = self.store.complete(token, finished)
+        self.store.fail(token, errors)
+        self.store.release(token, skipped)
+        print(f"📦 {self.stage}: {moved} done, {len(errors)} failed, {len(skipped)} put back, "
+              f"{len(finished) - moved} lost to another worker ({self.worker_id})")
+        return len(jobs) - len(skipped)
+
+    def run(self, once=False):
+        """Work batches until stopped (or until the stage has nothing left, with once)"""
+        while not self.stopped.is_set():
+            if self.run_batch() == 0:
+                if once:
+                    return
+                self.stopped.wait(self.idle_sleep)
+
+
+# ============= STAGE HANDLERS =============
+
+def render_handler(jobs):
+    """Render the batch with the local orchestrator (render cache included)"""
+    from render_orchestrator import RenderOrchestrator, ensure_bundle, OUTPUT_DIR
+    from render_cache import RenderCache
+
+    mcqs = {job['position']: job['payload']['mcq'] for job in jobs}
+    orchestrator = RenderOrchestrator(sorted(mcqs), bundle_location=ensure_bundle(), cache=RenderCache(), mcqs=mcqs)
+    _, failed = orchestrator.run()
+    return {job['id']: RuntimeError("render failed") if job['position'] in failed
+            else {'video': os.path.join(OUTPUT_DIR, f"Quiz{job['position'] + 1}.mp4")} for job in jobs}
+
+
+def metadata_handler(jobs):
+    """SEO metadata for the batch in as few Gemini calls as the engine can manage"""
+    from youtube_automation import generate_seo_metadata_batch
+
+    videos = [(str(job['position'] + 1), job['payload']['mcq']) for job in jobs]
+    return {job['id']: {'metadata': metadata} for job, metadata in zip(jobs, generate_seo_metadata_batch(videos))}
+
+
+def upload_handler(jobs):
+    """Upload each video within today's API quota and record it in the upload ledger"""
+    from youtube_automation import upload_to_youtube, log_uploaded_video
+    from upload_scheduler import ScheduleStore, QuotaBudget, UPLOAD_COST
+    from upload_pipeline import classify_upload_error
+
+    schedule = ScheduleStore()
+    budget = QuotaBudget(schedule)
+    results = {}
+    try:
+        for job in jobs:
+            # Out of quota: the rest go back untouched and wait for the reset
+            if not budget.charge(UPLOAD_COST):
+                results[job['id']] = None
+                continue
+            try:
+                video_id = upload_to_youtube(job['payload']['video'], job['payload']['metadata'])
+                log_uploaded_video(os.path.basename(job['payload']['video']), video_id, job['payload']['metadata'])
+                results[job['id']] = {'video_id': video_id}
+            except Exception as e:
+                if classify_upload_error(e) == 'quota':
+                    budget.exhaust()
+                    results[job['id']] = None
+                else:
+                    results[job['id']] = e
+    finally:
+        schedule.close()
+    return results
+
+
+HANDLERS = {'render': render_handler, 'metadata': metadata_handler, 'upload': upload_handler}
+
+
+def sync(store, bank_path):
+    """Add every MCQ in the bank as a job and fast-forward those already rendered / uploaded"""
+    from mcq_dataset import MCQDataset
+    from mcq_dedup import exact_key
+    from render_orchestrator import completed_indices, OUTPUT_DIR
+    from upload_ledger import UploadLedger
+
+    # A repeated MCQ is one job, at the position it first appears (the one add keeps);
+    # its later copies must not fast-forward it with another video's render or upload
+    jobs, seen = [], set()
+    with MCQDataset(bank_path) as bank:
+        for position, mcq in enumerate(bank):
+            job_id = exact_key(mcq)
+            if job_id not in seen:
+                seen.add(job_id)
+                jobs.append({'id': job_id, 'position': position, 'payload': {'mcq': mcq}})
+    added = store.add(jobs)
+
+    # Jobs only ever move forward, so a re-sync never undoes queue progress
+    rendered = completed_indices()
+    uploaded = UploadLedger().filenames()
+    to_render, to_upload = {}, {}
+    for job in jobs:
+        name = f"Quiz{job['position'] + 1}.mp4"
+        if name in uploaded:
+            to_upload[job['id']] = {'video': os.path.join(OUTPUT_DIR, name)}
+        elif job['position'] in rendered:
+            to_render[job['id']] = {'video': os.path.join(OUTPUT_DIR, name)}
+    store.advance(to_render, 'rendered')
+    store.advance(to_upload, 'uploaded')
+    return added
+
+
+def print_stats(stats, window):
+    print(f"{'stage':10s} {'backlog':>8s} {'in flight':>10s} {'failed':>7s} {'done/h':>8s} "
+          f"{'reclaimed':>10s} {'oldest wait':>12s}")
+    for stage in STAGES:
+        s = stats[stage]
+        print(f"{stage:10s} {s['backlog']:8d} {s['in_flight']:10d} {s['failed']:7d} {s['done_per_hour']:8.1f} "
+              f"{s['reclaimed']:10d} {s['oldest_waiting_s'] / 3600:11.1f}h")
+    print(f"✅ Uploaded: {stats['uploaded']} (throughput over the last {window / 3600:.1f}h)")
+
+
+def main(argv=None):
+    from mcq_dataset import DEFAULT_BANK
+
+    parser = argparse.ArgumentParser(description="Multi-stage MCQ job queue")
+    parser.add_argument('command', choices=['sync', 'status', 'work', 'retry'])
+    parser.add_argument('stage', nargs='?', choices=list(STAGES))
+    parser.add_argument('--queue', default=QUEUE_FILE)
+    parser.add_argument('--bank', default=DEFAULT_BANK)
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE)
+    parser.add_argument('--lease', type=float, default=LEASE_SECONDS, help="seconds before an idle claim expires")
+    parser.add_argument('--window', type=float, default=3600, help="throughput window for status, seconds")
+    parser.add_argument('--once', action='store_true', help="with work: exit when the stage has nothing left")
+    args = parser.parse_args(argv)
+
+    store = SQLiteJobStore(args.queue)
+    try:
+        if args.command == 'sync':
+            added = sync(store, args.bank)
+            print(f"✓ {added} new jobs from {args.bank}")
+            print_stats(store.stats(args.window), args.window)
+        elif args.command == 'status':
+            print_stats(store.stats(args.window), args.window)
+        elif args.command == 'retry':
+            if not args.stage:
+                parser.error("retry needs a stage")
+            print(f"🔁 {store.retry_failed(args.stage)} failed {args.stage} jobs queued again")
+        else:
+            if not args.stage:
+                parser.error("work needs a stage")
+            worker = StageWorker(store, args.stage, HANDLERS[args.stage], batch_size=args.batch,
+                                 lease_seconds=args.lease)
+            print(f"👷 {worker.worker_id} working on {args.stage}")
+            try:
+                worker.run(once=args.once)
+            except KeyboardInterrupt:
+                print("\n>>> Stopping worker (its leases will expire and be reclaimed) <<<")
+                return 130
+            finally:
+                metrics.write(f'job_queue_{args.stage}')
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
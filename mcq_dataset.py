@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Indexed, streaming access to an MCQ bank JSON file (e.g. gk_mcqs.json)
+- Builds a binary offset index next to the JSON once (<file>.idx)
+- O(1) random access by index or quiz number, lazy iteration over ranges
+- The index is rebuilt automatically when the JSON's mtime or size changes
+
+Index layout (little-endian):
+    8s  magic  b"MCQIDX1\\0"
+    q   source mtime_ns
+    q   source size in bytes
+    Q   entry count
+    Q*  (byte offset, byte length) pair per entry
+"""
+
+import os
+import sys
+import json
+import struct
+from array import array
+
+DEFAULT_BANK = 'mcqs_data/gk/gk_mcqs.json'
+INDEX_MAGIC = b'MCQIDX1\0'
+INDEX_HEADER = struct.Struct('<8sqqQ')
+
+
+def build_index(json_path, index_path):
+    """Scan the JSON array once and write the byte span of every element"""
+    with open(json_path, 'rb') as f:
+        data = f.read()
+    text = data.decode('utf-8')
+    decoder = json.JSONDecoder()
+
+    spans = array('Q')
+    pos = text.index('[') + 1
+    byte_pos = len(text[:pos].encode('utf-8'))
+    while True:
+        # Skip whitespace and separators between elements
+        skip = pos
+        while text[pos] in ' \t\r\n,':
+            pos += 1
+        byte_pos += pos - skip
+        if text[pos] == ']':
+            break
+
+        _, end = decoder.raw_decode(text, pos)
+        length = len(text[pos:end].encode('utf-8'))
+        spans.append(byte_pos)
+        spans.append(length)
+        byte_pos += length
+        pos = end
+
+    stat = os.stat(json_path)
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, stat.st_mtime_ns, stat.st_size, len(spans) // 2))
+        stored = array('Q', spans)
+        if sys.byteorder != 'little':
+            stored.byteswap()
+        stored.tofile(f)
+    os.replace(tmp_path, index_path)
+    return spans
+
+
+def load_index(json_path, index_path):
+    """Return the stored spans, or None if the index is missing or stale"""
+    try:
+        with open(index_path, 'rb') as f:
+            magic, mtime_ns, size, count = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+            stat = os.stat(json_path)
+            if magic != INDEX_MAGIC or mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+                return None
+            spans = array('Q')
+            spans.fromfile(f, count * 2)
+    except (OSError, struct.error, EOFError):
+        return None
+    if sys.byteorder != 'little':
+        spans.byteswap()
+    return spans
+
+
+class MCQDataset:
+    """Read-only view over an MCQ bank that only touches the bytes it needs"""
+
+    def __init__(self, json_path=DEFAULT_BANK, index_path=None):
+        self.json_path = json_path
+        self.index_path = index_path or json_path + '.idx'
+        self.spans = None
+        self._file = None
+        self.refresh()
+
+    def refresh(self):
+        """Load the index, rebuilding it if the JSON changed since it was written"""
+        spans = load_index(self.json_path, self.index_path)
+        if spans is None:
+            spans = build_index(self.json_path, self.index_path)
+        self.spans = spans
+        self.close()
+
+    def _read(self, index):
+        if self._file is None:
+            self._file = open(self.json_path, 'rb')
+        offset, length = self.spans[2 * index], self.spans[2 * index + 1]
+        self._file.seek(offset)
+        return json.loads(self._file.read(length))
+
+    def __len__(self):
+        return len(self.spans) // 2
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"MCQ index out of range: {index}")
+        return self._read(index)
+
+    def __iter__(self):
+        return self.iter_range(0, len(self))
+
+    def quiz(self, quiz_number):
+        """MCQ for a 1-based quiz number (Quiz1.mp4 -> index 0)"""
+        return self[quiz_number - 1]
+
+    def iter_range(self, start, stop):
+        """Lazily yield MCQs for indices start <= i < stop"""
+        for index in range(max(start, 0), min(stop, len(self))):
+            yield self._read(index)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # Usage: python mcq_dataset.py [bank.json] -- (re)builds the index and prints a summary
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_BANK
+    with MCQDataset(path) as dataset:
+        print(f"✓ Indexed {len(dataset)} MCQs -> {dataset.index_path}")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Duplicate detection for the MCQ bank
+- Exact duplicates: hash of the normalized question + sorted normalized options
+  (ignores case, punctuation, blank lengths "____" and option order)
+- Near duplicates: MinHash signatures over word shingles, bucketed with LSH,
+  that also have the same options and correct answer (templates like "capital
+  of X" only differ in a name or number, and their options differ with it)
+- Incremental: add() costs O(1) expected per MCQ, so it can sit behind the scraper
+
+Usage:
+    python mcq_dedup.py [bank.json ...]   # report duplicates within/across files
+"""
+
+import sys
+import json
+import random
+import hashlib
+import unicodedata
+
+DEFAULT_FILES = ['mcqs_data/gk/gk_mcqs.json', 'mcqs_data/gk/mcqs_progress.json']
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 2
+NEAR_THRESHOLD = 0.8
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(1234)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+
+
+def normalize(text):
+    """Lowercase, unify unicode punctuation and drop everything but words"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    chars = [c if c.isalnum() else ' ' for c in text]
+    return ' '.join(''.join(chars).split())
+
+
+def exact_key(mcq):
+    """Content hash that is stable across blank lengths and option order"""
+    options = sorted(normalize(option) for option in mcq['options'])
+    content = normalize(mcq['question']) + '\x1f' + '\x1f'.join(options)
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def correct_answer(mcq):
+    return normalize(mcq['options'][mcq['correctAnswer']])
+
+
+def answer_key(mcq):
+    """Normalized option set and correct answer; near duplicates must share it"""
+    return tuple(sorted(normalize(option) for option in mcq['options'])), correct_answer(mcq)
+
+
+def shingles(mcq):
+    """Word n-grams of the question plus each option as a whole token"""
+    words = normalize(mcq['question']).split()
+    grams = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))}
+    grams.update('opt:' + normalize(option) for option in mcq['options'])
+    return grams
+
+
+def minhash(grams):
+    """MinHash signature (NUM_PERM values) of a shingle set"""
+    hashes = [int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=8).digest(), 'little')
+              for g in grams]
+    return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity from two signatures"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+class DedupIndex:
+    """Incremental exact + near-duplicate index over MCQs"""
+
+    def __init__(self, threshold=NEAR_THRESHOLD):
+        self.threshold = threshold
+        self.exact = {}
+        self.signatures = []
+        self.answers = []
+        self.buckets = [{} for _ in range(BANDS)]
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def _bands(self, signature):
+        return [signature[b * ROWS:(b + 1) * ROWS] for b in range(BANDS)]
+
+    def _lookup(self, mcq):
+        key = exact_key(mcq)
+        if key in self.exact:
+            return 'exact', self.exact[key], key, None
+
+        signature = minhash(shingles(mcq))
+        answer = answer_key(mcq)
+        best, best_id = 0.0, None
+        for band, bucket in zip(self._bands(signature), self.buckets):
+            for candidate in bucket.get(band, ()):
+                # Same template with other options or answer ("national flower of X") is not a duplicate
+                if self.answers[candidate] != answer:
+                    continue
+                score = similarity(signature, self.signatures[candidate])
+                if score > best:
+                    best, best_id = score, candidate
+        if best >= self.threshold:
+            return 'near', best_id, key, signature
+        return 'new', None, key, signature
+
+    def check(self, mcq):
+        """Return ('exact' | 'near' | 'new', id of the matching MCQ or None)"""
+        kind, match, _, _ = self._lookup(mcq)
+        return kind, match
+
+    def add(self, mcq):
+        """Insert an MCQ; returns (kind, id) where id is the new or matching entry"""
+        kind, match, key, signature = self._lookup(mcq)
+        if kind == 'exact':
+            return kind, match
+
+        # Near duplicates are indexed too, so they are reported but kept
+        item_id = len(self.signatures)
+        self.signatures.append(signature)
+        self.answers.append(answer_key(mcq))
+        self.exact[key] = item_id
+        for band, bucket in zip(self._bands(signature), self.buckets):
+            bucket.setdefault(band, []).append(item_id)
+        return kind, (match if kind == 'near' else item_id)
+
+
+def report(paths):
+    """Print duplicate counts within each file and across all of them"""
+    index = DedupIndex()
+    sources = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            mcqs = json.load(f)
+
+        exact, near = 0, []
+        for position, mcq in enumerate(mcqs):
+            kind, match = index.add(mcq)
+            if kind == 'exact':
+                exact += 1
+                continue
+            if kind == 'near':
+                near.append((position, match))
+            sources.append((path, position))
+
+        print(f"📄 {path}: {len(mcqs)} MCQs, {exact} exact duplicates, {len(near)} near duplicates")
+        for position, match in near[:10]:
+            other_path, other_position = sources[match]
+            print(f"   ≈ #{position} ~ {other_path}#{other_position}: {mcqs[position]['question'][:60]}")
+        if len(near) > 10:
+            print(f"   ... {len(near) - 10} more")
+
+    print(f"✓ Unique MCQs across all files: {len(index)}")
+
+
+if __name__ == "__main__":
+    report(sys.argv[1:] or DEFAULT_FILES)
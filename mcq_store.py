@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory MCQ bank for long-running processes
+- Columnar layout: every question in one UTF-8 buffer with offsets, options
+  as ids into a string table ("None of These" is stored once), correctAnswer
+  as a uint8 array
+- A StringTable can be shared by several banks (one per category)
+- Records come back as immutable MCQ objects (__slots__) that also answer
+  mcq['question'] like the JSON dicts, so existing callers keep working
+- Round-trips to the gk_mcqs.json schema byte for byte
+
+Usage:
+    python mcq_store.py [bank.json]     # memory: dicts vs store, round-trip check
+"""
+
+import os
+import sys
+import json
+from array import array
+
+from mcq_dataset import MCQDataset, DEFAULT_BANK
+
+_FIELDS = ('question', 'options', 'correctAnswer')
+
+
+class StringTable:
+    """Interned strings addressed by a stable integer id, stored in one UTF-8 buffer
+
+    The text -> id dict only exists while banks are being built; freeze() drops
+    it and the next intern() rebuilds it.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._offsets = array('Q', [0])
+        self._ids = {}
+
+    def intern(self, text):
+        if self._ids is None:
+            self._ids = {self[i]: i for i in range(len(self))}
+        string_id = self._ids.get(text)
+        if string_id is None:
+            string_id = self._ids[text] = len(self)
+            self._buffer += text.encode('utf-8')
+            self._offsets.append(len(self._buffer))
+        return string_id
+
+    def freeze(self):
+        self._ids = None
+
+    def __getitem__(self, string_id):
+        return self._buffer[self._offsets[string_id]:self._offsets[string_id + 1]].decode('utf-8')
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def nbytes(self):
+        return sys.getsizeof(self._buffer) + sys.getsizeof(self._offsets) + sys.getsizeof(self._ids or {})
+
+
+class MCQ:
+    """One immutable MCQ; mcq['question'] / mcq.to_dict() mirror the JSON form"""
+
+    __slots__ = ('question', 'options', 'correct_answer', 'extra')
+
+    def __init__(self, question, options, correct_answer, extra=None):
+        set_field = object.__setattr__
+        set_field(self, 'question', question)
+        set_field(self, 'options', tuple(options))
+        set_field(self, 'correct_answer', correct_answer)
+        set_field(self, 'extra', extra)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MCQ records are immutable")
+
+    def __getitem__(self, key):
+        if key == 'question':
+            return self.question
+        if key == 'options':
+            return list(self.options)
+        if key == 'correctAnswer':
+            return self.correct_answer
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        mcq = {'question': self.question, 'options': list(self.options), 'correctAnswer': self.correct_answer}
+        if self.extra:
+            mcq.update(self.extra)
+        return mcq
+
+    def __eq__(self, other):
+        if isinstance(other, MCQ):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __hash__(self):
+        return hash((self.question, self.options, self.correct_answer))
+
+    def __repr__(self):
+        return f"MCQ({self.question!r}, {list(self.options)!r}, {self.correct_answer})"
+
+
+class MCQStore:
+    """Read-only, array-backed MCQ bank"""
+
+    def __init__(self, strings=None):
+        self.strings = strings if strings is not None else StringTable()
+        self._text = b''                      # all questions, UTF-8
+        self._text_offsets = array('Q', [0])  # question i = _text[off[i]:off[i + 1]]
+        self._option_ids = array('I')         # string ids, all options back to back
+        self._option_offsets = array('I', [0])
+        self._correct = array('B')            # correctAnswer per MCQ
+        self._extra = {}                      # index -> keys beyond the standard three
+
+    @classmethod
+    def from_mcqs(cls, mcqs, strings=None):
+        """Build from an iterable of JSON-style dicts"""
+        store = cls(strings)
+        text = bytearray()
+        intern = store.strings.intern
+        for index, mcq in enumerate(mcqs):
+            correct = mcq['correctAnswer']
+            if not 0 <= correct <= 255:
+                raise ValueError(f"MCQ {index}: correctAnswer {correct} does not fit in a uint8")
+            text += mcq['question'].encode('utf-8')
+            store._text_offsets.append(len(text))
+            store._option_ids.extend(intern(option) for option in mcq['options'])
+            store._option_offsets.append(len(store._option_ids))
+            store._correct.append(correct)
+            if len(mcq) > 3 or any(key not in mcq for key in _FIELDS):
+                store._extra[index] = {key: value for key, value in mcq.items() if key not in _FIELDS}
+        store._text = bytes(text)
+        store.strings.freeze()
+        return store
+
+    @classmethod
+    def from_json(cls, json_path=DEFAULT_BANK, strings=None):
+        """Build from a bank file, one MCQ at a time (the full list of dicts never exists)"""
+        with MCQDataset(json_path) as dataset:
+            return cls.from_mcqs(dataset, strings)
+
+    def __len__(self):
+        return len(self._correct)
+
+    def question(self, index):
+        start, end = self._text_offsets[index], self._text_offsets[index + 1]
+        return self._text[start:end].decode('utf-8')
+
+    def options(self, index):
+        start, end = self._option_offsets[index], self._option_offsets[index + 1]
+        strings = self.strings
+        return tuple(strings[string_id] for string_id in self._option_ids[start:end])
+
+    def correct_answer(self, index):
+        return self._correct[index]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"MCQ index out of range: {index}")
+        return MCQ(self.question(index), self.options(index), self._correct[index], self._extra.get(index))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def quiz(self, quiz_number):
+        """MCQ for a 1-based quiz number (Quiz1.mp4 -> index 0)"""
+        return self[quiz_number - 1]
+
+    def to_dicts(self):
+        return [mcq.to_dict() for mcq in self]
+
+    def to_json(self, json_path):
+        """Write the bank in the scraper's JSON format (atomic)"""
+        tmp_path = json_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dicts(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, json_path)
+
+    def nbytes(self, include_strings=True):
+        """Approximate heap size of the columns (plus the string table if not shared)"""
+        size = (sys.getsizeof(self._text) + sys.getsizeof(self._text_offsets) + sys.getsizeof(self._option_ids)
+                + sys.getsizeof(self._option_offsets) + sys.getsizeof(self._correct) + sys.getsizeof(self._extra))
+        if include_strings:
+            size += self.strings.nbytes()
+        return size
+
+
+if __name__ == "__main__":
+    import tracemalloc
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_BANK
+
+    tracemalloc.start()
+    with open(path, 'r', encoding='utf-8') as f:
+        mcqs = json.load(f)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = MCQStore.from_json(path)
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert store.to_dicts() == mcqs, "round-trip mismatch"
+    option_count = len(store._option_ids)
+    print(f"✓ {len(store)} MCQs round-trip exactly ({path})")
+    print(f"   dicts: {dict_bytes / 1e6:6.2f} MB")
+    print(f"   store: {store_bytes / 1e6:6.2f} MB ({dict_bytes / max(store_bytes, 1):.1f}x smaller)")
+    print(f"   {option_count} options -> {len(store.strings)} distinct strings")
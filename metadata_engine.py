@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Batched Gemini metadata generation with a persistent cache
+- Packs many MCQs into one generate_content() call and parses the JSON array reply
+- Caches results in SQLite keyed by a hash of the MCQ content + PROMPT_VERSION,
+  so re-runs and retried uploads cost no LLM calls
+- Works with any model object exposing generate_content(prompt) -> obj.text;
+  GeminiModel defers importing and configuring the Gemini SDK to the first call
+- With an OfflineTagger, mode picks how it is used: "offline" (tagger only, no
+  LLM calls), "fallback" (tagger fills whatever Gemini could not), "prefilter"
+  (Gemini gets the question + offline keywords and writes title/description
+  only; tags come from the tagger) or "gemini" (tagger unused)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from metrics import metrics
+
+CACHE_FILE = "temp/metadata_cache.sqlite"
+PROMPT_VERSION = "v1"
+BATCH_SIZE = 20
+GEMINI_MODEL = "gemini-1.5-flash"
+MODES = ("gemini", "fallback", "offline", "prefilter")
+
+
+def cache_key(item, prompt_version=PROMPT_VERSION):
+    """Content address of an MCQ (or any JSON-able item) for a prompt version"""
+    content = json.dumps(item, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{prompt_version}\x1f{content}".encode('utf-8')).hexdigest()
+
+
+class MetadataCache:
+    """SQLite key -> metadata store, safe to share between threads"""
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+        return self._conn
+
+    def get_many(self, keys):
+        """Return {key: metadata} for the keys that are cached"""
+        found = {}
+        keys = list(keys)
+        with self.lock:
+            conn = self._connect()
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, value FROM metadata WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def put_many(self, entries):
+        """Store {key: metadata} in one transaction"""
+        now = time.time()
+        with self.lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO metadata (key, value, created_at) VALUES (?, ?, ?)",
+                    [(key, json.dumps(value, ensure_ascii=False), now) for key, value in entries.items()]
+                )
+
+    def __len__(self):
+        with self.lock:
+            return self._connect().execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def build_batch_prompt(items):
+    """One prompt asking for a JSON array with an entry per item"""
+    lines = []
+    for i, item in enumerate(items):
+        if 'question' in item and 'options' in item:
+            lines.append(
+                f"[{i}] Question: {item['question']}\n"
+                f"    Options: {', '.join(item['options'])}\n"
+                f"    Correct Answer: {item['options'][item['correctAnswer']]}"
+            )
+        else:
+            preview = f" Question preview: {item['question']}" if item.get('question') else ""
+            lines.append(f"[{i}] PPSC/FPSC quiz video #{item.get('video_number', i)}.{preview}")
+
+    return f"""
+Create highly engaging YouTube Shorts metadata for each of these {len(items)} PPSC/FPSC exam preparation MCQ quiz videos.
+
+Requirements for every item:
+- Title: Catchy, under 60 characters, includes keywords like "PPSC", "MCQ", "Quiz"
+- Description: 2-3 lines, SEO optimized, includes exam preparation keywords and relevant emojis
+- Tags: 15-20 relevant tags for Pakistani competitive exams, general knowledge, education
+
+Items:
+{chr(10).join(lines)}
+
+Return ONLY a valid JSON array with one object per item, in the same order:
+[
+  {{"id": 0, "title": "...", "description": "...", "tags": ["tag1", "tag2", ...]}},
+  ...
+]
+"""
+
+
+def build_prefilter_prompt(items, keywords):
+    """Shorter prompt: question + offline keywords, no options, no tags asked for"""
+    lines = []
+    for i, (item, words) in enumerate(zip(items, keywords)):
+        question = item.get('question') or f"PPSC/FPSC quiz video #{item.get('video_number', i)}"
+        hint = f"\n    Keywords: {', '.join(words)}" if words else ""
+        lines.append(f"[{i}] Question: {question}{hint}")
+
+    return f"""
+Write YouTube Shorts metadata for each of these {len(items)} PPSC/FPSC exam preparation MCQ quiz videos.
+- Title: Catchy, under 60 characters, includes "PPSC", "MCQ" or "Quiz"; do not reveal the answer
+- Description: 2-3 lines, SEO optimized, exam preparation keywords and relevant emojis
+
+Items:
+{chr(10).join(lines)}
+
+Return ONLY a valid JSON array, same order: [{{"id": 0, "title": "...", "description": "..."}}, ...]
+"""
+
+
+def parse_batch_response(text, count):
+    """Map the model's JSON array back to item positions (None where missing)"""
+    results = [None] * count
+    start = text.find('[')
+    end = text.rfind(']') + 1
+    if start == -1 or end == 0:
+        return results
+
+    entries = json.loads(text[start:end])
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict) or 'title' not in entry:
+            continue
+        index = entry.get('id', position)
+        if not isinstance(index, int) or not 0 <= index < count:
+            continue
+
+        tags = entry.get('tags', [])
+        if isinstance(tags, str):
+            tags = [tag.strip() for tag in tags.split(',') if tag.strip()]
+        results[index] = {
+            "title": entry['title'],
+            "description": entry.get('description', ""),
+            "tags": tags,
+        }
+    return results
+
+
+class GeminiModel:
+    """Gemini GenerativeModel built on first use (the SDK is slow to import)"""
+
+    def __init__(self, api_key, model_name=GEMINI_MODEL):
+        self.api_key = api_key
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                import google.generativeai as genai
+                with metrics.timer('gemini_init_seconds'):
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate_content(self, prompt):
+        return self._load().generate_content(prompt)
+
+
+class MetadataEngine:
+    """Cache-first, batched metadata generation (model=None: cache only, no LLM calls)"""
+
+    def __init__(self, model, cache=None, batch_size=BATCH_SIZE, prompt_version=PROMPT_VERSION,
+                 tagger=None, mode=None):
+        self.model = model
+        self.cache = cache if cache is not None else MetadataCache()
+        self.batch_size = batch_size
+        self.prompt_version = prompt_version
+        self.tagger = tagger
+        self.mode = mode or ("fallback" if tagger is not None else "gemini")
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown metadata mode {self.mode!r}, expected one of {MODES}")
+        if self.mode != "gemini" and tagger is None:
+            raise ValueError(f"Metadata mode {self.mode!r} needs a tagger")
+        self.llm_calls = 0
+
+    def _offline(self, item):
+        """Tagger metadata for one item (None for items without question text)"""
+        with metrics.timer('metadata_offline_seconds'):
+            return self.tagger.metadata(item, item.get('video_number'))
+
+    def generate(self, items):
+        """Return metadata ({title, description, tags: list}) per item, None if unavailable"""
+        if self.mode == "offline":
+            metrics.count('metadata_offline_total', len(items))
+            return [self._offline(item) for item in items]
+
+        prefilter = self.mode == "prefilter"
+        prompt_version = f"{self.prompt_version}-prefilter" if prefilter else self.prompt_version
+        keys = [cache_key(item, prompt_version) for item in items]
+        cached = self.cache.get_many(set(keys))
+        metrics.count('metadata_cache_hits_total', sum(1 for key in keys if key in cached))
+
+        # Ask the model once per batch of distinct, uncached items
+        pending = {}
+        for key, item in zip(keys, items):
+            if key not in cached and key not in pending:
+                pending[key] = item
+        pending_keys = list(pending)
+
+        if self.model is None:
+            pending_keys = []
+
+        for i in range(0, len(pending_keys), self.batch_size):
+            batch_keys = pending_keys[i:i + self.batch_size]
+            batch = [pending[key] for key in batch_keys]
+            offline = [self._offline(item) for item in batch] if prefilter else None
+            try:
+                self.llm_calls += 1
+                metrics.count('metadata_llm_calls_total')
+                if prefilter:
+                    keywords = [result['tags'] if result else [] for result in offline]
+                    prompt = build_prefilter_prompt(batch, keywords)
+                else:
+                    prompt = build_batch_prompt(batch)
+                metrics.count('metadata_prompt_chars_total', len(prompt))
+                with metrics.timer('metadata_llm_seconds'):
+                    response = self.model.generate_content(prompt)
+                results = parse_batch_response(response.text, len(batch))
+                if prefilter:
+                    results = [dict(result, tags=extra['tags'] + result['tags']) if result and extra else result
+                               for result, extra in zip(results, offline)]
+            except Exception as e:
+                metrics.count('metadata_llm_errors_total')
+                print(f"⚠️ Gemini batch error: {e}")
+                continue
+
+            fresh = {key: result for key, result in zip(batch_keys, results) if result is not None}
+            self.cache.put_many(fresh)
+            cached.update(fresh)
+
+        results = [cached.get(key) for key in keys]
+        if self.mode in ("fallback", "prefilter"):
+            missing = [i for i, result in enumerate(results) if result is None]
+            metrics.count('metadata_offline_total', len(missing))
+            for i in missing:
+                results[i] = self._offline(items[i])
+        return results
+
+    def generate_one(self, item):
+        return self.generate([item])[0]
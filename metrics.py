@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Low-overhead metrics for the scraper and uploaders
+- Counters and latency histograms, optionally labelled (e.g. stage="fetch")
+- p50/p95/p99 from a bounded reservoir per histogram, plus Prometheus buckets
+- Written as a Prometheus textfile (node_exporter textfile collector) and a
+  JSON summary under temp/metrics/ when a script finishes
+- Opt-in hot-path profiling: MCQ_PROFILE=cprofile (deterministic, all threads:
+  one profiler per thread merged at the end before Python 3.12) or
+  MCQ_PROFILE=sample (wall clock, all threads)
+
+Usage:
+    from metrics import metrics
+    with metrics.timer('scrape_fetch_seconds'):
+        ...
+    metrics.count('scrape_pages_total', status='ok')
+    metrics.write('scraper')                  # temp/metrics/scraper.prom + .json
+
+    python metrics.py [temp/metrics/scraper.json]   # print a summary
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import bisect
+import threading
+import collections
+from functools import wraps
+from contextlib import contextmanager
+
+METRICS_DIR = os.environ.get('MCQ_METRICS_DIR', 'temp/metrics')
+PROFILE_MODE = os.environ.get('MCQ_PROFILE', '')  # '', 'cprofile' or 'sample'
+RESERVOIR_SIZE = 2048
+# Seconds; wide enough for a 1 ms parse and a 10 minute upload
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 600)
+# Bytes per second, for *_bytes_per_second histograms
+THROUGHPUT_BUCKETS = (1e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2.5e7, 5e7, 1e8)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+class Histogram:
+    """Count, sum, Prometheus buckets and a reservoir sample for quantiles"""
+
+    __slots__ = ('bounds', 'count', 'total', 'minimum', 'maximum', 'buckets', 'samples')
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float('inf')
+        self.maximum = float('-inf')
+        self.buckets = [0] * (len(bounds) + 1)
+        self.samples = []
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < RESERVOIR_SIZE:
+                self.samples[slot] = value
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.minimum if self.count else 0.0,
+            'max': self.maximum if self.count else 0.0,
+            'p50': pick(0.50),
+            'p95': pick(0.95),
+            'p99': pick(0.99),
+        }
+
+
+class Metrics:
+    """Thread-safe registry of counters and histograms"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = collections.defaultdict(float)     # (name, labels) -> value
+        self.histograms = {}                                # (name, labels) -> Histogram
+        self.started = time.time()
+
+    def count(self, name, value=1, **labels):
+        with self.lock:
+            self.counters[(name, _label_key(labels))] += value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                bounds = THROUGHPUT_BUCKETS if name.endswith('_per_second') else BUCKETS
+                histogram = self.histograms[key] = Histogram(bounds)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the elapsed seconds of the block (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of timer()"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """JSON-friendly view: {'counters': {...}, 'histograms': {...}}"""
+        with self.lock:
+            counters = {f"{name}{_format_labels(labels)}": value
+                        for (name, labels), value in sorted(self.counters.items())}
+            histograms = {f"{name}{_format_labels(labels)}": histogram.summary()
+                          for (name, labels), histogram in sorted(self.histograms.items())}
+        return {'started_at': self.started, 'written_at': time.time(),
+                'counters': counters, 'histograms': histograms}
+
+    def prometheus(self, job=None):
+        """Prometheus text exposition format"""
+        extra = (('job', job),) if job else ()
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(labels, extra)} {value:g}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                cumulative = 0
+                for bound, bucket in zip(histogram.bounds + (float('inf'),), histogram.buckets):
+                    cumulative += bucket
+                    le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                    lines.append(f"{name}_bucket{_format_labels(labels, extra + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels, extra)} {histogram.total:g}")
+                lines.append(f"{name}_count{_format_labels(labels, extra)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, job, directory=None):
+        """Atomically write <job>.prom and <job>.json; returns the two paths"""
+        directory = directory or METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for suffix, content in (('.prom', self.prometheus(job)),
+                                ('.json', json.dumps(self.snapshot(), indent=2))):
+            path = os.path.join(directory, job + suffix)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(path + '.tmp', path)
+            paths.append(path)
+        return paths
+
+    def report(self):
+        """Human-readable lines for the end-of-run printout"""
+        return summary_lines(self.snapshot())
+
+
+def summary_lines(snapshot):
+    lines = []
+    for name, value in snapshot['counters'].items():
+        lines.append(f"{name}: {value:g}")
+    for name, h in snapshot['histograms'].items():
+        if name.split('{')[0].endswith('_seconds'):
+            lines.append(f"{name}: {h['count']}x, p50 {h['p50'] * 1000:.0f} ms, "
+                         f"p95 {h['p95'] * 1000:.0f} ms, p99 {h['p99'] * 1000:.0f} ms")
+        else:
+            lines.append(f"{name}: {h['count']}x, p50 {h['p50']:.3g}, p95 {h['p95']:.3g}, "
+                         f"p99 {h['p99']:.3g}, mean {h['mean']:.3g}")
+    return lines
+
+
+class _Sampler:
+    """Wall-clock sampling profiler: counts the innermost frames of every thread"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                code = frame.f_code
+                self.stacks[f"{code.co_filename}:{frame.f_lineno} {code.co_name}"] += 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+
+@contextmanager
+def profiled(job, mode=None, directory=None, top=15):
+    """Profile the block when MCQ_PROFILE (or mode) asks for it; no-op otherwise"""
+    mode = PROFILE_MODE if mode is None else mode
+    if mode not in ('cprofile', 'sample'):
+        yield
+        return
+
+    directory = directory or METRICS_DIR
+    os.makedirs(directory, exist_ok=True)
+    if mode == 'cprofile':
+        import cProfile
+        import pstats
+        # Before 3.12 a cProfile.Profile only sees the thread that enabled it, and the
+        # scraper and uploader work on pool threads: every thread started inside the
+        # block gets its own. From 3.12 cProfile runs on sys.monitoring, which sees every
+        # thread and allows one active profiler, so a second enable() would raise
+        per_thread = sys.version_info < (3, 12)
+        profilers = [cProfile.Profile()]
+        lock = threading.Lock()
+
+        def profile_thread(frame, event, arg):
+            # First event in a new thread: replace this hook with a profiler for the thread
+            profiler = cProfile.Profile()
+            with lock:
+                profilers.append(profiler)
+            profiler.enable()
+
+        if per_thread:
+            threading.setprofile(profile_thread)
+        profilers[0].enable()
+        try:
+            yield
+        finally:
+            if per_thread:
+                threading.setprofile(None)
+            for profiler in profilers:
+                profiler.disable()
+            with lock:
+                stats = pstats.Stats(*profilers)
+            path = os.path.join(directory, f"{job}.prof")
+            stats.dump_stats(path)
+            threads = f"{len(profilers)} threads" if per_thread else "all threads"
+            print(f"\n🔬 cProfile stats for {threads} saved to {path} "
+                  f"(top {top} by cumulative time):")
+            stats.sort_stats('cumulative').print_stats(top)
+    else:
+        sampler = _Sampler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            path = os.path.join(directory, f"{job}.samples.txt")
+            total = sum(sampler.stacks.values()) or 1
+            with open(path, 'w', encoding='utf-8') as f:
+                for location, hits in sampler.stacks.most_common():
+                    f.write(f"{hits}\t{location}\n")
+            print(f"\n🔬 {total} samples saved to {path}, hottest lines:")
+            for location, hits in sampler.stacks.most_common(top):
+                print(f"   {hits / total:6.1%}  {location}")
+
+
+# Process-wide registry used by the scripts
+metrics = Metrics()
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    if path is None:
+        found = sorted(f for f in os.listdir(METRICS_DIR) if f.endswith('.json')) \
+            if os.path.isdir(METRICS_DIR) else []
+        if not found:
+            print(f"No metrics in {METRICS_DIR}/ yet")
+            sys.exit(0)
+        path = os.path.join(METRICS_DIR, found[-1])
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    print(f"📈 {path}")
+    for line in summary_lines(snapshot):
+        print(f"   {line}")
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Offline keyword / tag extraction for MCQ metadata (no network, no LLM)
+- Fits TF-IDF document frequencies over the whole bank in one pass
+  (unigrams + adjacent-word bigrams, stopwords dropped)
+- Saves the fitted vocabulary to temp/tagger_model.json, keyed by the bank's
+  size and mtime, so later runs load it instead of refitting
+- Per MCQ: top keywords, YouTube tags and a templated title + description
+  in microseconds; the correct answer gets no extra weight, so titles do not
+  give the answer away
+- Used by MetadataEngine as the primary source ("offline"), when Gemini has
+  nothing ("fallback"), or to shrink Gemini prompts ("prefilter")
+
+Usage:
+    python offline_tagger.py [--bank FILE] [--refit] [--show N]
+"""
+
+import os
+import re
+import json
+import math
+import time
+import argparse
+import threading
+from collections import Counter
+
+from mcq_dataset import MCQDataset, DEFAULT_BANK
+
+MODEL_FILE = 'temp/tagger_model.json'
+MODEL_VERSION = 1
+MIN_DF = 2              # rarer terms are not stored; they score as the rarest stored term
+MAX_DF_RATIO = 0.05     # terms in more than 5% of MCQs say nothing about the topic (idf 0)
+OPTION_WEIGHT = 0.5     # options count half as much as the question
+BIGRAM_BOOST = 1.5      # "wakhan corridor" makes a better tag than "wakhan" and "corridor"
+TAG_COUNT = 12
+TITLE_MAX = 60
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers him his how i if in into is it its itself just me more most my no nor not now
+of off on once only or other our out over own same she should so some such than that the their them
+then there these they this those through to too under until up very was we were what when where which
+while who whom why will with would you your
+following called known name named given correct answer none above below these those is was one two
+first famous which whose total many much located situated written term refers used approximate
+towards connects means stands
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+(?:['’][a-z]+)?")
+
+
+def tokenize(text):
+    """Lowercase words with stopwords, single letters and short numbers removed"""
+    words = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOPWORDS or len(word) < 2 or (word.isdigit() and len(word) != 4):
+            words.append(None)   # breaks bigrams across dropped words
+        else:
+            words.append(word)
+    return words
+
+
+def terms(text):
+    """Unigrams and bigrams of adjacent kept words"""
+    words = tokenize(text)
+    found = [word for word in words if word]
+    found.extend(f"{first} {second}" for first, second in zip(words, words[1:]) if first and second)
+    return found
+
+
+def weighted_terms(mcq):
+    """{term: weight} for an MCQ: question words count 1, option words OPTION_WEIGHT"""
+    weights = Counter(terms(mcq.get('question', '')))
+    for option in mcq.get('options', ()):
+        for term in terms(option):
+            weights[term] += OPTION_WEIGHT
+    return weights
+
+
+def bank_signature(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class OfflineTagger:
+    """TF-IDF keywords, tags and templated metadata from a fitted vocabulary"""
+
+    def __init__(self, idf=None, documents=0, signature=None):
+        self.idf = idf or {}
+        self.documents = documents
+        self.signature = signature
+        self.default_idf = math.log((1 + documents) / (1 + MIN_DF)) + 1 if documents else 1.0
+
+    @classmethod
+    def fit(cls, mcqs, signature=None):
+        """Document frequencies over every MCQ in one pass"""
+        df = Counter()
+        documents = 0
+        for mcq in mcqs:
+            df.update(weighted_terms(mcq).keys())
+            documents += 1
+        max_df = max(MIN_DF, int(documents * MAX_DF_RATIO))
+        idf = {term: round(math.log((1 + documents) / (1 + count)) + 1, 4) if count <= max_df else 0
+               for term, count in df.items() if count >= MIN_DF}
+        return cls(idf, documents, signature)
+
+    def save(self, path=MODEL_FILE):
+        """Write the fitted vocabulary (atomic)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MODEL_VERSION, 'signature': self.signature, 'documents': self.documents,
+                       'created_at': time.strftime('%Y-%m-%d %H:%M:%S'), 'idf': self.idf},
+                      f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=MODEL_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            model = json.load(f)
+        if model.get('version') != MODEL_VERSION:
+            raise ValueError(f"{path}: model version {model.get('version')}, expected {MODEL_VERSION}")
+        return cls(model['idf'], model['documents'], model.get('signature'))
+
+    @classmethod
+    def for_bank(cls, bank_path=DEFAULT_BANK, model_path=MODEL_FILE, refit=False):
+        """Saved model if it matches the bank, else fit on the bank and save it"""
+        signature = bank_signature(bank_path) if os.path.exists(bank_path) else None
+        if not refit and os.path.exists(model_path):
+            try:
+                tagger = cls.load(model_path)
+                if signature is None or tagger.signature == signature:
+                    return tagger
+            except (ValueError, KeyError, json.JSONDecodeError) as e:
+                print(f"⚠️ Refitting tagger ({e})")
+        if signature is None:
+            raise FileNotFoundError(f"No tagger model and no bank to fit one on: {bank_path}")
+        with MCQDataset(bank_path) as bank:
+            tagger = cls.fit(bank, signature)
+        tagger.save(model_path)
+        return tagger
+
+    def score(self, term, weight):
+        return weight * self.idf.get(term, self.default_idf) * (BIGRAM_BOOST if ' ' in term else 1.0)
+
+    def keywords(self, mcq, count=TAG_COUNT):
+        """Highest TF-IDF terms; a chosen bigram hides its words and overlapping bigrams"""
+        scored = sorted(((self.score(term, weight), term) for term, weight in weighted_terms(mcq).items()),
+                        key=lambda item: (-item[0], item[1]))
+        chosen = []
+        covered = set()   # words inside chosen bigrams
+        for score, term in scored:
+            if score <= 0 or len(chosen) == count:
+                break
+            parts = term.split(' ')
+            if any(part in covered for part in parts):
+                continue
+            if len(parts) > 1:
+                covered.update(parts)
+                chosen = [other for other in chosen if other not in parts]
+            chosen.append(term)
+        return chosen
+
+    def topic(self, mcq):
+        """Best keyword from the question alone (never from the options, so no spoilers)"""
+        question = weighted_terms({'question': mcq['question']})
+        scored = [(self.score(term, weight), term) for term, weight in question.items()]
+        best = max(scored, default=(0, 'general knowledge'), key=lambda item: (item[0], ' ' in item[1]))
+        return best[1] if best[0] > 0 else 'general knowledge'
+
+    def metadata(self, mcq, video_number=None):
+        """{title, description, tags} in the shape MetadataEngine returns (None without text)"""
+        if not mcq or not mcq.get('question'):
+            return None
+        keywords = self.keywords(mcq)
+        topic = ' '.join(word.capitalize() for word in self.topic(mcq).split())
+        suffix = f" #{video_number}" if video_number else ""
+        title = f"{topic} MCQ | PPSC FPSC Quiz{suffix}"
+        if len(title) > TITLE_MAX:
+            title = f"{topic[:TITLE_MAX - len(' MCQ | Quiz' + suffix)].rstrip()} MCQ | Quiz{suffix}"
+
+        hashtags = ' '.join('#' + term.replace(' ', '').replace("'", '').replace('’', '')
+                            for term in keywords[:4])
+        description = (f"🧠 {mcq['question']}\n"
+                       f"Can you answer before the timer runs out? PPSC / FPSC / CSS exam preparation 📚\n"
+                       f"#PPSC #FPSC #MCQs {hashtags}")
+        tags = [' '.join(word.capitalize() for word in term.split()) for term in keywords]
+        return {"title": title, "description": description, "tags": tags, "source": "offline"}
+
+
+class LazyTagger:
+    """OfflineTagger for a bank, loaded (or fitted) on first use; None-returning if it cannot be"""
+
+    def __init__(self, bank_path=DEFAULT_BANK, model_path=MODEL_FILE):
+        self.bank_path = bank_path
+        self.model_path = model_path
+        self._tagger = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._tagger is None and not self._failed:
+                try:
+                    self._tagger = OfflineTagger.for_bank(self.bank_path, self.model_path)
+                except (OSError, ValueError) as e:
+                    self._failed = True
+                    print(f"⚠️ Offline tagger unavailable: {e}")
+        return self._tagger
+
+    def keywords(self, mcq, count=TAG_COUNT):
+        tagger = self._load()
+        return tagger.keywords(mcq, count) if tagger else []
+
+    def metadata(self, mcq, video_number=None):
+        tagger = self._load()
+        return tagger.metadata(mcq, video_number) if tagger else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit the offline tagger and show sample metadata")
+    parser.add_argument('--bank', default=DEFAULT_BANK)
+    parser.add_argument('--model', default=MODEL_FILE)
+    parser.add_argument('--refit', action='store_true', help="ignore a saved model")
+    parser.add_argument('--show', type=int, default=5, help="MCQs to print metadata for")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tagger = OfflineTagger.for_bank(args.bank, args.model, refit=args.refit)
+    print(f"✓ {len(tagger.idf)} terms from {tagger.documents} MCQs in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms ({args.model})")
+
+    with MCQDataset(args.bank) as bank:
+        sample = [bank[i] for i in range(min(args.show, len(bank)))]
+        start = time.perf_counter()
+        for mcq in sample:
+            tagger.metadata(mcq)
+        if sample:
+            print(f"⏱️  {(time.perf_counter() - start) / len(sample) * 1e6:.0f} µs per MCQ")
+        for number, mcq in enumerate(sample, 1):
+            metadata = tagger.metadata(mcq, number)
+            print(f"\n{mcq['question']}\n   📝 {metadata['title']}\n   🏷️  {', '.join(metadata['tags'])}")
@@ -3,23 +3,108 @@ const { renderMedia, selectComposition } = require("@remotion/renderer");
 const path = require("path");
 const fs = require("fs");
 
-const start = async () => {
+// Read the MCQs at `indices` using the offset index built by mcq_dataset.py
+// (mcqs_data/gk/gk_mcqs.json.idx). Falls back to parsing the whole bank when the
+// index is missing or stale.
+const loadMcqs = (mcqsPath, indices) => {
+  const indexPath = `${mcqsPath}.idx`;
+  const stat = fs.statSync(mcqsPath, { bigint: true });
+  if (fs.existsSync(indexPath)) {
+    const fd = fs.openSync(indexPath, "r");
+    try {
+      const header = Buffer.alloc(32);
+      fs.readSync(fd, header, 0, 32, 0);
+      const fresh =
+        header.toString("latin1", 0, 8) === "MCQIDX1\0" &&
+        header.readBigInt64LE(8) === stat.mtimeNs &&
+        header.readBigInt64LE(16) === stat.size;
+      if (fresh) {
+        const total = Number(header.readBigUInt64LE(24));
+        const mcqs = new Map();
+        const span = Buffer.alloc(16);
+        const bankFd = fs.openSync(mcqsPath, "r");
+        try {
+          for (const i of indices) {
+            if (i < 0 || i >= total) continue;
+            fs.readSync(fd, span, 0, 16, 32 + i * 16);
+            const offset = Number(span.readBigUInt64LE(0));
+            const length = Number(span.readBigUInt64LE(8));
+            const buf = Buffer.alloc(length);
+            fs.readSync(bankFd, buf, 0, length, offset);
+            mcqs.set(i, JSON.parse(buf.toString("utf8")));
+          }
+        } finally {
+          fs.closeSync(bankFd);
+        }
+        return { total, mcqs };
+      }
+    } finally {
+      fs.closeSync(fd);
+    }
+  }
+
+  console.log("⚠ MCQ index missing or stale, loading the full bank");
+  const all = JSON.parse(fs.readFileSync(mcqsPath, "utf8"));
+  const mcqs = new Map();
+  for (const i of indices) {
+    if (i >= 0 && i < all.length) mcqs.set(i, all[i]);
+  }
+  return { total: all.length, mcqs };
+};
+
+// Indices to render: RENDER_MANIFEST=manifests/shard-03.json (from shard_planner.py),
+// RENDER_INDICES="3,4,9" (used by render_orchestrator.py)
+// or the inclusive START_INDEX..END_INDEX range
+const batchIndices = () => {
+  if (process.env.RENDER_MANIFEST) {
+    const manifest = JSON.parse(fs.readFileSync(process.env.RENDER_MANIFEST, "utf8"));
+    console.log(
+      `📋 Shard ${manifest.shard + 1}/${manifest.shards}: ${manifest.indices.length} videos, ` +
+        `~${Math.round(manifest.estimated_seconds / 60)} min estimated`,
+    );
+    return manifest.indices;
+  }
+  if (process.env.RENDER_INDICES) {
+    return process.env.RENDER_INDICES.split(",").map((i) => parseInt(i));
+  }
   const startIndex = parseInt(process.env.START_INDEX || "0");
   const endIndex = parseInt(process.env.END_INDEX || "99");
+  const indices = [];
+  for (let i = startIndex; i <= endIndex; i++) indices.push(i);
+  return indices;
+};
+
+// One JSON line per finished video, so an orchestrator can resume per index
+const reportProgress = (record) => {
+  if (process.env.RENDER_PROGRESS_FILE) {
+    fs.appendFileSync(process.env.RENDER_PROGRESS_FILE, JSON.stringify(record) + "\n");
+  }
+};
+
+const start = async () => {
+  const indices = batchIndices();
+  const concurrency = process.env.RENDER_CONCURRENCY
+    ? parseInt(process.env.RENDER_CONCURRENCY)
+    : null;
 
-  console.log(`\n🎬 Starting batch render: Videos ${startIndex} to ${endIndex}\n`);
+  console.log(`\n🎬 Starting batch render: ${indices.length} videos (${indices[0]} to ${indices[indices.length - 1]})\n`);
 
-  // Bundle the Remotion project
-  console.log("📦 Bundling Remotion project...");
-  const bundleLocation = await bundle({
-    entryPoint: path.resolve("./src/index.ts"),
-    webpackOverride: (config) => config,
-  });
-  console.log("✓ Bundle complete!\n");
+  // Bundle the Remotion project, unless a prebuilt bundle was passed in
+  let bundleLocation = process.env.BUNDLE_LOCATION;
+  if (bundleLocation) {
+    console.log(`📦 Using bundle at ${bundleLocation}\n`);
+  } else {
+    console.log("📦 Bundling Remotion project...");
+    bundleLocation = await bundle({
+      entryPoint: path.resolve("./src/index.ts"),
+      webpackOverride: (config) => config,
+    });
+    console.log("✓ Bundle complete!\n");
+  }
 
   // Load MCQ data
   const mcqsPath = path.join(process.cwd(), "mcqs_data", "gk", "gk_mcqs.json");
-  const mcqs = JSON.parse(fs.readFileSync(mcqsPath, "utf8"));
+  const { total, mcqs } = loadMcqs(mcqsPath, indices);
 
   // Ensure output directory exists
   const outputDir = path.join(process.cwd(), "output");
@@ -28,11 +113,14 @@ const start = async () => {
   }
 
   // Render each video in the batch
-  for (let i = startIndex; i <= endIndex && i < mcqs.length; i++) {
-    const mcq = mcqs[i];
+  let rendered = 0;
+  for (const i of indices) {
+    if (!mcqs.has(i)) continue;
+    const mcq = mcqs.get(i);
     const videoName = `Quiz${i + 1}`;
+    const started = Date.now();
     
-    console.log(`\n[${i + 1}/${mcqs.length}] Rendering ${videoName}...`);
+    console.log(`\n[${i + 1}/${total}] Rendering ${videoName}...`);
     console.log(`Question: ${mcq.question.substring(0, 60)}...`);
 
     try {
@@ -54,6 +142,7 @@ const start = async () => {
         inputProps: {
           quizData: mcq,
         },
+        ...(concurrency ? { concurrency } : {}),
       });
 
       console.log(`✓ Rendered to ${outputLocation}`);
@@ -63,14 +152,17 @@ const start = async () => {
       fs.writeFileSync(jsonLocation, JSON.stringify(mcq, null, 2));
       console.log(`✓ Created ${videoName}.json with MCQ data`);
 
+      rendered++;
+      reportProgress({ index: i, ok: true, seconds: (Date.now() - started) / 1000, at: Date.now() / 1000 });
     } catch (error) {
       console.error(`✗ Failed to render ${videoName}:`, error.message);
+      reportProgress({ index: i, ok: false, error: error.message, at: Date.now() / 1000 });
       // Continue with next video even if one fails
     }
   }
 
   console.log("\n✓ Batch rendering complete!");
-  console.log(`Rendered ${endIndex - startIndex + 1} videos from index ${startIndex} to ${endIndex}`);
+  console.log(`Rendered ${rendered} of ${indices.length} videos`);
 };
 
 start().catch((err) => {
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of rendered quiz videos
+- Key = hash of the MCQ content + composition version (src/Composition.tsx, src/Root.tsx)
+- render_cache/manifest.json maps key -> artifact, size and last use
+- Hits are copied into the positional output/QuizN.mp4 names, so inserting a
+  question never forces the back catalog to re-render (copies, not hard
+  links: a re-render writing QuizN.mp4 in place must not touch the cached
+  video, and eviction has to actually free the space)
+- The manifest is written once per batch (flush), not once per entry
+- Eviction by age and/or total size, least recently used first
+
+Usage:
+    python render_cache.py                                   # stats
+    python render_cache.py evict [--max-age-days D] [--max-gb G]
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import threading
+
+CACHE_DIR = 'render_cache'
+COMPOSITION_FILES = ['src/Composition.tsx', 'src/Root.tsx']
+
+
+def composition_version(paths=COMPOSITION_FILES):
+    """Short hash of the files that decide what a rendered video looks like"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def render_key(mcq, version):
+    content = json.dumps(mcq, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{version}\x1f{content}".encode('utf-8')).hexdigest()
+
+
+def _copy(source, dest):
+    """Copy source over dest atomically, keeping its mtime"""
+    tmp = dest + '.tmp'
+    shutil.copy2(source, tmp)
+    os.replace(tmp, dest)
+
+
+def _same_copy(source, dest):
+    """dest is a copy of source made by _copy (same size and mtime)"""
+    try:
+        a, b = os.stat(source), os.stat(dest)
+    except FileNotFoundError:
+        return False
+    return a.st_size == b.st_size and a.st_mtime_ns == b.st_mtime_ns
+
+
+class RenderCache:
+    def __init__(self, cache_dir=CACHE_DIR, version=None):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        self.version = version or composition_version()
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+
+    def _save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def key(self, mcq):
+        return render_key(mcq, self.version)
+
+    def lookup(self, key):
+        """Artifact path for a key, or None (entries whose file vanished are dropped)"""
+        with self.lock:
+            entry = self.manifest.get(key)
+            if entry is None:
+                return None
+            path = os.path.join(self.cache_dir, entry['path'])
+            if not os.path.exists(path):
+                del self.manifest[key]
+                self.dirty = True
+                return None
+            return path
+
+    def store(self, key, video_path, label=None):
+        """Add a freshly rendered video under its content key (saved on the next flush)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        name = f"{key}.mp4"
+        _copy(video_path, os.path.join(self.cache_dir, name))
+        now = time.time()
+        with self.lock:
+            self.manifest[key] = {
+                'path': name,
+                'size': os.path.getsize(video_path),
+                'version': self.version,
+                'label': label,
+                'created_at': now,
+                'last_used': now,
+            }
+            self.dirty = True
+
+    def materialize(self, key, dest):
+        """Place the cached video for key at dest; returns False on a miss"""
+        source = self.lookup(key)
+        if source is None:
+            return False
+        if not _same_copy(source, dest):
+            _copy(source, dest)
+        with self.lock:
+            self.manifest[key]['last_used'] = time.time()
+            self.dirty = True
+        return True
+
+    def flush(self):
+        """Write the manifest if anything changed since the last flush"""
+        with self.lock:
+            if self.dirty:
+                self._save()
+                self.dirty = False
+
+    def total_bytes(self):
+        with self.lock:
+            return sum(entry['size'] for entry in self.manifest.values())
+
+    def evict(self, max_age_days=None, max_bytes=None):
+        """Drop entries unused for max_age_days, then LRU entries until under max_bytes"""
+        removed = []
+        with self.lock:
+            entries = sorted(self.manifest.items(), key=lambda item: item[1]['last_used'])
+            cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+            total = sum(entry['size'] for _, entry in entries)
+            for key, entry in entries:
+                too_old = cutoff is not None and entry['last_used'] < cutoff
+                too_big = max_bytes is not None and total > max_bytes
+                if not (too_old or too_big):
+                    continue
+                path = os.path.join(self.cache_dir, entry['path'])
+                if os.path.exists(path):
+                    os.remove(path)
+                total -= entry['size']
+                del self.manifest[key]
+                removed.append(key)
+            self._save()
+            self.dirty = False
+        return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or evict the render cache")
+    parser.add_argument('command', nargs='?', default='stats', choices=['stats', 'evict'])
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--max-age-days', type=float, default=None)
+    parser.add_argument('--max-gb', type=float, default=None)
+    args = parser.parse_args()
+
+    cache = RenderCache(args.cache_dir)
+    if args.command == 'evict':
+        max_bytes = int(args.max_gb * 1e9) if args.max_gb is not None else None
+        removed = cache.evict(args.max_age_days, max_bytes)
+        print(f"🧹 Evicted {len(removed)} cached videos")
+    current = sum(1 for entry in cache.manifest.values() if entry['version'] == cache.version)
+    print(f"📦 {len(cache.manifest)} cached videos ({current} for composition {cache.version}), "
+          f"{cache.total_bytes() / 1e9:.2f} GB in {cache.cache_dir}")
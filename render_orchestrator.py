@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Local render orchestrator for the MCQ bank
+- Bundles the Remotion project once and reuses the bundle until src/ changes
+- Splits pending indices into small chunks fed to N worker processes
+  (render-batch.js with RENDER_INDICES + BUNDLE_LOCATION)
+- Tracks per-index completion in output/render_progress.jsonl, so a killed
+  run resumes exactly where it stopped
+- Skips videos whose MCQ + composition are already in the render cache
+  (render_cache.py) and copies them into place instead
+- Reports aggregate videos/minute
+
+Usage:
+    python render_orchestrator.py [--start 0] [--end N] [--workers N] [--chunk 25]
+                                  [--no-cache] [--cache-max-gb G] [--cache-max-age-days D]
+    python render_orchestrator.py --render-cmd "python stub_render.py" --skip-bundle
+"""
+
+import os
+import sys
+import json
+import time
+import shlex
+import queue
+import hashlib
+import argparse
+import threading
+import subprocess
+
+from mcq_dataset import MCQDataset, DEFAULT_BANK
+from render_cache import RenderCache
+
+OUTPUT_DIR = 'output'
+PROGRESS_FILE = os.path.join(OUTPUT_DIR, 'render_progress.jsonl')
+BUNDLE_DIR = 'build/bundle'
+BUNDLE_SOURCES = ['src', 'remotion.config.ts', 'package-lock.json']
+RENDER_COMMAND = ['node', 'render-batch.js']
+BUNDLE_COMMAND = ['npx', 'remotion', 'bundle', 'src/index.ts', '--out-dir', BUNDLE_DIR]
+CHUNK_SIZE = 25
+CORES_PER_WORKER = 4  # Remotion already renders frames in parallel inside one process
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) // CORES_PER_WORKER)
+
+
+def source_hash(paths=BUNDLE_SOURCES):
+    """Hash of every file the bundle is built from"""
+    digest = hashlib.sha256()
+    for root in paths:
+        files = [root] if os.path.isfile(root) else sorted(
+            os.path.join(d, f) for d, _, names in os.walk(root) for f in names
+        )
+        for path in files:
+            digest.update(path.encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def ensure_bundle(bundle_dir=BUNDLE_DIR, command=BUNDLE_COMMAND):
+    """Build the Remotion bundle unless an up-to-date one already exists"""
+    marker = os.path.join(bundle_dir, '.source-hash')
+    current = source_hash()
+    if os.path.exists(marker):
+        with open(marker, 'r') as f:
+            if f.read().strip() == current:
+                print(f"📦 Reusing bundle at {bundle_dir}")
+                return os.path.abspath(bundle_dir)
+
+    print("📦 Bundling Remotion project...")
+    subprocess.run(command, check=True)
+    os.makedirs(bundle_dir, exist_ok=True)
+    with open(marker, 'w') as f:
+        f.write(current)
+    print("✓ Bundle complete!")
+    return os.path.abspath(bundle_dir)
+
+
+def load_progress(path=PROGRESS_FILE):
+    """Latest progress record per index (a torn last line is ignored)"""
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            records[record['index']] = record
+    return records
+
+
+def completed_indices(progress_path=PROGRESS_FILE, output_dir=OUTPUT_DIR):
+    """Indices whose render succeeded and whose video is still on disk"""
+    return {index for index, record in load_progress(progress_path).items()
+            if record.get('ok') and os.path.exists(os.path.join(output_dir, f'Quiz{index + 1}.mp4'))}
+
+
+class RenderOrchestrator:
+    def __init__(self, indices, workers=None, chunk_size=CHUNK_SIZE, render_command=RENDER_COMMAND,
+                 bundle_location=None, progress_file=PROGRESS_FILE, output_dir=OUTPUT_DIR,
+                 cache=None, mcqs=None):
+        self.indices = list(indices)
+        self.cache = cache
+        self.mcqs = mcqs or {}
+        self.keys = {i: cache.key(self.mcqs[i]) for i in self.indices} if cache else {}
+        self.workers = workers or default_workers()
+        self.chunk_size = chunk_size
+        self.render_command = render_command
+        self.bundle_location = bundle_location
+        self.progress_file = progress_file
+        self.output_dir = output_dir
+        self.lock = threading.Lock()
+        self.processes = set()
+        self.stopping = False
+        self.started_at = time.time()
+
+    def _env(self, chunk):
+        env = dict(os.environ)
+        env['RENDER_INDICES'] = ','.join(str(i) for i in chunk)
+        env['RENDER_PROGRESS_FILE'] = os.path.abspath(self.progress_file)
+        env['RENDER_CONCURRENCY'] = str(max(1, (os.cpu_count() or 1) // self.workers))
+        if self.bundle_location:
+            env['BUNDLE_LOCATION'] = self.bundle_location
+        return env
+
+    def _worker(self, chunks, report):
+        while not self.stopping:
+            try:
+                chunk = chunks.get_nowait()
+            except queue.Empty:
+                return
+            process = subprocess.Popen(self.render_command, env=self._env(chunk))
+            with self.lock:
+                self.processes.add(process)
+            process.wait()
+            with self.lock:
+                self.processes.discard(process)
+            if self.cache:
+                self._cache_rendered(chunk)
+            report()
+
+    def _video_path(self, index):
+        return os.path.join(self.output_dir, f'Quiz{index + 1}.mp4')
+
+    def _rendered_this_run(self, progress):
+        """Indices with a successful progress record written since run() started"""
+        return {index for index, record in progress.items()
+                if record.get('ok') and record.get('at', 0) >= self.started_at
+                and os.path.exists(self._video_path(index))}
+
+    def _cache_rendered(self, chunk):
+        """Store the chunk's successful renders under their content keys"""
+        rendered = self._rendered_this_run(load_progress(self.progress_file))
+        for index in chunk:
+            if index in rendered:
+                self.cache.store(self.keys[index], self._video_path(index), label=f'Quiz{index + 1}')
+        self.cache.flush()
+
+    def _sidecar_matches(self, index):
+        """True if output/QuizN.json says the existing video was rendered from this MCQ"""
+        sidecar = os.path.join(self.output_dir, f'Quiz{index + 1}.json')
+        if not os.path.exists(sidecar) or not os.path.exists(self._video_path(index)):
+            return False
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            return json.load(f) == self.mcqs[index]
+
+    def _apply_cache(self):
+        """Link cache hits into place; returns the set of indices served from cache"""
+        hits = set()
+        for index in self.indices:
+            key = self.keys[index]
+            if not self.cache.materialize(key, self._video_path(index)):
+                # Adopt videos rendered before the cache existed, if their sidecar matches
+                if not self._sidecar_matches(index):
+                    continue
+                self.cache.store(key, self._video_path(index), label=f'Quiz{index + 1}')
+            with open(os.path.join(self.output_dir, f'Quiz{index + 1}.json'), 'w', encoding='utf-8') as f:
+                json.dump(self.mcqs[index], f, ensure_ascii=False, indent=2)
+            hits.add(index)
+        self.cache.flush()
+        return hits
+
+    def run(self):
+        """Render every pending index; returns (rendered this run, still pending)"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.started_at = time.time()
+        wanted = set(self.indices)
+        if self.cache:
+            # The cache is authoritative: positional files may be stale after the bank changed
+            done_before = self._apply_cache()
+            print(f"♻️  {len(done_before)} videos served from the render cache")
+        else:
+            done_before = completed_indices(self.progress_file, self.output_dir) & wanted
+        pending = [i for i in self.indices if i not in done_before]
+        if self.cache:
+            # Older caches hard-linked outputs; a render writing in place would corrupt the cached copy
+            for index in pending:
+                path = self._video_path(index)
+                if os.path.exists(path) and os.stat(path).st_nlink > 1:
+                    os.remove(path)
+
+        print("=" * 60)
+        print(f"🎬 {len(wanted)} videos requested, {len(done_before)} already rendered, "
+              f"{len(pending)} to go on {self.workers} workers")
+        print("=" * 60)
+
+        chunks = queue.Queue()
+        for i in range(0, len(pending), self.chunk_size):
+            chunks.put(pending[i:i + self.chunk_size])
+
+        started = time.monotonic()
+
+        def finished():
+            # With the cache, older progress records may describe a different MCQ at that index
+            if self.cache:
+                return done_before | (self._rendered_this_run(load_progress(self.progress_file)) & wanted)
+            return completed_indices(self.progress_file, self.output_dir) & wanted
+
+        def report():
+            done = finished()
+            rendered = len(done - done_before)
+            minutes = (time.monotonic() - started) / 60
+            rate = rendered / minutes if minutes > 0 else 0.0
+            print(f"\n📊 {len(done)}/{len(wanted)} rendered, {rate:.1f} videos/min\n")
+
+        threads = [threading.Thread(target=self._worker, args=(chunks, report), daemon=True)
+                   for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            print("\n>>> Stopping workers (finished videos are kept) <<<")
+            self.stopping = True
+            with self.lock:
+                for process in self.processes:
+                    process.terminate()
+            raise
+
+        done = finished()
+        rendered = len(done - done_before)
+        minutes = (time.monotonic() - started) / 60
+        print("=" * 60)
+        print(f"✓ Rendered {rendered} videos in {minutes:.1f} min "
+              f"({rendered / minutes if minutes > 0 else 0:.1f} videos/min)")
+        if len(done) < len(wanted):
+            print(f"⚠️ {len(wanted) - len(done)} videos failed, run again to retry")
+        print("=" * 60)
+        return rendered, sorted(wanted - done)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the MCQ bank on local worker processes")
+    parser.add_argument('--bank', default=DEFAULT_BANK)
+    parser.add_argument('--start', type=int, default=0, help="first index (0-based)")
+    parser.add_argument('--end', type=int, default=None, help="last index, inclusive (default: end of bank)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: cores / 4)")
+    parser.add_argument('--chunk', type=int, default=CHUNK_SIZE, help="videos per worker invocation")
+    parser.add_argument('--render-cmd', default=None, help="render command (default: node render-batch.js)")
+    parser.add_argument('--skip-bundle', action='store_true', help="let each worker bundle for itself")
+    parser.add_argument('--no-cache', action='store_true', help="ignore the content-addressed render cache")
+    parser.add_argument('--cache-max-gb', type=float, default=None, help="evict the cache down to this size")
+    parser.add_argument('--cache-max-age-days', type=float, default=None, help="evict entries unused this long")
+    args = parser.parse_args(argv)
+
+    with MCQDataset(args.bank) as bank:
+        total = len(bank)
+        end = total - 1 if args.end is None else min(args.end, total - 1)
+        indices = range(args.start, end + 1)
+        mcqs = None if args.no_cache else {i: bank[i] for i in indices}
+    cache = None if args.no_cache else RenderCache()
+
+    render_command = shlex.split(args.render_cmd) if args.render_cmd else RENDER_COMMAND
+    bundle_location = None if args.skip_bundle else ensure_bundle()
+
+    orchestrator = RenderOrchestrator(indices, workers=args.workers,
+                                      chunk_size=args.chunk, render_command=render_command,
+                                      bundle_location=bundle_location, cache=cache, mcqs=mcqs)
+    try:
+        _, failed = orchestrator.run()
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if cache and (args.cache_max_gb is not None or args.cache_max_age_days is not None):
+            max_bytes = int(args.cache_max_gb * 1e9) if args.cache_max_gb is not None else None
+            removed = cache.evict(args.cache_max_age_days, max_bytes)
+            print(f"🧹 Evicted {len(removed)} cached videos")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
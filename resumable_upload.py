@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Chunked, restartable YouTube uploads (resumable upload protocol)
+- Sends the file in fixed-size chunks (multiples of 256 KiB)
+- Persists each file's session URI and server-confirmed offset to a state file,
+  so a crash or network drop resumes from the acknowledged byte, not from zero
+- Reports per-file throughput
+
+Works with any requests.Session-like object; pass an AuthorizedSession for
+YouTube, or a plain Session pointed at a local fake server for testing.
+"""
+
+import os
+import json
+import time
+import tempfile
+import threading
+from metrics import metrics
+
+UPLOAD_URL = "https://www.googleapis.com/upload/youtube/v3/videos"
+STATE_FILE = "temp/upload_sessions.json"
+CHUNK_SIZE = 8 * 1024 * 1024
+CHUNK_ALIGN = 256 * 1024
+MAX_CHUNK_RETRIES = 5
+
+
+class UploadSessionStore:
+    """JSON file of {video_path: {uri, size, mtime_ns, offset}}, rewritten atomically"""
+
+    # One lock per file, shared by every store on it (each uploader builds its own store)
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        with self._locks_guard:
+            self.lock = self._locks.setdefault(os.path.abspath(path), threading.Lock())
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+    def _write(self, sessions):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(sessions, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def get(self, video_path):
+        with self.lock:
+            return self._read().get(video_path)
+
+    def sessions(self):
+        """All saved sessions, {video_path: session}"""
+        with self.lock:
+            return self._read()
+
+    def save(self, video_path, session):
+        with self.lock:
+            sessions = self._read()
+            sessions[video_path] = session
+            self._write(sessions)
+
+    def remove(self, video_path):
+        with self.lock:
+            sessions = self._read()
+            if sessions.pop(video_path, None) is not None:
+                self._write(sessions)
+
+
+class UploadError(Exception):
+    def __init__(self, status, content):
+        super().__init__(f"HTTP {status}: {content[:200]}")
+        self.status_code = status
+        self.content = content
+
+
+def _confirmed_offset(response):
+    """Next byte to send according to a 308 response's Range header"""
+    value = response.headers.get('Range', '')
+    if not value.startswith('bytes='):
+        return 0
+    return int(value.split('-')[-1]) + 1
+
+
+class ResumableUploader:
+    """Uploads one file at a time over a requests-style session"""
+
+    def __init__(self, session, store=None, chunk_size=CHUNK_SIZE, upload_url=UPLOAD_URL,
+                 max_retries=MAX_CHUNK_RETRIES):
+        if chunk_size % CHUNK_ALIGN:
+            raise ValueError(f"chunk_size must be a multiple of {CHUNK_ALIGN} bytes")
+        self.session = session
+        self.store = store or UploadSessionStore()
+        self.chunk_size = chunk_size
+        self.upload_url = upload_url
+        self.max_retries = max_retries
+
+    def _start_session(self, body, part, size, mimetype):
+        response = self.session.post(
+            self.upload_url,
+            params={'uploadType': 'resumable', 'part': part},
+            json=body,
+            headers={'X-Upload-Content-Length': str(size), 'X-Upload-Content-Type': mimetype},
+        )
+        if response.status_code != 200 or 'Location' not in response.headers:
+            raise UploadError(response.status_code, response.text)
+        return response.headers['Location']
+
+    def _query_offset(self, uri, size):
+        """Ask the server how many bytes it has; returns (offset, finished_response)"""
+        response = self.session.put(uri, headers={'Content-Range': f'bytes */{size}'}, data=b'')
+        if response.status_code in (200, 201):
+            return size, response
+        if response.status_code == 308:
+            return _confirmed_offset(response), None
+        if response.status_code in (404, 410):
+            return None, None
+        raise UploadError(response.status_code, response.text)
+
+    def upload(self, video_path, body, part='snippet,status', mimetype='video/mp4', progress=None):
+        """Upload video_path, resuming a saved session when possible; returns the API response"""
+        stat = os.stat(video_path)
+        size = stat.st_size
+        offset = 0
+        saved = self.store.get(video_path)
+        uri = None
+
+        if saved and saved['size'] == size and saved['mtime_ns'] == stat.st_mtime_ns:
+            offset, finished = self._query_offset(saved['uri'], size)
+            if finished is not None:
+                self.store.remove(video_path)
+                return finished.json()
+            if offset is not None:
+                uri = saved['uri']
+                print(f"   ↪️  Resuming {os.path.basename(video_path)} at {offset / size:.0%}")
+            else:
+                offset = 0  # session expired, start over
+
+        if uri is None:
+            uri = self._start_session(body, part, size, mimetype)
+        session_state = {'uri': uri, 'size': size, 'mtime_ns': stat.st_mtime_ns, 'offset': offset}
+        self.store.save(video_path, session_state)
+
+        start_offset = offset
+        started = time.monotonic()
+        retries = 0
+        with open(video_path, 'rb') as f:
+            while True:
+                f.seek(offset)
+                chunk = f.read(self.chunk_size)
+                end = offset + len(chunk) - 1
+                try:
+                    response = self.session.put(
+                        uri, data=chunk,
+                        headers={'Content-Range': f'bytes {offset}-{end}/{size}' if chunk else f'bytes */{size}'},
+                    )
+                except Exception:
+                    # Network drop: ask the server where it got to and carry on from there
+                    retries += 1
+                    if retries > self.max_retries:
+                        raise
+                    metrics.count('upload_chunk_retries_total', reason='connection')
+                    time.sleep(min(2 ** retries, 60))
+                    confirmed, finished = self._query_offset(uri, size)
+                    if finished is not None:
+                        response = finished
+                    else:
+                        offset = confirmed or 0
+                        continue
+
+                if response.status_code in (200, 201):
+                    break
+                if response.status_code == 308:
+                    retries = 0
+                    offset = _confirmed_offset(response)
+                    session_state['offset'] = offset
+                    self.store.save(video_path, session_state)
+                    if progress:
+                        progress(offset / size)
+                    continue
+                if response.status_code >= 500 and retries < self.max_retries:
+                    retries += 1
+                    metrics.count('upload_chunk_retries_total', reason=str(response.status_code))
+                    time.sleep(min(2 ** retries, 60))
+                    confirmed, finished = self._query_offset(uri, size)
+                    if finished is not None:
+                        response = finished
+                        break
+                    offset = confirmed or 0
+                    continue
+                raise UploadError(response.status_code, response.text)
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        sent = size - start_offset
+        metrics.count('upload_bytes_total', sent)
+        metrics.observe('upload_bytes_per_second', sent / elapsed)
+        print(f"   📶 {os.path.basename(video_path)}: {sent / 1e6:.1f} MB in {elapsed:.1f}s "
+              f"({sent / elapsed / 1e6:.2f} MB/s)")
+        self.store.remove(video_path)
+        return response.json()
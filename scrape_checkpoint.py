@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Append-only JSONL checkpoint log for the scraper
+- One fsync'd record per scraped page: {"page": N, "mcqs": [...]}
+- Survives crashes (a torn last line is dropped on reopen)
+- With a known set (scrape_incremental.CrawlState), MCQs already in the bank
+  or on an earlier page are dropped as each page is appended, one indexed
+  lookup per MCQ; the known set learns the logged MCQs only once compact has
+  put them in the bank
+- Compacts into the final gk_mcqs.json only at the end of a run
+"""
+
+import os
+import json
+import threading
+
+from mcq_dedup import exact_key
+
+
+class CheckpointLog:
+    def __init__(self, path, known=None):
+        self.path = path
+        self.known = known
+        self.dropped = 0
+        self.logged = set()   # exact keys of logged MCQs, with a known set
+        self.lock = threading.Lock()
+        self.base_count = None
+        self.page_range = None
+        self.pages = {}
+        self._load()
+
+    def _load(self):
+        """Read existing records, truncating a partially written last line"""
+        if not os.path.exists(self.path):
+            return
+
+        good_bytes = 0
+        with open(self.path, 'rb') as f:
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    break
+                good_bytes += len(raw)
+                if 'base_count' in record:
+                    self.base_count = record['base_count']
+                    self.page_range = (record['start_page'], record['end_page'])
+                else:
+                    self.pages[record['page']] = record['mcqs']
+
+        if self.known is not None:
+            self.logged = {exact_key(mcq) for mcq in self.mcqs()}
+
+        if good_bytes < os.path.getsize(self.path):
+            print(f"⚠️ Dropping torn record at end of {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_bytes)
+
+    def _write(self, record):
+        """Append one JSON line and fsync it before returning (caller holds the lock)"""
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @property
+    def started(self):
+        return self.base_count is not None
+
+    def start(self, base_count, start_page, end_page):
+        """Begin a new log for a page range, remembering how many MCQs the output file held"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self.lock:
+            self._write({'base_count': base_count, 'start_page': start_page, 'end_page': end_page})
+        self.base_count = base_count
+        self.page_range = (start_page, end_page)
+
+    def append(self, page_num, mcqs):
+        """Record a completed page, minus known MCQs (safe to call from worker threads)"""
+        with self.lock:
+            if self.known is not None:
+                fresh = [mcq for mcq in self.known.unknown(mcqs) if exact_key(mcq) not in self.logged]
+                self.dropped += len(mcqs) - len(fresh)
+                mcqs = fresh
+            self._write({'page': page_num, 'mcqs': mcqs})
+            self.pages[page_num] = mcqs
+            if self.known is not None:
+                self.logged.update(exact_key(mcq) for mcq in mcqs)
+
+    def completed_pages(self):
+        return set(self.pages)
+
+    def last_page(self):
+        return max(self.pages) if self.pages else None
+
+    def pending_pages(self):
+        """Pages of the logged range that have not completed yet, in order"""
+        start_page, end_page = self.page_range
+        return [p for p in range(start_page, end_page + 1) if p not in self.pages]
+
+    def mcqs(self):
+        """All logged MCQs in page order"""
+        result = []
+        for page_num in sorted(self.pages):
+            result.extend(self.pages[page_num])
+        return result
+
+    def compact(self, output_file, dedup=None):
+        """Rewrite output_file as base MCQs + logged pages, atomically
+        
+        With a mcq_dedup.DedupIndex, logged MCQs that exactly duplicate an
+        earlier one are dropped (near duplicates are only counted). Logs
+        written with a known set hold no exact duplicates to begin with.
+        """
+        base = []
+        if self.base_count and os.path.exists(output_file):
+            with open(output_file, 'r', encoding='utf-8') as f:
+                base = json.load(f)[:self.base_count]
+
+        all_mcqs = list(base)
+        if dedup is None:
+            all_mcqs.extend(self.mcqs())
+        else:
+            for mcq in base:
+                dedup.add(mcq)
+            counts = {'exact': 0, 'near': 0, 'new': 0}
+            for mcq in self.mcqs():
+                kind, _ = dedup.add(mcq)
+                counts[kind] += 1
+                if kind != 'exact':
+                    all_mcqs.append(mcq)
+            print(f"🧹 Dropped {counts['exact']} duplicate MCQs ({counts['near']} near duplicates kept)")
+
+        tmp_file = output_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(all_mcqs, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, output_file)
+        # Only now are they in the bank: a run that dies before this must not mark them known
+        if self.known is not None:
+            self.known.remember(self.mcqs())
+        return all_mcqs
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Incremental recrawl: fetch only what is new since the last crawl
+- Walks pages from 1 forward (new MCQs appear on page 1 and push older ones down)
+- Sends If-None-Match / If-Modified-Since with the validators saved last time;
+  a 304 means nothing changed from that page on
+- Stops at the first page whose MCQs are all already known (hash set persisted
+  in SQLite, seeded from the bank and re-synced whenever the bank file changes)
+- Appends new MCQs to the bank oldest-first, so existing QuizN numbers keep
+  pointing at the same questions
+- Validators are saved only after the bank is written, so an interrupted run
+  never hides new questions behind a 304
+
+Usage:
+    python scrape_incremental.py [--base-url URL] [--max-pages N] [--output FILE] [--state FILE]
+    python scraper.py --incremental
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+from bs4 import BeautifulSoup
+
+from scraper import (BASE_URL, OUTPUT_FILE, REQUESTS_PER_SECOND, HTML_PARSER,
+                     TokenBucket, make_session, page_url, fetch_page, extract_mcqs_from_page)
+from mcq_dedup import exact_key
+from metrics import metrics
+
+STATE_FILE = 'mcqs_data/gk/crawl_state.sqlite'
+MAX_PAGES = 590
+
+
+class CrawlState:
+    """Per-URL validators and the hash set of every MCQ already in the bank"""
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # The full scraper calls unknown from its fetch threads, under CheckpointLog's lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS validators ("
+                " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS known (hash TEXT PRIMARY KEY)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def conditional_headers(self, url):
+        row = self.conn.execute("SELECT etag, last_modified FROM validators WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers['If-None-Match'] = row[0]
+        if row and row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def is_known(self, mcq):
+        return self.conn.execute("SELECT 1 FROM known WHERE hash = ?", (exact_key(mcq),)).fetchone() is not None
+
+    def unknown(self, mcqs):
+        """MCQs neither in the known set nor repeated earlier in mcqs"""
+        seen = set()
+        fresh = []
+        for mcq in mcqs:
+            key = exact_key(mcq)
+            if key in seen or self.conn.execute("SELECT 1 FROM known WHERE hash = ?", (key,)).fetchone():
+                continue
+            seen.add(key)
+            fresh.append(mcq)
+        return fresh
+
+    def remember(self, mcqs):
+        """Add MCQs to the known set"""
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO known (hash) VALUES (?)",
+                                  ((exact_key(mcq),) for mcq in mcqs))
+
+    def sync_bank(self, bank_path):
+        """Add every MCQ in the bank to the known set if the file changed since last time"""
+        if not os.path.exists(bank_path):
+            return 0
+        stat = os.stat(bank_path)
+        signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'bank'").fetchone()
+        if row and row[0] == signature:
+            return 0
+        with open(bank_path, 'r', encoding='utf-8') as f:
+            mcqs = json.load(f)
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO known (hash) VALUES (?)",
+                                  ((exact_key(mcq),) for mcq in mcqs))
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('bank', ?)", (signature,))
+        return len(mcqs)
+
+    def commit(self, validators, mcqs, bank_path):
+        """Record validators and new MCQ hashes after the bank has been written"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO validators (url, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?)",
+                [(url, etag, last_modified, now) for url, (etag, last_modified) in validators.items()]
+            )
+            self.conn.executemany("INSERT OR IGNORE INTO known (hash) VALUES (?)",
+                                  ((exact_key(mcq),) for mcq in mcqs))
+            if os.path.exists(bank_path):
+                stat = os.stat(bank_path)
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('bank', ?)",
+                                  (f"{stat.st_size}:{stat.st_mtime_ns}",))
+
+    def close(self):
+        self.conn.close()
+
+
+def append_to_bank(bank_path, mcqs):
+    """Atomically rewrite the bank with mcqs added at the end"""
+    existing = []
+    if os.path.exists(bank_path):
+        with open(bank_path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+    tmp_path = bank_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(existing + list(mcqs), f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, bank_path)
+    return len(existing) + len(mcqs)
+
+
+def recrawl(state, base_url=BASE_URL, max_pages=MAX_PAGES, session=None, rate=REQUESTS_PER_SECOND):
+    """Fetch pages from 1 until nothing new turns up; returns (new MCQs newest first, validators, requests)"""
+    session = session or make_session(pool_size=1)
+    limiter = TokenBucket(rate)
+    new_mcqs = []
+    seen = set()
+    validators = {}
+    requests_made = 0
+
+    for page_num in range(1, max_pages + 1):
+        url = page_url(page_num, base_url)
+        response = fetch_page(session, url, limiter, headers=state.conditional_headers(url))
+        requests_made += 1
+        metrics.count('recrawl_pages_total', status=str(response.status_code))
+
+        if response.status_code == 304:
+            print(f"Page {page_num:3d}... = not modified, stopping")
+            break
+        if response.status_code == 404:
+            print(f"Page {page_num:3d}... end of listing")
+            break
+        if response.status_code != 200:
+            raise RuntimeError(f"page {page_num}: HTTP {response.status_code}")
+
+        mcqs = extract_mcqs_from_page(BeautifulSoup(response.content, HTML_PARSER))
+        fresh = []
+        for mcq in mcqs:
+            key = exact_key(mcq)
+            if key not in seen and not state.is_known(mcq):
+                seen.add(key)
+                fresh.append(mcq)
+        validators[url] = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        new_mcqs.extend(fresh)
+        print(f"Page {page_num:3d}... ✓ {len(fresh):2d} new of {len(mcqs):2d} MCQs")
+        if not fresh:
+            break
+
+    return new_mcqs, validators, requests_made
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch only the MCQs added since the last crawl")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--max-pages', type=int, default=MAX_PAGES)
+    parser.add_argument('--output', default=OUTPUT_FILE, help="MCQ bank to extend")
+    parser.add_argument('--state', default=STATE_FILE, help="validators + known-MCQ hashes")
+    args = parser.parse_args(argv)
+
+    state = CrawlState(args.state)
+    try:
+        seeded = state.sync_bank(args.output)
+        if seeded:
+            print(f"Synced {seeded} MCQs from {args.output} into the known set")
+        new_mcqs, validators, requests_made = recrawl(state, args.base_url, args.max_pages)
+
+        # Crawl order is the site's, newest first; the batch goes on the end oldest first.
+        # The bank is not sorted by date (nor is the known set, a plain hash lookup):
+        # appending only keeps existing QuizN numbers on the same questions
+        new_mcqs.reverse()
+        if new_mcqs:
+            total = append_to_bank(args.output, new_mcqs)
+            print(f"✓ Added {len(new_mcqs)} new MCQs to {args.output} ({total} total)")
+        else:
+            print("✓ No new MCQs")
+        state.commit(validators, new_mcqs, args.output)
+        print(f"✓ {requests_made} requests")
+        return new_mcqs
+    finally:
+        state.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,71 @@
 import requests
-from bs4 import BeautifulSoup
-import json
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from concurrent.futures import ThreadPoolExecutor
+import os
 import time
-import re
+import sys
+import threading
+from scrape_checkpoint import CheckpointLog
+from mcq_dataset import MCQDataset
+from mcq_dedup import DedupIndex
+from metrics import metrics, profiled
 
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+BASE_URL = "https://pakmcqs.com/category/general_knowledge_mcqs"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Concurrent fetch settings
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 4.0
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+OUTPUT_FILE = 'mcqs_data/gk/gk_mcqs.json'
+CHECKPOINT_FILE = 'mcqs_data/gk/gk_mcqs.checkpoint.jsonl'
+
+def parse_options(paragraph):
+    """Walk an options <p> once, returning its A-D options and the <strong> (correct) index"""
+    # Each <br> starts a new line; a line is correct if a <strong> opens inside it
+    lines = [[[], False]]
+    for node in paragraph.descendants:
+        if isinstance(node, Tag):
+            if node.name == 'br':
+                lines.append([[], False])
+            elif node.name == 'strong':
+                lines[-1][1] = True
+        elif type(node) in (NavigableString, CData):
+            text = node.strip()
+            if text:
+                lines[-1][0].append(text)
+    
+    options = []
+    correct_index = -1
+    for parts, is_strong in lines:
+        clean_line = ''.join(parts)
+        
+        # Options look like "A. text" (A-D, a dot, then text on one line)
+        if len(clean_line) < 3 or clean_line[0] not in 'ABCD' or clean_line[1] != '.':
+            continue
+        option_text = clean_line[2:].lstrip()
+        if not option_text or '\n' in option_text:
+            continue
+        
+        options.append(option_text)
+        if is_strong:
+            correct_index = len(options) - 1
+    
+    return options, correct_index
+
+@metrics.timed('scrape_extract_seconds')
 def extract_mcqs_from_page(soup):
     """Extract MCQs from BeautifulSoup object"""
     mcqs = []
@@ -24,29 +86,11 @@ def extract_mcqs_from_page(soup):
             if not excerpt:
                 continue
             
-            # Get all text and split by <br>
             options_text = excerpt.find('p')
             if not options_text:
                 continue
             
-            # Parse options
-            options = []
-            correct_index = -1
-            option_lines = str(options_text).split('<br/>')
-            
-            for idx, line in enumerate(option_lines):
-                # Clean HTML tags
-                clean_line = BeautifulSoup(line, 'html.parser').get_text(strip=True)
-                
-                # Check if it's an option (starts with A., B., C., or D.)
-                match = re.match(r'^([A-D])\.\s*(.+)$', clean_line)
-                if match:
-                    letter, option_text = match.groups()
-                    options.append(option_text)
-                    
-                    # Check if this option was in <strong> tag (correct answer)
-                    if '<strong>' in line and letter in line:
-                        correct_index = len(options) - 1
+            options, correct_index = parse_options(options_text)
             
             # Only add if we have exactly 4 options and found correct answer
             if len(options) == 4 and correct_index >= 0:
@@ -61,79 +105,192 @@ def extract_mcqs_from_page(soup):
     
     return mcqs
 
-def scrape_page(page_num):
-    """Scrape a single page"""
+class TokenBucket:
+    """Thread-safe token bucket limiting requests per second to one host"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def make_session(pool_size=MAX_WORKERS):
+    """Create a keep-alive session with a connection pool sized for the workers"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def page_url(page_num, base_url=BASE_URL):
+    """Build the listing URL for a page number"""
     if page_num == 1:
-        url = "https://pakmcqs.com/category/general_knowledge_mcqs"
-    else:
-        url = f"https://pakmcqs.com/category/general_knowledge_mcqs/page/{page_num}"
+        return base_url
+    return f"{base_url}/page/{page_num}"
+
+def fetch_page(session, url, limiter=None, retries=MAX_RETRIES, backoff=BACKOFF_BASE, headers=None):
+    """GET a URL, retrying 429/5xx and connection errors with exponential backoff"""
+    for attempt in range(retries + 1):
+        if limiter:
+            limiter.acquire()
+        try:
+            response = session.get(url, timeout=15, headers=headers)
+        except requests.RequestException:
+            if attempt == retries:
+                raise
+            metrics.count('scrape_retries_total', reason='connection')
+            time.sleep(backoff * (2 ** attempt))
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        metrics.count('scrape_retries_total', reason=str(response.status_code))
+
+        # Honour Retry-After when the server sends one
+        retry_after = response.headers.get('Retry-After', '')
+        delay = float(retry_after) if retry_after.isdigit() else backoff * (2 ** attempt)
+        time.sleep(delay)
+    return response
+
+def scrape_page(page_num, session=None, limiter=None, base_url=BASE_URL):
+    """Scrape a single page (None if it could not be fetched)"""
+    url = page_url(page_num, base_url)
+    own_session = session is None
+    if own_session:
+        session = make_session(pool_size=1)
     
     try:
-        print(f"Page {page_num:3d}...", end=" ")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=15)
+        with metrics.timer('scrape_fetch_seconds'):
+            response = fetch_page(session, url, limiter)
+        metrics.count('scrape_bytes_total', len(response.content))
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
+            with metrics.timer('scrape_parse_seconds'):
+                soup = BeautifulSoup(response.content, HTML_PARSER)
             mcqs = extract_mcqs_from_page(soup)
-            print(f"✓ {len(mcqs):2d} MCQs")
+            metrics.count('scrape_pages_total', status='ok')
+            metrics.count('scrape_mcqs_total', len(mcqs))
+            print(f"Page {page_num:3d}... ✓ {len(mcqs):2d} MCQs")
             return mcqs
         else:
-            print(f"✗ HTTP {response.status_code}")
-            return []
+            metrics.count('scrape_pages_total', status=str(response.status_code))
+            print(f"Page {page_num:3d}... ✗ HTTP {response.status_code}")
+            return None
     except Exception as e:
-        print(f"✗ {str(e)[:30]}")
-        return []
+        metrics.count('scrape_pages_total', status='error')
+        print(f"Page {page_num:3d}... ✗ {str(e)[:30]}")
+        return None
+    finally:
+        if own_session:
+            session.close()
 
-def main():
-    # Load existing data if available
-    output_file = 'mcqs_data/gk/gk_mcqs.json'
+def scrape_pages(page_numbers, workers=MAX_WORKERS, rate=REQUESTS_PER_SECOND,
+                 base_url=BASE_URL, on_page=None):
+    """Scrape pages concurrently over one pooled session, returning results in page order
+    
+    on_page(page_num, mcqs) is called from the worker thread as each page succeeds.
+    """
+    session = make_session(pool_size=workers)
+    limiter = TokenBucket(rate)
+    
+    def fetch(page_num):
+        mcqs = scrape_page(page_num, session, limiter, base_url)
+        if mcqs is None:
+            return []
+        if on_page:
+            on_page(page_num, mcqs)
+        return mcqs
+    
+    executor = ThreadPoolExecutor(max_workers=workers)
     try:
-        with open(output_file, 'r', encoding='utf-8') as f:
-            all_mcqs = json.load(f)
-        print(f"Loaded {len(all_mcqs)} existing MCQs")
-    except FileNotFoundError:
-        all_mcqs = []
+        return list(executor.map(fetch, page_numbers))
+    finally:
+        # On Ctrl+C, drop queued pages instead of finishing the whole crawl
+        executor.shutdown(wait=True, cancel_futures=True)
+        session.close()
+
+def main(start_page=None, end_page=590):
+    from scrape_incremental import CrawlState
+
+    # MCQs already in the bank (or scraped earlier) are dropped as each page lands
+    known = CrawlState()
+    try:
+        known.sync_bank(OUTPUT_FILE)
+        return run_scrape(CheckpointLog(CHECKPOINT_FILE, known=known), start_page, end_page)
+    finally:
+        known.close()
+
+def run_scrape(checkpoint, start_page, end_page):
+    if checkpoint.started:
+        start_page, end_page = checkpoint.page_range
+        print(f"Resuming checkpoint: {len(checkpoint.pages)} pages already done "
+              f"(last page {checkpoint.last_page()})")
+    else:
+        # Existing MCQs are kept ahead of everything scraped into this log
+        try:
+            with MCQDataset(OUTPUT_FILE) as existing:
+                base_count = len(existing)
+            print(f"Loaded {base_count} existing MCQs")
+        except FileNotFoundError:
+            base_count = 0
+        if start_page is None:
+            # The bank does not record which pages it came from: a default 1-590
+            # crawl on top of it would append every MCQ a second time
+            if base_count:
+                print(f"⚠️ {OUTPUT_FILE} already has {base_count} MCQs. Pass the pages to scrape "
+                      f"(python scraper.py START END) or fetch only what is new (python scraper.py --incremental)")
+                return None
+            start_page = 1
+        checkpoint.start(base_count, start_page, end_page)
     
-    start_page = 54  # Resume from page 54 (stopped at 53)
-    end_page = 590  # All pages
+    pending = checkpoint.pending_pages()
     
     print("=" * 60)
     print(f"Scraping PakMcqs.com: Pages {start_page} to {end_page}")
-    print(f"Starting with {len(all_mcqs)} existing MCQs")
+    print(f"Pages left: {len(pending)}")
     print("=" * 60)
     
-    for page_num in range(start_page, end_page + 1):
-        try:
-            mcqs = scrape_page(page_num)
-            all_mcqs.extend(mcqs)
-            
-            # Save progress every 50 pages
-            if page_num % 50 == 0:
-                with open('mcqs_data/gk/mcqs_progress.json', 'w', encoding='utf-8') as f:
-                    json.dump(all_mcqs, f, ensure_ascii=False, indent=2)
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(all_mcqs, f, ensure_ascii=False, indent=2)
-                print(f"\n>>> Progress saved: {len(all_mcqs)} total MCQs <<<\n")
-            
-            # Don't hammer the server
-            time.sleep(0.5)
-        except KeyboardInterrupt:
-            print("\n\n>>> Stopped by user <<<")
-            break
-        except Exception as e:
-            print(f"✗ Error on page {page_num}: {str(e)[:50]}")
-            continue
+    try:
+        with profiled('scraper'), metrics.timer('scrape_run_seconds'):
+            scrape_pages(pending, base_url=BASE_URL, on_page=checkpoint.append)
+    except KeyboardInterrupt:
+        print("\n\n>>> Stopped by user (progress is checkpointed) <<<")
+        return None
+    finally:
+        print("\n📈 Scrape metrics:")
+        for line in metrics.report():
+            print(f"   {line}")
+        print(f"   (written to {', '.join(metrics.write('scraper'))})")
+    if checkpoint.dropped:
+        print(f"🧹 Skipped {checkpoint.dropped} MCQs already in the bank or on an earlier page")
+    
+    missing = checkpoint.pending_pages()
+    if missing:
+        print(f"\n⚠️ {len(missing)} pages failed, run again to retry: {missing[:10]}...")
+        return None
     
     # Save final data
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_mcqs, f, ensure_ascii=False, indent=2)
+    all_mcqs = checkpoint.compact(OUTPUT_FILE, dedup=DedupIndex())
+    os.remove(CHECKPOINT_FILE)
     
     print("=" * 60)
     print(f"✓ COMPLETE! Total MCQs: {len(all_mcqs)}")
-    print(f"✓ Saved to: {output_file}")
+    print(f"✓ Saved to: {OUTPUT_FILE}")
     print("=" * 60)
     
     # Show sample
@@ -148,4 +305,10 @@ def main():
     return all_mcqs
 
 if __name__ == "__main__":
-    main()
+    # Usage: python scraper.py [start_page] [end_page] (ignored when resuming; required once the bank has MCQs)
+    #        python scraper.py --incremental [...]   (only what is new since the last crawl)
+    if sys.argv[1:2] == ['--incremental']:
+        from scrape_incremental import main as incremental_main
+        incremental_main(sys.argv[2:])
+    else:
+        main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Cost-balanced render shard planner
+- Reads the bank size from the MCQ bank (no more hard-coded TOTAL_VIDEOS)
+- Skips indices that are already rendered (progress log + video on disk, or
+  in the render cache, or ok in a --rendered log for videos kept elsewhere,
+  e.g. the last CI run's artifacts: pass only logs whose videos still exist);
+  failed and never-rendered indices are planned
+- Estimates each item's render time from past render_progress.jsonl timings:
+  its own last time if known, else a fit on MCQ text length, else a default
+- Packs items into shards (longest first onto the least loaded shard) so every
+  shard stays under the target wall time, including per-job setup overhead
+- Writes manifests/shard-NN.json (read by render-batch.js via RENDER_MANIFEST)
+  and manifests/matrix.json for a CI job matrix
+
+Usage:
+    python shard_planner.py [--target-minutes 300] [--overhead-minutes 8] [--shards N]
+                            [--timings FILE ...] [--rendered FILE ...] [--start 0] [--end N]
+                            [--out manifests]
+"""
+
+import os
+import json
+import math
+import heapq
+import time
+import argparse
+import statistics
+
+from mcq_dataset import MCQDataset, DEFAULT_BANK
+from render_orchestrator import PROGRESS_FILE, OUTPUT_DIR, load_progress, completed_indices
+from render_cache import RenderCache, CACHE_DIR
+
+MANIFEST_DIR = 'manifests'
+TARGET_MINUTES = 300        # CI jobs time out at 360
+OVERHEAD_MINUTES = 8        # checkout, npm ci, ffmpeg, bundling
+DEFAULT_SECONDS = 60.0      # per video, when nothing has been timed yet
+MIN_FIT_SAMPLES = 20
+
+
+def text_length(mcq):
+    return len(mcq['question']) + sum(len(option) for option in mcq['options'])
+
+
+class CostModel:
+    """Seconds to render one MCQ, learned from past successful renders"""
+
+    def __init__(self, timings, lengths, default=DEFAULT_SECONDS):
+        self.known = dict(timings)
+        self.default = default
+        self.slope = 0.0
+        self.intercept = statistics.median(self.known.values()) if self.known else default
+
+        # Least-squares line on text length, when there is enough history
+        samples = [(lengths[i], seconds) for i, seconds in self.known.items() if i in lengths]
+        if len(samples) >= MIN_FIT_SAMPLES:
+            xs, ys = zip(*samples)
+            mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+            var_x = sum((x - mean_x) ** 2 for x in xs)
+            if var_x > 0:
+                self.slope = sum((x - mean_x) * (y - mean_y) for x, y in samples) / var_x
+                self.intercept = mean_y - self.slope * mean_x
+
+    def cost(self, index, length):
+        if index in self.known:
+            return self.known[index]
+        return max(1.0, self.intercept + self.slope * length)
+
+    def describe(self):
+        if not self.known:
+            return f"no timings yet, assuming {self.default:.0f}s per video"
+        if self.slope:
+            return (f"{len(self.known)} timed renders, {self.intercept:.1f}s + "
+                    f"{self.slope * 100:.2f}s per 100 characters")
+        return f"{len(self.known)} timed renders, median {self.intercept:.1f}s"
+
+
+def load_timings(paths):
+    """{index: seconds} from successful progress records; later files win"""
+    timings = {}
+    for path in paths:
+        for index, record in load_progress(path).items():
+            if record.get('ok') and record.get('seconds'):
+                timings[index] = float(record['seconds'])
+    return timings
+
+
+def rendered_indices(paths):
+    """Indices whose latest progress record across the logs is a success; later files win"""
+    records = {}
+    for path in paths:
+        records.update(load_progress(path))
+    return {index for index, record in records.items() if record.get('ok')}
+
+
+def pack(costs, shard_count):
+    """Longest-processing-time-first packing; returns [(load, [indices])]"""
+    shards = [(0.0, n, []) for n in range(shard_count)]
+    heapq.heapify(shards)
+    for index, seconds in sorted(costs.items(), key=lambda item: (-item[1], item[0])):
+        load, n, indices = heapq.heappop(shards)
+        indices.append(index)
+        heapq.heappush(shards, (load + seconds, n, indices))
+    return [(load, sorted(indices)) for load, n, indices in sorted(shards, key=lambda shard: shard[1])]
+
+
+def plan(costs, budget_seconds, shard_count=None):
+    """Fewest shards whose packed load fits the budget (or exactly shard_count)"""
+    if not costs:
+        return []
+    if shard_count:
+        return pack(costs, shard_count)
+    count = max(1, math.ceil(sum(costs.values()) / budget_seconds))
+    while True:
+        shards = pack(costs, min(count, len(costs)))
+        if max(load for load, _ in shards) <= budget_seconds or count >= len(costs):
+            return shards
+        count += 1
+
+
+def write_manifests(shards, out_dir, bank_path, bank_count, overhead_seconds):
+    """shard-NN.json per shard plus matrix.json; returns the matrix"""
+    os.makedirs(out_dir, exist_ok=True)
+    for name in os.listdir(out_dir):
+        if name.startswith('shard-') and name.endswith('.json'):
+            os.remove(os.path.join(out_dir, name))
+
+    created_at = time.strftime('%Y-%m-%d %H:%M:%S')
+    include = []
+    for n, (load, indices) in enumerate(shards):
+        path = os.path.join(out_dir, f"shard-{n:02d}.json")
+        manifest = {
+            'shard': n,
+            'shards': len(shards),
+            'bank': bank_path,
+            'bank_count': bank_count,
+            'estimated_seconds': round(load + overhead_seconds, 1),
+            'created_at': created_at,
+            'indices': indices,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        include.append({'shard': n, 'manifest': path.replace(os.sep, '/'), 'videos': len(indices),
+                        'estimated_minutes': round((load + overhead_seconds) / 60, 1)})
+
+    matrix = {'include': include}
+    with open(os.path.join(out_dir, 'matrix.json'), 'w', encoding='utf-8') as f:
+        json.dump(matrix, f, separators=(',', ':'))  # one line, for $GITHUB_OUTPUT
+    return matrix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan balanced render shards for parallel jobs")
+    parser.add_argument('--bank', default=DEFAULT_BANK)
+    parser.add_argument('--start', type=int, default=0)
+    parser.add_argument('--end', type=int, default=None, help="last index, inclusive (default: end of bank)")
+    parser.add_argument('--target-minutes', type=float, default=TARGET_MINUTES)
+    parser.add_argument('--overhead-minutes', type=float, default=OVERHEAD_MINUTES)
+    parser.add_argument('--shards', type=int, default=None, help="fixed shard count instead of the target")
+    parser.add_argument('--timings', nargs='*', default=[PROGRESS_FILE],
+                        help="render_progress.jsonl files with past timings")
+    parser.add_argument('--rendered', nargs='*', default=[],
+                        help="progress logs whose successful indices count as rendered without the video on disk")
+    parser.add_argument('--include-rendered', action='store_true', help="plan every index, even rendered ones")
+    parser.add_argument('--out', default=MANIFEST_DIR)
+    args = parser.parse_args(argv)
+
+    timings = load_timings(args.timings)
+    with MCQDataset(args.bank) as bank:
+        bank_count = len(bank)
+        end = bank_count - 1 if args.end is None else min(args.end, bank_count - 1)
+        wanted = range(max(args.start, 0), end + 1)
+        lengths = {i: text_length(mcq) for i, mcq in zip(wanted, bank.iter_range(wanted.start, wanted.stop))}
+        # The fit learns from every timed render, not only those in the planned range
+        lengths.update({i: text_length(bank[i]) for i in timings if i not in lengths and 0 <= i < bank_count})
+
+        done = set()
+        if not args.include_rendered:
+            done = completed_indices(PROGRESS_FILE, OUTPUT_DIR) | rendered_indices(args.rendered)
+            if os.path.isdir(CACHE_DIR):
+                cache = RenderCache()
+                done |= {i for i in wanted if cache.lookup(cache.key(bank[i]))}
+
+    model = CostModel(timings, lengths)
+    costs = {i: model.cost(i, lengths[i]) for i in wanted if i not in done}
+    overhead = args.overhead_minutes * 60
+    budget = args.target_minutes * 60 - overhead
+    if budget <= 0:
+        parser.error("--target-minutes must be larger than --overhead-minutes")
+
+    shards = plan(costs, budget, args.shards)
+    matrix = write_manifests(shards, args.out, args.bank, bank_count, overhead)
+
+    print("=" * 60)
+    print(f"🧮 {len(costs)} videos to render ({len(wanted) - len(costs)} already rendered), bank has {bank_count}")
+    print(f"⏱️  Cost model: {model.describe()}")
+    if shards:
+        loads = [load + overhead for load, _ in shards]
+        print(f"📦 {len(shards)} shards, estimated {min(loads) / 60:.0f}-{max(loads) / 60:.0f} min each "
+              f"(target {args.target_minutes:.0f} min)")
+        over = [n for n, load in enumerate(loads) if load > args.target_minutes * 60]
+        if over:
+            print(f"⚠️ Shards over target (single videos too slow?): {over}")
+    print(f"✓ Manifests and matrix.json written to {args.out}/")
+    print("=" * 60)
+    return matrix
+
+
+if __name__ == "__main__":
+    main()
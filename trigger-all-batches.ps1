@@ -1,4 +1,6 @@
-$TOTAL_VIDEOS = 5792
+# Fixed-size batches; for batches balanced on past render times use
+# gh workflow run render-shards.yml (planned by shard_planner.py)
+$TOTAL_VIDEOS = [int](python -c "from mcq_dataset import MCQDataset; print(len(MCQDataset()))")
 $BATCH_SIZE = 100
 $REPO_OWNER = "thisisusmanghani"
 $REPO_NAME = "remotion-mcq-videos"
@@ -1,11 +1,11 @@
 #!/bin/bash
 
 # Script to trigger all batch rendering jobs via GitHub Actions
-# Total videos: 5792
-# Batch size: 100 videos per job
-# Total batches needed: 58 batches
+# Fixed-size batches of 100 videos per job; the bank size is read from the MCQ bank.
+# For batches balanced on past render times, run the "Render MCQ Videos (balanced shards)"
+# workflow instead (gh workflow run render-shards.yml), which plans with shard_planner.py
 
-TOTAL_VIDEOS=5792
+TOTAL_VIDEOS=$(python3 -c "from mcq_dataset import MCQDataset; print(len(MCQDataset()))")
 BATCH_SIZE=100
 REPO_OWNER="YOUR_GITHUB_USERNAME"  # Update this with your GitHub username
 REPO_NAME="YOUR_REPO_NAME"         # Update this with your repository name
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Upload ledger: which videos are already on YouTube
+- SQLite (WAL) with indexed lookups by filename and by video ID
+- One atomic INSERT per upload instead of rewriting the whole JSON log
+- Imports the legacy temp/uploaded_videos.json automatically on first use
+
+Usage:
+    python upload_ledger.py                 # summary
+    python upload_ledger.py import [file]   # (re)import a JSON log
+    python upload_ledger.py export [file]   # write the ledger back out as JSON
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+
+LEDGER_FILE = "temp/uploaded_videos.sqlite"
+LEGACY_LOG_FILE = "temp/uploaded_videos.json"
+
+_COLUMNS = ('filename', 'video_id', 'url', 'title', 'uploaded_at')
+
+
+class UploadLedger:
+    def __init__(self, path=LEDGER_FILE, legacy_log=LEGACY_LOG_FILE):
+        self.path = path
+        self.legacy_log = legacy_log
+        self.lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                " filename TEXT PRIMARY KEY,"
+                " video_id TEXT NOT NULL,"
+                " url TEXT NOT NULL,"
+                " title TEXT,"
+                " uploaded_at TEXT NOT NULL)"
+            )
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS uploads_video_id ON uploads (video_id)")
+        self._conn = conn
+
+        # First use: bring over the old JSON log
+        empty = conn.execute("SELECT 1 FROM uploads LIMIT 1").fetchone() is None
+        if empty and self.legacy_log and os.path.exists(self.legacy_log):
+            count = self._import(self.legacy_log)
+            print(f"📥 Imported {count} uploads from {self.legacy_log}")
+        return conn
+
+    def _import(self, json_path):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        rows = [(e['filename'], e['video_id'], e.get('url') or f"https://youtube.com/shorts/{e['video_id']}",
+                 e.get('title'), e.get('uploaded_at') or '') for e in entries]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO uploads (filename, video_id, url, title, uploaded_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def import_json(self, json_path=LEGACY_LOG_FILE):
+        """Merge a JSON upload log into the ledger (existing filenames win)"""
+        with self.lock:
+            self._connect()
+            return self._import(json_path)
+
+    def record(self, filename, video_id, metadata):
+        """Atomically record one upload"""
+        row = (filename, video_id, f'https://youtube.com/shorts/{video_id}',
+               metadata['title'], time.strftime('%Y-%m-%d %H:%M:%S'))
+        with self.lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO uploads (filename, video_id, url, title, uploaded_at) VALUES (?, ?, ?, ?, ?)",
+                    row
+                )
+
+    def is_uploaded(self, filename):
+        with self.lock:
+            row = self._connect().execute("SELECT 1 FROM uploads WHERE filename = ?", (filename,)).fetchone()
+        return row is not None
+
+    def find_by_video_id(self, video_id):
+        with self.lock:
+            row = self._connect().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM uploads WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def filenames(self):
+        """Set of uploaded filenames, for O(1) membership checks"""
+        with self.lock:
+            return {name for (name,) in self._connect().execute("SELECT filename FROM uploads")}
+
+    def entries(self):
+        """All uploads as dicts in upload order (the old JSON log format)"""
+        with self.lock:
+            rows = self._connect().execute(f"SELECT {', '.join(_COLUMNS)} FROM uploads ORDER BY rowid")
+            return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def __len__(self):
+        with self.lock:
+            return self._connect().execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+if __name__ == "__main__":
+    ledger = UploadLedger()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    if command == 'import':
+        path = sys.argv[2] if len(sys.argv) > 2 else LEGACY_LOG_FILE
+        print(f"✓ Imported {ledger.import_json(path)} entries from {path}")
+    elif command == 'export':
+        path = sys.argv[2] if len(sys.argv) > 2 else LEGACY_LOG_FILE
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(ledger.entries(), f, indent=2)
+        print(f"✓ Exported {len(ledger)} entries to {path}")
+    print(f"📒 {len(ledger)} uploads in {ledger.path}")
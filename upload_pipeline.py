@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Pipelined YouTube uploader
+- Stage 1: metadata generation in batches (one thread)
+- Stage 2: uploads, with a bounded number in flight (worker threads)
+- Stage 3: upload log commits (one thread, so the log has a single writer)
+- Adaptive backoff on 403/429 rate limits instead of a fixed sleep;
+  an exhausted daily quota stops the run cleanly
+- A job whose metadata, upload or commit fails is counted as failed and its
+  error kept in errors (by name); the stage carries on with the next job
+- Jobs may be a list or a live stream (e.g. video_watcher.VideoWatcher);
+  streamed jobs are batched with whatever else has already arrived, and a
+  stream with a stop() method is stopped when the quota runs out
+"""
+
+import time
+import json
+import queue
+import threading
+import http.client
+
+UPLOADS_IN_FLIGHT = 3
+METADATA_BATCH = 20
+MAX_ATTEMPTS = 5
+
+_DONE = object()
+# OSErrors that mean a bad local path, not a flaky connection
+_LOCAL_FILE_ERRORS = (FileNotFoundError, IsADirectoryError, NotADirectoryError, PermissionError)
+
+
+def is_transport_error(error):
+    """Connection, timeout, TLS and DNS failures (requests' exceptions are OSErrors too)"""
+    if isinstance(error, OSError):
+        return not isinstance(error, _LOCAL_FILE_ERRORS)
+    if isinstance(error, http.client.HTTPException):
+        return True
+    try:
+        import httplib2
+    except ImportError:
+        return False
+    return isinstance(error, httplib2.ServerNotFoundError)
+
+
+def classify_upload_error(error):
+    """Return 'quota', 'throttle', 'retry' or 'fatal' for an upload exception"""
+    resp = getattr(error, 'resp', None)
+    status = (getattr(resp, 'status', None) or getattr(error, 'status_code', None)
+              or getattr(getattr(error, 'response', None), 'status_code', None))
+    content = getattr(error, 'content', b'') or b''
+    if isinstance(content, bytes):
+        content = content.decode('utf-8', 'replace')
+
+    reason = ''
+    try:
+        errors = json.loads(content).get('error', {}).get('errors', [])
+        reason = errors[0].get('reason', '') if errors else ''
+    except (ValueError, AttributeError):
+        pass
+
+    if status == 403 and reason in ('quotaExceeded', 'dailyLimitExceeded', 'uploadLimitExceeded'):
+        return 'quota'
+    if status == 429 or (status == 403 and 'ateLimitExceeded' in reason):
+        return 'throttle'
+    if isinstance(status, int) and status >= 500:
+        return 'retry'
+    if status is None and is_transport_error(error):
+        return 'retry'
+    # 4xx, bad local files and bugs (KeyError, TypeError, ...) fail the same way every time
+    return 'fatal'
+
+
+def retry_after_seconds(error):
+    """Retry-After header of an HTTP error, if the server sent one"""
+    resp = getattr(error, 'resp', None)
+    headers = resp if isinstance(resp, dict) else getattr(resp, 'headers', None) or {}
+    value = str(headers.get('retry-after', headers.get('Retry-After', '')))
+    return float(value) if value.isdigit() else None
+
+
+class AdaptiveBackoff:
+    """Shared pause that grows on throttling and decays on success"""
+
+    def __init__(self, base=2.0, maximum=300.0, sleep=time.sleep, clock=time.monotonic):
+        self.base = base
+        self.maximum = maximum
+        self.delay = 0.0
+        self.resume_at = 0.0
+        self.sleep = sleep
+        self.clock = clock
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block while a backoff pause is active"""
+        while True:
+            with self.lock:
+                remaining = self.resume_at - self.clock()
+            if remaining <= 0:
+                return
+            self.sleep(remaining)
+
+    def throttled(self, retry_after=None):
+        with self.lock:
+            self.delay = min(max(self.base, self.delay * 2), self.maximum)
+            pause = retry_after if retry_after is not None else self.delay
+            self.resume_at = max(self.resume_at, self.clock() + pause)
+            return pause
+
+    def succeeded(self):
+        with self.lock:
+            self.delay = self.delay / 2 if self.delay > self.base else 0.0
+
+
+class UploadPipeline:
+    """Overlaps metadata generation, uploads and log commits
+
+    metadata_fn(jobs) -> list of metadata, one per job
+    upload_fn(video_path, metadata) -> video_id
+    commit_fn(video_name, video_id, metadata) -> None
+
+    Each job is a dict with at least 'name' and 'path'. After run(), errors maps
+    the name of every failed job to the exception that failed it.
+    """
+
+    def __init__(self, metadata_fn, upload_fn, commit_fn, in_flight=UPLOADS_IN_FLIGHT,
+                 metadata_batch=METADATA_BATCH, max_attempts=MAX_ATTEMPTS, backoff=None):
+        self.metadata_fn = metadata_fn
+        self.upload_fn = upload_fn
+        self.commit_fn = commit_fn
+        self.in_flight = in_flight
+        self.metadata_batch = metadata_batch
+        self.max_attempts = max_attempts
+        self.backoff = backoff or AdaptiveBackoff()
+        self.quota_exhausted = threading.Event()
+        self.stats = {'received': 0, 'uploaded': 0, 'failed': 0, 'skipped': 0}
+        self.errors = {}
+        self.stats_lock = threading.Lock()
+        self._source = None
+        self._job_queue = None
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def _fail(self, job, error):
+        with self.stats_lock:
+            self.stats['failed'] += 1
+            self.errors[job['name']] = error
+
+    def _metadata(self, batch):
+        """(job, metadata) for every job metadata_fn can handle; a failing batch is retried job by job"""
+        try:
+            return list(zip(batch, self.metadata_fn(batch)))
+        except Exception as e:
+            if len(batch) == 1:
+                print(f"❌ Metadata failed: {batch[0]['name']}: {e}")
+                self._fail(batch[0], e)
+                return []
+        return [entry for job in batch for entry in self._metadata([job])]
+
+    def _stop_for_quota(self):
+        """Stop taking jobs: wake the metadata stage and stop a live source (it may never yield again)"""
+        self.quota_exhausted.set()
+        if self._job_queue is not None:
+            self._job_queue.put(_DONE)
+        stop = getattr(self._source, 'stop', None)
+        if stop:
+            stop()
+
+    def _feed(self, jobs, job_queue):
+        """Move jobs from an iterable (possibly endless) into the pipeline"""
+        try:
+            for job in jobs:
+                if self.quota_exhausted.is_set():
+                    break
+                self._count('received')
+                job_queue.put(job)
+        finally:
+            job_queue.put(_DONE)
+
+    def _metadata_stage(self, job_queue, upload_queue):
+        try:
+            finished = False
+            while not finished and not self.quota_exhausted.is_set():
+                # Block for one job, then take whatever else is already waiting
+                batch = [job_queue.get()]
+                while len(batch) < self.metadata_batch:
+                    try:
+                        batch.append(job_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if _DONE in batch:
+                    # The feeder's end marker or a quota stop; jobs queued after a quota stop just wait
+                    finished = True
+                    batch = [job for job in batch if job is not _DONE]
+                if self.quota_exhausted.is_set():
+                    break
+                if batch:
+                    for job, metadata in self._metadata(batch):
+                        upload_queue.put((job, metadata))
+        finally:
+            for _ in range(self.in_flight):
+                upload_queue.put(_DONE)
+
+    def _upload_one(self, job, metadata):
+        """Upload with retries; returns the video id, or None (failures are recorded)"""
+        for attempt in range(1, self.max_attempts + 1):
+            self.backoff.wait()
+            if self.quota_exhausted.is_set():
+                return None
+            try:
+                video_id = self.upload_fn(job['path'], metadata)
+                self.backoff.succeeded()
+                return video_id
+            except Exception as e:
+                kind = classify_upload_error(e)
+                if kind == 'quota':
+                    print(f"🛑 Daily upload quota exhausted at {job['name']}, stopping")
+                    self._stop_for_quota()
+                    return None
+                if kind == 'fatal' or attempt == self.max_attempts:
+                    print(f"❌ Upload failed: {job['name']}: {e}")
+                    self._fail(job, e)
+                    return None
+                if kind == 'throttle':
+                    pause = self.backoff.throttled(retry_after_seconds(e))
+                    print(f"   ⏳ Rate limited on {job['name']}, backing off {pause:.0f}s")
+                else:
+                    pause = self.backoff.base * (2 ** (attempt - 1))
+                    print(f"   🔁 Retrying {job['name']} in {pause:.0f}s ({e})")
+                    self.backoff.sleep(pause)
+        return None
+
+    def _upload_stage(self, upload_queue, commit_queue):
+        while True:
+            entry = upload_queue.get()
+            if entry is _DONE:
+                commit_queue.put(_DONE)
+                return
+            job, metadata = entry
+            if self.quota_exhausted.is_set():
+                continue
+            video_id = self._upload_one(job, metadata)
+            if video_id is None:
+                continue
+            commit_queue.put((job, video_id, metadata))
+
+    def _commit_stage(self, commit_queue):
+        finished_workers = 0
+        while finished_workers < self.in_flight:
+            entry = commit_queue.get()
+            if entry is _DONE:
+                finished_workers += 1
+                continue
+            job, video_id, metadata = entry
+            try:
+                self.commit_fn(job['name'], video_id, metadata)
+            except Exception as e:
+                # The video is on YouTube already: say where, so it can be logged by hand
+                print(f"❌ Commit failed: {job['name']} (uploaded as {video_id}): {e}")
+                self._fail(job, e)
+                continue
+            self._count('uploaded')
+
+    def run(self, jobs):
+        """Push every job through the pipeline; returns the stats dict
+
+        A list is queued up front so metadata batches stay full; any other
+        iterable is consumed as a stream until it ends (or the quota runs out).
+        """
+        job_queue = queue.Queue()
+        upload_queue = queue.Queue(maxsize=self.in_flight * 2)
+        commit_queue = queue.Queue()
+        start = time.monotonic()
+        self._source, self._job_queue = jobs, job_queue
+
+        if isinstance(jobs, (list, tuple)):
+            self._feed(jobs, job_queue)
+        else:
+            # Not joined: a watcher may block until it is stopped
+            threading.Thread(target=self._feed, args=(jobs, job_queue), daemon=True).start()
+
+        threads = [threading.Thread(target=self._metadata_stage, args=(job_queue, upload_queue), daemon=True),
+                   threading.Thread(target=self._commit_stage, args=(commit_queue,), daemon=True)]
+        threads += [threading.Thread(target=self._upload_stage, args=(upload_queue, commit_queue), daemon=True)
+                    for _ in range(self.in_flight)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Anything neither uploaded nor failed was left for the next run
+        self.stats['skipped'] = self.stats['received'] - self.stats['uploaded'] - self.stats['failed']
+        self.stats['elapsed'] = time.monotonic() - start
+        return self.stats
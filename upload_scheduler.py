@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Quota-aware upload scheduling across YouTube API quota days
+- Persistent priority queue of videos to upload (SQLite), ordered by quiz
+  number (oldest or newest first) or an explicit publish slot
+- Tracks quota units spent per quota day (the API resets at midnight Pacific);
+  every videos.insert attempt is charged before it is made
+- Each window takes only as many videos as the remaining budget pays for and
+  runs them through UploadPipeline; a 403 quotaExceeded marks the day spent
+  and the rest stays queued for the next reset
+- Live sources (VideoWatcher, DriveIngest) go through the same queue and
+  budget with run_stream(): videos are queued as they arrive and uploaded as
+  the quota allows, across resets, until the source ends
+- A video that failed is not retried before the next quota day, so a bad file
+  cannot eat a day's quota
+- Clock and upload function are injected, so a simulated clock and a fake
+  quota-enforcing API can drive days of scheduling in milliseconds
+  (benchmarks/sim_quota.py)
+
+Usage:
+    python youtube_automation.py schedule [--once] [--order oldest|newest]
+    python youtube_automation.py upload --watch | --drive [--idle N]
+    python upload_scheduler.py          # queue and quota status
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from upload_pipeline import UploadPipeline, classify_upload_error, UPLOADS_IN_FLIGHT
+
+SCHEDULE_FILE = 'temp/upload_schedule.sqlite'
+DAILY_QUOTA = 10000
+QUOTA_COSTS = {'videos.insert': 1600, 'videos.list': 1, 'thumbnails.set': 50}
+UPLOAD_COST = QUOTA_COSTS['videos.insert']
+MAX_ATTEMPTS = 3          # windows a video may fail in before it is parked as 'failed'
+RESET_MARGIN = 60         # seconds to wait past the reset, for clock skew
+
+
+def _pacific():
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo('America/Los_Angeles')
+    except Exception:
+        # No tz database (e.g. Windows without tzdata): standard time is close enough
+        return timezone(timedelta(hours=-8))
+
+
+QUOTA_TZ = _pacific()
+
+
+class SystemClock:
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(max(0.0, seconds))
+
+
+class SimulatedClock:
+    """Epoch-seconds clock that only moves when slept on"""
+
+    def __init__(self, start=None):
+        self.time = start if start is not None else time.time()
+
+    def now(self):
+        return self.time
+
+    def sleep(self, seconds):
+        self.time += max(0.0, seconds)
+
+
+class QuotaExceeded(Exception):
+    """Raised instead of calling the API when the day's budget is already spent"""
+
+    status_code = 403
+    content = json.dumps({'error': {'errors': [{'reason': 'quotaExceeded'}]}})
+
+    def __init__(self, day):
+        super().__init__(f"quota for {day} spent")
+
+
+def quota_day(now, tz=QUOTA_TZ):
+    return datetime.fromtimestamp(now, tz).strftime('%Y-%m-%d')
+
+
+def day_start(now, tz=QUOTA_TZ):
+    """Epoch seconds of the last midnight in the quota time zone"""
+    local = datetime.fromtimestamp(now, tz)
+    return datetime(local.year, local.month, local.day, tzinfo=tz).timestamp()
+
+
+def next_reset(now, tz=QUOTA_TZ):
+    """Epoch seconds of the next midnight in the quota time zone"""
+    local = datetime.fromtimestamp(now, tz)
+    midnight = datetime(local.year, local.month, local.day, tzinfo=tz) + timedelta(days=1)
+    return midnight.timestamp()
+
+
+def quiz_number(name):
+    match = re.search(r'(\d+)', name)
+    return int(match.group(1)) if match else 0
+
+
+def priority_for(name, order='oldest'):
+    """Lower runs first: quiz number ascending ('oldest') or descending ('newest')"""
+    number = quiz_number(name)
+    return -number if order == 'newest' else number
+
+
+class ScheduleStore:
+    """Upload queue and per-day quota usage in SQLite, shared by upload threads"""
+
+    def __init__(self, path=SCHEDULE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS queue ("
+                " name TEXT PRIMARY KEY, path TEXT NOT NULL, priority REAL NOT NULL,"
+                " not_before REAL NOT NULL DEFAULT 0, state TEXT NOT NULL DEFAULT 'pending',"
+                " attempts INTEGER NOT NULL DEFAULT 0, video_id TEXT, last_error TEXT, updated_at REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS queue_due ON queue (state, priority, name)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS quota ("
+                " day TEXT PRIMARY KEY, used INTEGER NOT NULL, exhausted INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    def enqueue(self, jobs, order='oldest', publish_at=None):
+        """Add jobs ({'name', 'path'}) not queued before; returns how many were new"""
+        rows = [(job['name'], job['path'], job.get('priority', priority_for(job['name'], order)),
+                 publish_at or 0, time.time()) for job in jobs]
+        with self.lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO queue (name, path, priority, not_before, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            return self.conn.total_changes - before
+
+    def mark_done(self, names):
+        """Mark videos uploaded elsewhere (e.g. by watch mode) so they are not queued twice"""
+        with self.lock, self.conn:
+            self.conn.executemany("UPDATE queue SET state = 'uploaded' WHERE name = ? AND state != 'uploaded'",
+                                  [(name,) for name in names])
+
+    def due(self, now, limit, retry_before=None):
+        """Up to limit pending jobs whose slot has come, best priority first
+
+        With retry_before, videos that already failed are only due if that was before it.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT name, path FROM queue WHERE state = 'pending' AND not_before <= ?"
+                " AND (attempts = 0 OR ? IS NULL OR updated_at < ?)"
+                " ORDER BY priority, name LIMIT ?", (now, retry_before, retry_before, limit)
+            ).fetchall()
+        return [{'name': name, 'path': path} for name, path in rows]
+
+    def uploaded(self, name, video_id, now):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE queue SET state = 'uploaded', video_id = ?, last_error = NULL,"
+                              " updated_at = ? WHERE name = ?", (video_id, now, name))
+
+    def failed(self, name, error, now, max_attempts=MAX_ATTEMPTS):
+        """Count a failed window; park the video as 'failed' after max_attempts"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE queue SET attempts = attempts + 1, last_error = ?, updated_at = ?,"
+                " state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE state END WHERE name = ?",
+                (str(error)[:500], now, max_attempts, name)
+            )
+
+    def counts(self):
+        with self.lock:
+            return dict(self.conn.execute("SELECT state, COUNT(*) FROM queue GROUP BY state").fetchall())
+
+    def pending(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM queue WHERE state = 'pending'").fetchone()[0]
+
+    def next_slot(self, now):
+        """Earliest publish slot still in the future, if any"""
+        with self.lock:
+            return self.conn.execute("SELECT MIN(not_before) FROM queue WHERE state = 'pending' AND not_before > ?",
+                                     (now,)).fetchone()[0]
+
+    def quota_used(self, day):
+        with self.lock:
+            row = self.conn.execute("SELECT used, exhausted FROM quota WHERE day = ?", (day,)).fetchone()
+        return row or (0, 0)
+
+    def charge(self, day, cost, limit):
+        """Spend cost units of day's quota if they fit; returns whether they did"""
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT used, exhausted FROM quota WHERE day = ?", (day,)).fetchone()
+            used, exhausted = row or (0, 0)
+            if exhausted or used + cost > limit:
+                return False
+            self.conn.execute("INSERT OR REPLACE INTO quota (day, used, exhausted) VALUES (?, ?, 0)",
+                              (day, used + cost))
+            return True
+
+    def exhaust(self, day, limit):
+        """The API said the quota is gone, whatever our count says"""
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO quota (day, used, exhausted) VALUES (?, ?, 1)"
+                              " ON CONFLICT(day) DO UPDATE SET exhausted = 1, used = MAX(used, ?)",
+                              (day, limit, limit))
+
+    def close(self):
+        self.conn.close()
+
+
+class QuotaBudget:
+    """Today's remaining API units, by the clock's idea of today"""
+
+    def __init__(self, store, daily_quota=DAILY_QUOTA, clock=None, tz=QUOTA_TZ):
+        self.store = store
+        self.daily_quota = daily_quota
+        self.clock = clock or SystemClock()
+        self.tz = tz
+
+    def day(self):
+        return quota_day(self.clock.now(), self.tz)
+
+    def remaining(self):
+        used, exhausted = self.store.quota_used(self.day())
+        return 0 if exhausted else max(0, self.daily_quota - used)
+
+    def charge(self, cost):
+        return self.store.charge(self.day(), cost, self.daily_quota)
+
+    def exhaust(self):
+        self.store.exhaust(self.day(), self.daily_quota)
+
+    def next_reset(self):
+        return next_reset(self.clock.now(), self.tz)
+
+
+class UploadScheduler:
+    """Feeds UploadPipeline one quota day at a time from the persistent queue"""
+
+    def __init__(self, metadata_fn, upload_fn, commit_fn, store=None, budget=None, clock=None,
+                 cost=UPLOAD_COST, in_flight=UPLOADS_IN_FLIGHT, pipeline_options=None):
+        self.metadata_fn = metadata_fn
+        self.upload_fn = upload_fn
+        self.commit_fn = commit_fn
+        self.clock = clock or SystemClock()
+        self.store = store or ScheduleStore()
+        self.budget = budget or QuotaBudget(self.store, clock=self.clock)
+        self.cost = cost
+        self.in_flight = in_flight
+        self.pipeline_options = pipeline_options or {}
+
+    def enqueue(self, jobs, order='oldest', publish_at=None):
+        return self.store.enqueue(jobs, order, publish_at)
+
+    def run_window(self):
+        """Upload as many due videos as today's remaining quota allows; returns stats"""
+        now = self.clock.now()
+        slots = self.budget.remaining() // self.cost
+        jobs = []
+        retry_before = day_start(now, self.budget.tz)
+        for job in self.store.due(now, slots, retry_before) if slots else []:
+            if os.path.exists(job['path']):
+                jobs.append(job)
+            else:
+                self.store.failed(job['name'], "video file missing", now)
+        stats = {'day': self.budget.day(), 'planned': len(jobs), 'uploaded': 0, 'failed': 0,
+                 'quota_hit': False, 'remaining_units': self.budget.remaining()}
+        if not jobs:
+            return stats
+
+        recorded, charged = set(), set()
+
+        def upload(video_path, metadata):
+            # Once per video: a pipeline retry resumes the same upload session
+            if video_path not in charged:
+                if not self.budget.charge(self.cost):
+                    raise QuotaExceeded(self.budget.day())
+                charged.add(video_path)
+            try:
+                return self.upload_fn(video_path, metadata)
+            except Exception as e:
+                if classify_upload_error(e) == 'quota':
+                    self.budget.exhaust()
+                    stats['quota_hit'] = True
+                raise
+
+        def commit(video_name, video_id, metadata):
+            # Recorded before the log: the video is on YouTube even if commit_fn fails
+            self.store.uploaded(video_name, video_id, self.clock.now())
+            recorded.add(video_name)
+            self.commit_fn(video_name, video_id, metadata)
+
+        pipeline = UploadPipeline(self.metadata_fn, upload, commit, in_flight=self.in_flight,
+                                  **self.pipeline_options)
+        result = pipeline.run(jobs)
+
+        # Metadata, upload and commit failures count against the video (so it is not
+        # due again today); quota casualties are not failures and just wait
+        for name, error in pipeline.errors.items():
+            if name not in recorded:
+                self.store.failed(name, error, self.clock.now())
+        stats.update(uploaded=result['uploaded'], failed=result['failed'],
+                     remaining_units=self.budget.remaining())
+        return stats
+
+    def run(self, once=False, max_days=None, report=print):
+        """Run windows day after day until the queue is empty (or once / max_days)"""
+        days = []
+        while True:
+            stats = self.run_window()
+            days.append(stats)
+            report(f"📅 {stats['day']}: uploaded {stats['uploaded']}/{stats['planned']}, "
+                   f"failed {stats['failed']}, {stats['remaining_units']} quota units left"
+                   + (" (API reported quota exhausted)" if stats['quota_hit'] else ""))
+
+            pending = self.store.pending()
+            if not pending or once or (max_days and len(days) >= max_days):
+                return days
+
+            # Failed videos wait for the next window too, so a bad file cannot eat a day's quota
+            wake = self.budget.next_reset() + RESET_MARGIN
+            slot = self.store.next_slot(self.clock.now())
+            if slot and self.budget.remaining() >= self.cost:
+                wake = min(wake, slot)
+            report(f"💤 {pending} videos waiting, resuming at "
+                   f"{datetime.fromtimestamp(wake).strftime('%Y-%m-%d %H:%M')}")
+            self.clock.sleep(wake - self.clock.now())
+
+    def _sleep_until(self, wake, *events, poll=1.0):
+        """Sleep on the clock until wake (None: no limit) or until one of events is set"""
+        while not any(event.is_set() for event in events):
+            now = self.clock.now()
+            if wake is not None and now >= wake:
+                return
+            self.clock.sleep(poll if wake is None else min(poll, wake - now))
+
+    def run_stream(self, jobs, order='oldest', report=print):
+        """Queue videos from a live source as they arrive and upload them as the quota allows
+
+        Sleeps through quota resets while the source keeps running; returns the
+        windows once the source ends. Videos the quota could not pay for stay queued.
+        """
+        arrived = threading.Event()
+        finished = threading.Event()
+
+        def feed():
+            try:
+                for job in jobs:
+                    if self.enqueue([job], order):
+                        arrived.set()
+            finally:
+                finished.set()
+
+        threading.Thread(target=feed, daemon=True).start()
+        windows = []
+        while True:
+            arrived.clear()
+            stats = self.run_window()
+            if stats['planned']:
+                windows.append(stats)
+                report(f"📅 {stats['day']}: uploaded {stats['uploaded']}/{stats['planned']}, "
+                       f"failed {stats['failed']}, {stats['remaining_units']} quota units left")
+
+            now = self.clock.now()
+            if self.budget.remaining() < self.cost:
+                if finished.is_set():
+                    return windows
+                wake = self.budget.next_reset() + RESET_MARGIN
+                report(f"💤 Quota spent, {self.store.pending()} videos queued, resuming at "
+                       f"{datetime.fromtimestamp(wake).strftime('%Y-%m-%d %H:%M')}")
+                self._sleep_until(wake, finished)
+            elif self.store.due(now, 1, day_start(now, self.budget.tz)):
+                continue
+            elif finished.is_set():
+                return windows
+            else:
+                # Nothing due: wait for a new video, a publish slot, or the reset
+                # that makes today's failures due again
+                wake = self.store.next_slot(now)
+                if self.store.pending():
+                    reset = self.budget.next_reset() + RESET_MARGIN
+                    wake = reset if wake is None else min(wake, reset)
+                self._sleep_until(wake, arrived, finished)
+
+
+if __name__ == "__main__":
+    store = ScheduleStore()
+    budget = QuotaBudget(store)
+    counts = store.counts()
+    print(f"📋 Queue: {', '.join(f'{state} {count}' for state, count in sorted(counts.items())) or 'empty'}")
+    print(f"🎫 Quota {budget.day()} (Pacific): {budget.remaining()} of {DAILY_QUOTA} units left, "
+          f"{budget.remaining() // UPLOAD_COST} uploads")
+    print(f"🔄 Next reset: {datetime.fromtimestamp(budget.next_reset()).strftime('%Y-%m-%d %H:%M')} local time")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Watch the render output folder and stream finished videos to the uploader
+- Uses inotify on Linux (via ctypes, no extra dependency), polling elsewhere
+- A QuizN.mp4 is ready once its QuizN.json sidecar exists (render-batch.js
+  writes it after the video) and the video size has stopped changing
+- Yields each ready video once as an upload job {'name', 'path'}
+
+Usage:
+    python video_watcher.py [folder]        # print videos as they become ready
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+
+SETTLE_SECONDS = 2.0
+POLL_INTERVAL = 1.0
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct('iIII')
+
+
+class _Inotify:
+    """Minimal inotify wrapper: names of files touched in one directory"""
+
+    def __init__(self, folder):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {folder}")
+
+    def read(self, timeout):
+        """Names with events in the next `timeout` seconds (empty on timeout)"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return set()
+            raise
+        names = set()
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            names.add(os.fsdecode(data[offset:offset + length].rstrip(b'\0')))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _video_number(name):
+    digits = ''.join(c for c in name if c.isdigit())
+    return int(digits) if digits else 0
+
+
+class VideoWatcher:
+    """Iterate over upload jobs as videos in `folder` finish rendering
+
+    skip: filenames never to yield (e.g. the upload ledger's filenames())
+    idle_timeout: stop after this many seconds with nothing new (None = forever)
+    """
+
+    def __init__(self, folder, skip=(), settle_seconds=SETTLE_SECONDS,
+                 poll_interval=POLL_INTERVAL, idle_timeout=None, use_inotify=True):
+        self.folder = folder
+        self.skip = set(skip)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.use_inotify = use_inotify
+        self.stopped = threading.Event()
+        self.backend = None
+        self._seen = {}      # video name -> (size, mtime_ns, first seen at that size)
+        self._dir_mtime = None
+        self._changed_at = 0.0
+
+    def stop(self):
+        """Make the iterator finish after its current wait"""
+        self.stopped.set()
+
+    def _open_backend(self):
+        if self.use_inotify and sys.platform.startswith('linux'):
+            try:
+                self.backend = 'inotify'
+                return _Inotify(self.folder)
+            except OSError as e:
+                print(f"⚠️ inotify unavailable ({e}), polling {self.folder}/ instead")
+        self.backend = 'polling'
+        return None
+
+    def _scan(self):
+        """Video names in the folder, re-listed only when the directory changed"""
+        mtime = os.stat(self.folder).st_mtime_ns
+        if mtime == self._dir_mtime:
+            return set()
+        self._dir_mtime = mtime
+        return {entry.name for entry in os.scandir(self.folder)}
+
+    def _ready(self, name, now):
+        """True once the video has a newer sidecar and a size stable for settle_seconds"""
+        path = os.path.join(self.folder, name)
+        try:
+            video = os.stat(path)
+            sidecar = os.stat(os.path.splitext(path)[0] + '.json')
+        except FileNotFoundError:
+            return False
+        if sidecar.st_mtime_ns < video.st_mtime_ns:
+            return False  # sidecar from an earlier render; this one is still in progress
+
+        state = (video.st_size, video.st_mtime_ns)
+        previous = self._seen.get(name)
+        if previous is None or previous[:2] != state:
+            self._seen[name] = state + (now,)
+            self._changed_at = now
+            return False
+        return video.st_size > 0 and now - previous[2] >= self.settle_seconds
+
+    def __iter__(self):
+        os.makedirs(self.folder, exist_ok=True)
+        notifier = self._open_backend()
+        print(f"👀 Watching {self.folder}/ for rendered videos ({self.backend})")
+        candidates = set()
+        last_activity = time.monotonic()
+        try:
+            candidates |= self._scan()
+            while not self.stopped.is_set():
+                # A sidecar event stands for its video
+                candidates = {os.path.splitext(name)[0] + '.mp4' for name in candidates
+                              if name.startswith('Quiz') and name.endswith(('.mp4', '.json'))}
+                candidates -= self.skip
+                now = time.monotonic()
+                for video in sorted(candidates, key=_video_number):
+                    if self._ready(video, now):
+                        candidates.discard(video)
+                        self.skip.add(video)
+                        self._seen.pop(video, None)
+                        last_activity = now
+                        yield {'name': video, 'path': os.path.join(self.folder, video)}
+
+                # A video still being written counts as activity even without new events
+                last_activity = max(last_activity, self._changed_at)
+                if self.idle_timeout is not None and time.monotonic() - last_activity >= self.idle_timeout:
+                    return
+
+                # Wake up early for new events, but re-check pending files every settle period
+                timeout = min(self.poll_interval, self.settle_seconds) if candidates else self.poll_interval
+                if notifier:
+                    names = notifier.read(timeout)
+                else:
+                    self.stopped.wait(timeout)
+                    names = self._scan()
+                if names:
+                    last_activity = time.monotonic()
+                candidates |= names
+        finally:
+            if notifier:
+                notifier.close()
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else 'output'
+    try:
+        for job in VideoWatcher(folder):
+            print(f"🎞️  Ready: {job['path']}")
+    except KeyboardInterrupt:
+        pass
@@ -1,21 +1,34 @@
 #!/usr/bin/env python3
 """
 YouTube Shorts Auto-Upload Automation
-- Monitors Google Drive folder for new videos
-- Uses Gemini Pro for SEO optimization
-- Uploads to YouTube with optimized metadata
+- Monitors Google Drive folder for new videos (--drive: Changes API deltas,
+  resumable downloads into the output folder)
+- Uses Gemini Pro for SEO optimization, with offline TF-IDF tags as fallback
+  (or instead: --metadata-mode offline, or prefilter for shorter prompts)
+- Uploads to YouTube with optimized metadata, no more per day than the API
+  quota pays for; `schedule`, --watch and --drive keep going across quota
+  resets (videos wait in the schedule queue until the quota is back)
+- Google SDKs load lazily, so status / dry-run start in a fraction of a second
+
+Usage:
+    python youtube_automation.py [upload] [--watch | --drive] [--idle N] [--metadata-mode MODE]
+    python youtube_automation.py schedule [--once] [--order oldest|newest]
+    python youtube_automation.py status | metadata | dry-run [--folder output]
 """
 
 import os
 import json
 import time
-import google.generativeai as genai
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-import pickle
+import argparse
+from metadata_engine import MetadataEngine, GeminiModel, MODES as METADATA_MODES
+from offline_tagger import LazyTagger
+from resumable_upload import ResumableUploader, UploadSessionStore
+from upload_ledger import UploadLedger
+from youtube_client import YouTubeClientManager
+from video_watcher import VideoWatcher
+from drive_ingest import DriveIngest, DriveClient
+from upload_scheduler import UploadScheduler, ScheduleStore, QuotaBudget, UPLOAD_COST, quiz_number
+from metrics import metrics, profiled
 
 # ============= CONFIGURATION =============
 DRIVE_FOLDER_ID = "1dQCg_4N5J3_Rr5N9Q1FWYYpIEU7jjG9F"
@@ -30,100 +43,77 @@ SCOPES = ['https://www.googleapis.com/auth/youtube.upload',
 BASE_CATEGORY = "27"  # Education
 DEFAULT_LANGUAGE = "en"
 PRIVACY_STATUS = "public"  # or "private", "unlisted"
+UPLOADS_IN_FLIGHT = 3  # concurrent uploads
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # multiple of 256 KiB
+METADATA_MODE = "fallback"  # "gemini", "fallback", "offline" or "prefilter"
 
 # ============= GEMINI PRO SETUP =============
-genai.configure(api_key=GEMINI_API_KEY)
-gemini_model = genai.GenerativeModel('gemini-1.5-flash')
-
-def generate_seo_metadata(video_number, mcq_question=None):
-    """Generate optimized title, description, and tags using Gemini Pro"""
-    
-    prompt = f"""
-Create highly engaging YouTube Shorts metadata for a PPSC/FPSC exam preparation quiz video #{video_number}.
-
-Requirements:
-- Title: Catchy, under 60 characters, includes keywords like "PPSC", "MCQ", "Quiz"
-- Description: 2-3 lines, SEO optimized, includes exam preparation keywords
-- Tags: 15-20 relevant tags for Pakistani competitive exams, general knowledge, education
-- Make it appealing for students, job seekers, and exam candidates
-- Include trending education hashtags
-
-{f"Question preview: {mcq_question}" if mcq_question else ""}
-
-Return ONLY valid JSON in this format:
-{{
-  "title": "...",
-  "description": "...",
-  "tags": ["tag1", "tag2", ...]
-}}
-"""
-    
-    try:
-        response = gemini_model.generate_content(prompt)
-        # Extract JSON from response
-        response_text = response.text.strip()
-        
-        # Try to parse JSON
-        if "```json" in response_text:
-            json_str = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            json_str = response_text.split("```")[1].split("```")[0].strip()
-        else:
-            json_str = response_text
-            
-        metadata = json.loads(json_str)
-        
-        # Add default tags if not enough
-        base_tags = ["PPSC", "FPSC", "MCQs", "Pakistan", "Jobs", "Exams", "Quiz", 
-                     "General Knowledge", "Competitive Exams", "CSS", "PMS"]
-        all_tags = list(set(metadata.get("tags", []) + base_tags))[:30]
-        
-        return {
-            "title": metadata.get("title", f"PPSC MCQ #{video_number}"),
-            "description": metadata.get("description", ""),
-            "tags": all_tags
-        }
-        
-    except Exception as e:
-        print(f"⚠️ Gemini error: {e}, using fallback metadata")
+# Configured on the first uncached metadata request, not at import time
+gemini_model = GeminiModel(GEMINI_API_KEY, 'gemini-1.5-flash')
+
+# Offline TF-IDF tagger, loaded from temp/tagger_model.json on first use
+offline_tagger = LazyTagger()
+
+metadata_engine = MetadataEngine(gemini_model, tagger=offline_tagger, mode=METADATA_MODE)
+
+def _seo_item(video_number, mcq=None, mcq_question=None):
+    """Cache/prompt item for a video: its MCQ if known, else the video number"""
+    if mcq:
+        return mcq
+    item = {"video_number": str(video_number)}
+    if mcq_question:
+        item["question"] = mcq_question
+    return item
+
+def _finish_seo_metadata(metadata, video_number):
+    """Add base tags to Gemini / offline metadata, or build the fallback when both are missing"""
+    if metadata is None:
+        print(f"⚠️ No metadata for #{video_number}, using fallback metadata")
         return {
             "title": f"PPSC General Knowledge MCQ #{video_number} | Exam Preparation",
             "description": f"Test your knowledge with this PPSC/FPSC exam MCQ! Perfect for competitive exam preparation. #PPSC #FPSC #MCQs #{video_number}",
             "tags": ["PPSC", "FPSC", "MCQs", "Pakistan Jobs", "Exams", "Quiz", "CSS", "PMS", "General Knowledge"]
         }
+    
+    # Add default tags if not enough
+    base_tags = ["PPSC", "FPSC", "MCQs", "Pakistan", "Jobs", "Exams", "Quiz", 
+                 "General Knowledge", "Competitive Exams", "CSS", "PMS"]
+    all_tags = list(dict.fromkeys(metadata.get("tags", []) + base_tags))[:30]
+    
+    return {
+        "title": metadata.get("title") or f"PPSC MCQ #{video_number}",
+        "description": metadata.get("description", ""),
+        "tags": all_tags
+    }
+
+@metrics.timed('metadata_seconds')
+def generate_seo_metadata(video_number, mcq_question=None, mcq=None):
+    """Generate optimized title, description, and tags using Gemini Pro (cached)"""
+    metadata = metadata_engine.generate_one(_seo_item(video_number, mcq, mcq_question))
+    return _finish_seo_metadata(metadata, video_number)
+
+@metrics.timed('metadata_batch_seconds')
+def generate_seo_metadata_batch(videos):
+    """Metadata for many (video_number, mcq) pairs with as few Gemini calls as possible"""
+    items = [_seo_item(video_number, mcq) for video_number, mcq in videos]
+    results = metadata_engine.generate(items)
+    return [_finish_seo_metadata(metadata, video_number)
+            for (video_number, _), metadata in zip(videos, results)]
+
+# One authenticated client per process, shared by every upload
+youtube_clients = YouTubeClientManager(CLIENT_SECRET_FILE, SCOPES, pool_size=UPLOADS_IN_FLIGHT * 2)
+
+def get_credentials():
+    """Load, refresh or create OAuth credentials"""
+    return youtube_clients.credentials()
 
 def get_youtube_service():
     """Authenticate and return YouTube API service"""
-    creds = None
-    token_pickle = 'temp/youtube_token.pickle'
-    
-    # Load from pickle if exists
-    if os.path.exists(token_pickle):
-        with open(token_pickle, 'rb') as token:
-            creds = pickle.load(token)
-    
-    # Refresh or re-authenticate
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            print("🔄 Refreshing access token...")
-            creds.refresh(Request())
-        else:
-            print("🔐 Starting OAuth authentication...")
-            print("   A browser window will open for authorization.")
-            flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRET_FILE, SCOPES)
-            creds = flow.run_local_server(port=0)
-        
-        # Save credentials to pickle
-        with open(token_pickle, 'wb') as token:
-            pickle.dump(creds, token)
-        print("✅ Authentication successful!")
-    
-    return build('youtube', 'v3', credentials=creds)
+    return youtube_clients.service()
 
+@metrics.timed('upload_seconds')
 def upload_to_youtube(video_path, metadata):
-    """Upload video to YouTube"""
-    youtube = get_youtube_service()
-    
+    """Upload video to YouTube in resumable chunks (restarts continue from the last confirmed byte)"""
     body = {
         'snippet': {
             'title': metadata['title'],
@@ -142,21 +132,14 @@ def upload_to_youtube(video_path, metadata):
     if '#Shorts' not in body['snippet']['description']:
         body['snippet']['description'] += '\n\n#Shorts'
     
-    media = MediaFileUpload(video_path, chunksize=-1, resumable=True, mimetype='video/mp4')
-    
     print(f"📤 Uploading: {metadata['title']}")
     
-    request = youtube.videos().insert(
-        part=','.join(body.keys()),
-        body=body,
-        media_body=media
-    )
-    
-    response = None
-    while response is None:
-        status, response = request.next_chunk()
-        if status:
-            print(f"   Upload progress: {int(status.progress() * 100)}%")
+    with youtube_clients.timed('upload'):
+        uploader = ResumableUploader(youtube_clients.session(), chunk_size=UPLOAD_CHUNK_SIZE)
+        response = uploader.upload(
+            video_path, body, part=','.join(body.keys()),
+            progress=lambda done: print(f"   Upload progress: {int(done * 100)}%")
+        )
     
     video_id = response['id']
     print(f"✅ Uploaded! Video ID: {video_id}")
@@ -164,29 +147,42 @@ def upload_to_youtube(video_path, metadata):
     
     return video_id
 
+upload_ledger = UploadLedger()
+
 def get_uploaded_videos_log():
     """Get list of already uploaded videos"""
-    log_file = "temp/uploaded_videos.json"
-    if os.path.exists(log_file):
-        with open(log_file, 'r') as f:
-            return json.load(f)
-    return []
+    return upload_ledger.entries()
 
 def log_uploaded_video(video_name, video_id, metadata):
     """Log uploaded video"""
-    log_file = "temp/uploaded_videos.json"
-    uploaded = get_uploaded_videos_log()
-    
-    uploaded.append({
-        'filename': video_name,
-        'video_id': video_id,
-        'url': f'https://youtube.com/shorts/{video_id}',
-        'title': metadata['title'],
-        'uploaded_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-    })
-    
-    with open(log_file, 'w') as f:
-        json.dump(uploaded, f, indent=2)
+    upload_ledger.record(video_name, video_id, metadata)
+
+def load_video_mcq(video_path):
+    """MCQ from the QuizN.json sidecar written next to a rendered video, if any"""
+    sidecar = os.path.splitext(video_path)[0] + '.json'
+    if not os.path.exists(sidecar):
+        return None
+    with open(sidecar, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _pipeline_metadata(jobs):
+    """Pipeline stage 1: batched SEO metadata for upload jobs"""
+    videos = [(job['name'].replace('Quiz', '').replace('.mp4', ''), load_video_mcq(job['path']))
+              for job in jobs]
+    all_metadata = generate_seo_metadata_batch(videos)
+    for job, metadata in zip(jobs, all_metadata):
+        print(f"📝 {job['name']}: {metadata['title']} | {', '.join(metadata['tags'][:5])}...")
+    return all_metadata
+
+def _pipeline_upload(video_path, metadata):
+    """Pipeline stage 2: one upload (called from several worker threads)"""
+    print(f"\n🎬 Processing: {os.path.basename(video_path)}")
+    return upload_to_youtube(video_path, metadata)
+
+def list_local_videos(video_folder="output"):
+    """Video filenames in the folder, in quiz order"""
+    videos = [f for f in os.listdir(video_folder) if f.endswith('.mp4')]
+    return sorted(videos, key=lambda name: (quiz_number(name), name))
 
 def process_local_videos(video_folder="output"):
     """Process videos from local folder"""
@@ -194,49 +190,206 @@ def process_local_videos(video_folder="output"):
         print(f"❌ Video folder not found: {video_folder}")
         return
     
-    videos = [f for f in os.listdir(video_folder) if f.endswith('.mp4')]
-    uploaded_log = get_uploaded_videos_log()
-    uploaded_names = [v['filename'] for v in uploaded_log]
+    videos = list_local_videos(video_folder)
+    uploaded_names = upload_ledger.filenames()
     
     print(f"📁 Found {len(videos)} videos in {video_folder}/")
     print(f"✅ Already uploaded: {len(uploaded_names)}")
     
-    for video_file in sorted(videos):
+    pending = []
+    for video_file in videos:
         if video_file in uploaded_names:
             print(f"⏭️  Skipping (already uploaded): {video_file}")
             continue
-        
-        video_path = os.path.join(video_folder, video_file)
-        video_number = video_file.replace('Quiz', '').replace('.mp4', '')
-        
-        print(f"\n🎬 Processing: {video_file}")
-        
-        # Generate SEO metadata
-        metadata = generate_seo_metadata(video_number)
-        print(f"   Title: {metadata['title']}")
-        print(f"   Tags: {', '.join(metadata['tags'][:5])}...")
-        
-        # Upload to YouTube
-        try:
-            video_id = upload_to_youtube(video_path, metadata)
-            log_uploaded_video(video_file, video_id, metadata)
-            
-            # Wait between uploads to avoid rate limits
-            print("   ⏳ Waiting 10 seconds before next upload...")
-            time.sleep(10)
-            
-        except Exception as e:
-            print(f"❌ Upload failed: {e}")
-            continue
+        pending.append(video_file)
+    
+    # Only as many as today's quota pays for; the rest stays queued for the next reset
+    jobs = [{'name': video_file, 'path': os.path.join(video_folder, video_file)} for video_file in pending]
+    scheduler = _scheduler(jobs, uploaded_names)
+    start = time.monotonic()
+    with profiled('youtube_automation'):
+        stats = scheduler.run_window()
+    
+    print(f"\n📊 Uploaded {stats['uploaded']}, failed {stats['failed']}, "
+          f"queued for later {scheduler.store.pending()} in {time.monotonic() - start:.0f}s "
+          f"({metadata_engine.llm_calls} Gemini calls, {stats['remaining_units']} quota units left)")
+    for line in youtube_clients.report():
+        print(f"   ⏱️  {line}")
+    report_metrics()
 
-if __name__ == "__main__":
+def _scheduler(jobs, uploaded_names, order='oldest'):
+    """Upload scheduler with jobs queued (videos uploaded some other way are marked done)"""
+    scheduler = UploadScheduler(_pipeline_metadata, _pipeline_upload, log_uploaded_video,
+                                in_flight=UPLOADS_IN_FLIGHT)
+    scheduler.store.mark_done(uploaded_names)
+    added = scheduler.enqueue(jobs, order)
+    if added:
+        print(f"📋 Queued {added} new videos ({scheduler.store.pending()} waiting)")
+    return scheduler
+
+def schedule_uploads(video_folder="output", once=False, order='oldest'):
+    """Upload the backlog a quota day at a time, sleeping through each reset"""
+    if not os.path.exists(video_folder):
+        print(f"❌ Video folder not found: {video_folder}")
+        return
+    
+    scheduler = _scheduler(_pending_jobs(video_folder), upload_ledger.filenames(), order)
+    print(f"🎫 {scheduler.budget.remaining()} quota units left today "
+          f"({scheduler.budget.remaining() // UPLOAD_COST} uploads)")
+    try:
+        with profiled('youtube_automation'):
+            days = scheduler.run(once=once)
+    except KeyboardInterrupt:
+        print("\n>>> Stopping scheduler (queue is kept) <<<")
+        return
+    finally:
+        report_metrics()
+    
+    print(f"\n📊 Uploaded {sum(day['uploaded'] for day in days)} over {len(days)} quota days, "
+          f"{scheduler.store.pending()} still queued")
+
+def report_metrics():
+    """Print the run's metrics and write them to temp/metrics/youtube_automation.*"""
+    print("\n📈 Upload metrics:")
+    for line in metrics.report():
+        print(f"   {line}")
+    print(f"   (written to {', '.join(metrics.write('youtube_automation'))})")
+
+def watch_local_videos(video_folder="output", idle_timeout=None):
+    """Upload videos as soon as they finish rendering (runs alongside the renderer)"""
+    uploaded_names = upload_ledger.filenames()
+    print(f"✅ Already uploaded: {len(uploaded_names)}")
+    
+    # The watcher picks up the existing backlog first, then new renders as they land;
+    # they queue in the schedule store and upload as today's quota allows
+    watcher = VideoWatcher(video_folder, skip=uploaded_names, idle_timeout=idle_timeout)
+    scheduler = _scheduler([], uploaded_names)
+    try:
+        with profiled('youtube_automation'):
+            days = scheduler.run_stream(watcher)
+    except KeyboardInterrupt:
+        print("\n>>> Stopping watch mode (queue is kept) <<<")
+        return
+    finally:
+        watcher.stop()
+        report_metrics()
+    
+    print(f"\n📊 Uploaded {sum(day['uploaded'] for day in days)}, failed {sum(day['failed'] for day in days)}, "
+          f"{scheduler.store.pending()} still queued ({metadata_engine.llm_calls} Gemini calls)")
+
+def ingest_drive_videos(video_folder="output", idle_timeout=None):
+    """Download new videos from DRIVE_FOLDER_ID and upload each pair as it lands"""
+    uploaded_names = upload_ledger.filenames()
+    print(f"✅ Already uploaded: {len(uploaded_names)}")
+    
+    ingest = DriveIngest(DRIVE_FOLDER_ID, DriveClient(youtube_clients.session()), dest=video_folder,
+                         skip=uploaded_names, idle_timeout=idle_timeout)
+    scheduler = _scheduler([], uploaded_names)
+    try:
+        with profiled('youtube_automation'):
+            days = scheduler.run_stream(ingest)
+    except KeyboardInterrupt:
+        print("\n>>> Stopping Drive ingest (queue is kept) <<<")
+        return
+    finally:
+        ingest.stop()
+        report_metrics()
+    
+    print(f"\n📊 Uploaded {sum(day['uploaded'] for day in days)}, failed {sum(day['failed'] for day in days)}, "
+          f"{scheduler.store.pending()} still queued ({metadata_engine.llm_calls} Gemini calls)")
+
+def _pending_jobs(video_folder):
+    uploaded_names = upload_ledger.filenames()
+    return [{'name': name, 'path': os.path.join(video_folder, name)}
+            for name in list_local_videos(video_folder) if name not in uploaded_names]
+
+def show_status(video_folder="output"):
+    """Videos, uploads, cached metadata and interrupted uploads (no API calls)"""
+    videos = list_local_videos(video_folder) if os.path.exists(video_folder) else []
+    uploaded_names = upload_ledger.filenames()
+    pending = [name for name in videos if name not in uploaded_names]
+    sessions = UploadSessionStore().sessions()
+    
+    print(f"📁 Videos in {video_folder}/: {len(videos)}")
+    print(f"✅ Uploaded: {len(uploaded_names)}")
+    print(f"⏳ Pending upload: {len(pending)}" + (f" (next: {', '.join(pending[:5])})" if pending else ""))
+    print(f"🧠 Cached metadata: {len(metadata_engine.cache)}")
+    store = ScheduleStore()
+    budget = QuotaBudget(store)
+    failed = store.counts().get('failed', 0)
+    print(f"🎫 Quota today: {budget.remaining()} units left ({budget.remaining() // UPLOAD_COST} uploads)"
+          + (f", {failed} videos parked after repeated failures" if failed else ""))
+    store.close()
+    if sessions:
+        print(f"↪️  Interrupted uploads to resume: {len(sessions)}")
+        for path, session in sessions.items():
+            print(f"   {path}: {session['offset'] / session['size']:.0%}")
+
+def generate_pending_metadata(video_folder="output"):
+    """Generate (and cache) metadata for every pending video without uploading"""
+    jobs = _pending_jobs(video_folder)
+    print(f"📝 Generating metadata for {len(jobs)} pending videos")
+    for i in range(0, len(jobs), metadata_engine.batch_size):
+        _pipeline_metadata(jobs[i:i + metadata_engine.batch_size])
+    print(f"✓ {metadata_engine.llm_calls} Gemini calls, {len(metadata_engine.cache)} cached entries")
+
+def dry_run(video_folder="output"):
+    """Show what an upload run would do, using cached metadata only (no Gemini, no YouTube)"""
+    jobs = _pending_jobs(video_folder)
+    offline = MetadataEngine(None, cache=metadata_engine.cache, tagger=offline_tagger, mode=metadata_engine.mode)
+    videos = [(job['name'].replace('Quiz', '').replace('.mp4', ''), load_video_mcq(job['path'])) for job in jobs]
+    results = offline.generate([_seo_item(number, mcq) for number, mcq in videos])
+    sources = [metadata.get('source', 'cached') if metadata is not None else 'fallback' for metadata in results]
+    for job, (number, _), metadata, source in zip(jobs, videos, results, sources):
+        title = _finish_seo_metadata(metadata, number)['title']
+        print(f"🔎 {job['name']}: {title} ({source})")
+    print(f"\n📊 Would upload {len(jobs)} videos ({sources.count('cached')} with cached metadata, "
+          f"{len(jobs) - sources.count('cached')} without: {sources.count('offline')} offline, "
+          f"{sources.count('fallback')} fixed fallback; mode {metadata_engine.mode})")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="YouTube Shorts upload automation")
+    parser.add_argument('command', nargs='?', default='upload',
+                        choices=['upload', 'schedule', 'status', 'metadata', 'dry-run'])
+    parser.add_argument('--folder', default='output', help="rendered videos folder")
+    parser.add_argument('--watch', action='store_true', help="upload while rendering is still running")
+    parser.add_argument('--drive', action='store_true', help="fetch new videos from the Drive folder and upload them")
+    parser.add_argument('--idle', type=float, default=None,
+                        help="with --watch / --drive: exit after N quiet seconds")
+    parser.add_argument('--once', action='store_true', help="with schedule: stop after today's quota window")
+    parser.add_argument('--order', choices=['oldest', 'newest'], default='oldest',
+                        help="with schedule: which quiz numbers go first")
+    parser.add_argument('--metadata-mode', choices=METADATA_MODES, default=METADATA_MODE,
+                        help="gemini, offline tags as fallback, offline only, or offline-prefiltered prompts")
+    args = parser.parse_args(argv)
+    metadata_engine.mode = args.metadata_mode
+    
+    if args.command == 'status':
+        show_status(args.folder)
+        return
+    if args.command == 'metadata':
+        generate_pending_metadata(args.folder)
+        return
+    if args.command == 'dry-run':
+        dry_run(args.folder)
+        return
+    
     print("=" * 60)
     print("🚀 YouTube Shorts Auto-Upload Starting...")
     print("=" * 60)
     
-    # Process local videos first
-    process_local_videos("output")
+    if args.command == 'schedule':
+        schedule_uploads(args.folder, once=args.once, order=args.order)
+    elif args.drive:
+        ingest_drive_videos(args.folder, idle_timeout=args.idle)
+    elif args.watch:
+        watch_local_videos(args.folder, idle_timeout=args.idle)
+    else:
+        process_local_videos(args.folder)
     
     print("\n" + "=" * 60)
     print("✅ Upload session complete!")
     print("=" * 60)
+
+if __name__ == "__main__":
+    main()
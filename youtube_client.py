@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Process-wide YouTube client manager
+- Loads/refreshes OAuth credentials once and refreshes them shortly before expiry
+- One pooled AuthorizedSession shared by all upload threads
+- One discovery-built service per thread (httplib2 is not thread-safe)
+- Timing counters for auth, refresh and build overhead
+- The Google SDKs are imported on first use, so importing this module is cheap
+"""
+
+import os
+import time
+import pickle
+import datetime
+import threading
+from contextlib import contextmanager
+
+TOKEN_FILE = 'temp/youtube_token.pickle'
+REFRESH_MARGIN = 300  # seconds before expiry to refresh
+POOL_SIZE = 10
+
+
+class YouTubeClientManager:
+    def __init__(self, client_secrets_file, scopes, token_file=TOKEN_FILE,
+                 refresh_margin=REFRESH_MARGIN, pool_size=POOL_SIZE):
+        self.client_secrets_file = client_secrets_file
+        self.scopes = scopes
+        self.token_file = token_file
+        self.refresh_margin = refresh_margin
+        self.pool_size = pool_size
+        self._creds = None
+        self._session = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._timings_lock = threading.Lock()
+        self.timings = {}
+
+    @contextmanager
+    def timed(self, name):
+        """Context manager adding the elapsed time to a named counter"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._timings_lock:
+                count, total = self.timings.get(name, (0, 0.0))
+                self.timings[name] = (count + 1, total + elapsed)
+
+    def _save(self, creds):
+        with open(self.token_file, 'wb') as token:
+            pickle.dump(creds, token)
+
+    def _load(self):
+        """Load, refresh or create credentials (first use only)"""
+        creds = None
+        if os.path.exists(self.token_file):
+            with open(self.token_file, 'rb') as token:
+                creds = pickle.load(token)
+
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                from google.auth.transport.requests import Request
+                print("🔄 Refreshing access token...")
+                with self.timed('refresh'):
+                    creds.refresh(Request())
+            else:
+                from google_auth_oauthlib.flow import InstalledAppFlow
+                print("🔐 Starting OAuth authentication...")
+                print("   A browser window will open for authorization.")
+                flow = InstalledAppFlow.from_client_secrets_file(self.client_secrets_file, self.scopes)
+                creds = flow.run_local_server(port=0)
+            self._save(creds)
+            print("✅ Authentication successful!")
+        return creds
+
+    def _expires_soon(self, creds):
+        if creds.expiry is None:
+            return False
+        # google-auth keeps expiry as a naive UTC datetime; compare both as aware UTC
+        expiry = creds.expiry
+        if expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=datetime.timezone.utc)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return expiry - now < datetime.timedelta(seconds=self.refresh_margin)
+
+    def credentials(self):
+        """Shared credentials, refreshed proactively near expiry"""
+        with self._lock:
+            creds = self._creds
+        if creds is None:
+            with self._refresh_lock:
+                if self._creds is None:
+                    with self.timed('load_credentials'):
+                        self._creds = self._load()
+                return self._creds
+
+        if self._expires_soon(creds) and creds.refresh_token:
+            # Only block if the token is actually expired; otherwise let another thread refresh
+            if self._refresh_lock.acquire(blocking=not creds.valid):
+                try:
+                    if self._expires_soon(creds):
+                        from google.auth.transport.requests import Request
+                        with self.timed('refresh'):
+                            creds.refresh(Request())
+                        self._save(creds)
+                finally:
+                    self._refresh_lock.release()
+        return creds
+
+    def session(self):
+        """Pooled AuthorizedSession shared across threads"""
+        creds = self.credentials()
+        with self._lock:
+            if self._session is None:
+                from requests.adapters import HTTPAdapter
+                from google.auth.transport.requests import AuthorizedSession
+                with self.timed('session'):
+                    session = AuthorizedSession(creds)
+                    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size)
+                    session.mount('https://', adapter)
+                    self._session = session
+            return self._session
+
+    def service(self):
+        """YouTube Data API service, built once per thread"""
+        creds = self.credentials()
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            from googleapiclient.discovery import build
+            with self.timed('build'):
+                service = build('youtube', 'v3', credentials=creds)
+            self._local.service = service
+        return service
+
+    def report(self):
+        """One line per timing counter: count, total and mean milliseconds"""
+        with self._timings_lock:
+            timings = dict(self.timings)
+        return [f"{name}: {count}x, {total * 1000:.0f} ms total, {total / count * 1000:.1f} ms avg"
+                for name, (count, total) in sorted(timings.items())]
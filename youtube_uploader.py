@@ -4,90 +4,50 @@ YouTube Shorts Auto-Uploader with Gemini AI SEO Optimization
 """
 
 import os
-import json
-import pickle
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-import google.generativeai as genai
+from mcq_dataset import MCQDataset
+from metadata_engine import MetadataEngine, GeminiModel
+from offline_tagger import LazyTagger
+from resumable_upload import ResumableUploader
+from youtube_client import YouTubeClientManager
+from metrics import metrics
 
 # YouTube API scopes
 SCOPES = ['https://www.googleapis.com/auth/youtube.upload', 
           'https://www.googleapis.com/auth/youtube.force-ssl']
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # multiple of 256 KiB
 
 class YouTubeUploader:
-    def __init__(self, client_secrets_file, gemini_api_key):
+    def __init__(self, client_secrets_file, gemini_api_key, chunk_size=UPLOAD_CHUNK_SIZE):
         self.client_secrets_file = client_secrets_file
+        self.chunk_size = chunk_size
+        self.clients = None
+        self.creds = None
         self.youtube = None
-        self.gemini_model = None
         
-        # Configure Gemini
-        genai.configure(api_key=gemini_api_key)
-        self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
+        # Gemini is configured on the first metadata request; offline tags cover its failures
+        self.gemini_model = GeminiModel(gemini_api_key)
+        self.metadata_engine = MetadataEngine(self.gemini_model, tagger=LazyTagger(), mode="fallback")
         
     def authenticate(self):
         """Authenticate with YouTube API"""
-        creds = None
-        token_file = 'temp/youtube_token.pickle'
-        
-        # Load existing credentials
-        if os.path.exists(token_file):
-            with open(token_file, 'rb') as token:
-                creds = pickle.load(token)
-        
-        # Refresh or create new credentials
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.client_secrets_file, SCOPES)
-                creds = flow.run_local_server(port=0)
-            
-            # Save credentials
-            with open(token_file, 'wb') as token:
-                pickle.dump(creds, token)
-        
-        self.youtube = build('youtube', 'v3', credentials=creds)
+        self.clients = YouTubeClientManager(self.client_secrets_file, SCOPES)
+        self.creds = self.clients.credentials()
+        self.youtube = self.clients.service()
         print("✓ Authenticated with YouTube")
         return True
     
+    @metrics.timed('metadata_seconds')
     def generate_metadata(self, mcq_data):
-        """Generate SEO-optimized metadata using Gemini"""
-        prompt = f"""Generate YouTube Shorts metadata for this educational MCQ:
-
-Question: {mcq_data['question']}
-Options: {', '.join(mcq_data['options'])}
-Correct Answer: {mcq_data['options'][mcq_data['correctAnswer']]}
-
-Generate:
-1. A catchy title (max 100 chars) for YouTube Shorts - make it engaging for kids and adults
-2. A description (max 500 chars) with relevant emojis
-3. 10 relevant tags (comma-separated)
-
-Format as JSON:
-{{
-  "title": "...",
-  "description": "...",
-  "tags": "tag1, tag2, tag3..."
-}}
-"""
-        
-        try:
-            response = self.gemini_model.generate_content(prompt)
-            # Extract JSON from response
-            text = response.text
-            # Find JSON in response
-            start = text.find('{')
-            end = text.rfind('}') + 1
-            if start != -1 and end != 0:
-                metadata = json.loads(text[start:end])
-                return metadata
-        except Exception as e:
-            print(f"⚠ Gemini error: {e}, using default metadata")
+        """Generate SEO-optimized metadata using Gemini (batched engine, cached on disk)"""
+        metadata = self.metadata_engine.generate_one(mcq_data)
+        if metadata is not None:
+            return {
+                "title": metadata['title'],
+                "description": metadata['description'],
+                "tags": ', '.join(metadata['tags'])
+            }
         
+        print("⚠ No Gemini or offline metadata, using default metadata")
         # Fallback metadata
         return {
             "title": f"🧠 Quiz Challenge: {mcq_data['question'][:60]}",
@@ -95,6 +55,7 @@ Format as JSON:
             "tags": "quiz, education, general knowledge, mcq, test, shorts, learning"
         }
     
+    @metrics.timed('upload_seconds')
     def upload_video(self, video_file, mcq_data):
         """Upload video to YouTube"""
         if not self.youtube:
@@ -122,25 +83,15 @@ Format as JSON:
             }
         }
         
-        # Upload video
-        media = MediaFileUpload(video_file, 
-                               chunksize=-1, 
-                               resumable=True,
-                               mimetype='video/mp4')
-        
+        # Upload video in resumable chunks (a restart resumes from the last confirmed byte)
         print(f"📤 Uploading: {os.path.basename(video_file)}")
         
-        request = self.youtube.videos().insert(
-            part='snippet,status',
-            body=body,
-            media_body=media
-        )
-        
-        response = None
-        while response is None:
-            status, response = request.next_chunk()
-            if status:
-                print(f"  Progress: {int(status.progress() * 100)}%")
+        with self.clients.timed('upload'):
+            uploader = ResumableUploader(self.clients.session(), chunk_size=self.chunk_size)
+            response = uploader.upload(
+                video_file, body, part='snippet,status',
+                progress=lambda done: print(f"  Progress: {int(done * 100)}%")
+            )
         
         video_id = response['id']
         print(f"✓ Uploaded! Video ID: {video_id}")
@@ -163,25 +114,26 @@ def main():
         print("✗ Authentication failed")
         return
     
-    # Load MCQ data
-    with open('mcqs_data/gk/gk_mcqs.json', 'r', encoding='utf-8') as f:
-        mcqs = json.load(f)
-    
-    print(f"\n📚 Loaded {len(mcqs)} MCQs")
-    
-    # Test with first video
-    test_video = 'output/Quiz1.mp4'
-    if os.path.exists(test_video):
-        print(f"\n🎬 Testing with: {test_video}")
-        mcq_data = mcqs[0]
-        
-        video_id = uploader.upload_video(test_video, mcq_data)
-        
-        if video_id:
-            print("\n✅ SUCCESS! Ready to upload more videos.")
-            print("\nTo upload all videos, modify this script's main() function.")
-    else:
-        print(f"✗ Test video not found: {test_video}")
+    # Load MCQ data (indexed, only the MCQs we use are read)
+    with MCQDataset('mcqs_data/gk/gk_mcqs.json') as mcqs:
+        print(f"\n📚 Loaded {len(mcqs)} MCQs")
+        
+        # Test with first video
+        test_video = 'output/Quiz1.mp4'
+        if os.path.exists(test_video):
+            print(f"\n🎬 Testing with: {test_video}")
+            mcq_data = mcqs[0]
+            
+            video_id = uploader.upload_video(test_video, mcq_data)
+            
+            if video_id:
+                print("\n✅ SUCCESS! Ready to upload more videos.")
+                print("\nTo upload all videos, modify this script's main() function.")
+            for line in metrics.report():
+                print(f"   📈 {line}")
+            metrics.write('youtube_uploader')
+        else:
+            print(f"✗ Test video not found: {test_video}")
 
 
 if __name__ == '__main__':